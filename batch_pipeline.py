@@ -0,0 +1,317 @@
+"""
+Конвейер пакетной конвертации: чтение, обработка и запись разных файлов
+выполняются одновременно
+
+Запуск - через docx_to_excel_cli:
+    python -m docx_to_excel_cli batch <каталог_docx> <каталог_xlsx> --pipeline [--jobs N]
+        [--read-queue N] [--write-queue N]
+
+Стадии конвейера:
+    read    - поток основного процесса заранее читает следующие DOCX
+              файлы и распаковывает из них word/document.xml
+    process - пул из jobs процессов разбирает таблицы и применяет правила
+    write   - поток основного процесса записывает готовые книги
+
+Стадии связаны очередями ограниченного размера: чтение останавливается,
+когда read_queue_size документов ждут обработки, а обработка - когда
+write_queue_size результатов ждут записи. Распаковка zip и сжатие XLSX
+отпускают GIL, поэтому чтение и запись в потоках идут параллельно
+с обработкой в процессах.
+"""
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from docx_table_reader import iter_document_tables, read_main_document
+from docx_to_excel_cli import _replace_executor, find_docx_files, output_path_for, summarize
+from docx_to_excel_logic import DocxToExcelProcessor
+from record_index import RecordIndex
+
+# Размеры очередей между стадиями по умолчанию
+DEFAULT_READ_QUEUE_SIZE = 2
+DEFAULT_WRITE_QUEUE_SIZE = 2
+
+# Как часто основной поток проверяет очередь чтения, пока идет обработка, секунд
+_POLL_INTERVAL = 0.05
+
+# Конец очереди: стадия-источник завершила работу
+_DONE = None
+
+# Процессор рабочего процесса конвейера
+_pipeline_processor = None
+
+
+def run_pipeline(input_dir, output_dir, jobs=1, read_queue_size=DEFAULT_READ_QUEUE_SIZE,
+                 write_queue_size=DEFAULT_WRITE_QUEUE_SIZE, output_format="xlsx", index_path=None,
+                 table_filter=None):
+    """
+    Конвертирует все DOCX файлы каталога конвейером read -> process -> write
+
+    Ошибка в одном файле не прерывает обработку остальных. Если рабочий
+    процесс завершился аварийно (BrokenProcessPool), выполнявшиеся в пуле
+    файлы отмечаются ошибкой, а пул создается заново. Возвращает сводку
+    как docx_to_excel_cli.run_batch, дополненную загрузкой стадий
+    (summary["stages"])
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    docx_files = find_docx_files(input_dir)
+    jobs = max(jobs, 1)
+
+    read_queue = queue.Queue(maxsize=max(read_queue_size, 1))
+    write_queue = queue.Queue(maxsize=max(write_queue_size, 1))
+    stages = {name: _StageTimer() for name in ("read", "process", "write")}
+    results = []
+
+    if index_path:
+        # Ошибка открытия индекса сообщается сразу, а не из потока записи
+        RecordIndex(index_path).close()
+
+    started = time.perf_counter()
+    reader = threading.Thread(target=_read_stage, args=(docx_files, read_queue, stages["read"]),
+                              name="pipeline-read", daemon=True)
+    writer = threading.Thread(target=_write_stage,
+                              args=(write_queue, results, stages["write"], output_format, index_path),
+                              name="pipeline-write", daemon=True)
+    reader.start()
+    writer.start()
+
+    def create_executor():
+        return ProcessPoolExecutor(max_workers=jobs, initializer=_init_pipeline_worker,
+                                   initargs=(table_filter,))
+
+    try:
+        _process_stage(create_executor, jobs, read_queue, write_queue, stages["process"],
+                       output_dir, output_format)
+        reader.join()
+    finally:
+        # Поток записи дописывает уже обработанные файлы и завершается
+        write_queue.put(_DONE)
+        writer.join()
+
+    elapsed = time.perf_counter() - started
+
+    # Результаты в порядке файлов, а не в порядке завершения
+    order = {path: index for index, path in enumerate(docx_files)}
+    results.sort(key=lambda result: order[result["input"]])
+
+    summary = summarize(results, elapsed)
+    summary["stages"] = {
+        name: stage.report(elapsed, jobs if name == "process" else 1)
+        for name, stage in stages.items()
+    }
+    return summary
+
+
+def print_stages(summary, stream=None):
+    """Печатает загрузку стадий конвейера"""
+    print("Стадии конвейера:", file=stream)
+    for name, stage in summary["stages"].items():
+        print(f"  {name}: занята {stage['busy_seconds']:.2f} с ({stage['utilization']:.0%}), "
+              f"ожидание очереди {stage['blocked_seconds']:.2f} с, "
+              f"простой {stage['idle_seconds']:.2f} с", file=stream)
+
+
+class _StageTimer:
+    """
+    Время работы стадии: занята (работа), заблокирована (ждет места
+    в следующей очереди) и простаивает (ждет данных из предыдущей,
+    для process - когда ни один документ не обрабатывается)
+    """
+
+    def __init__(self):
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.idle = 0.0
+
+    def report(self, elapsed, workers=1):
+        """Загрузка - доля занятого времени от времени работы всех исполнителей стадии"""
+        capacity = elapsed * workers
+        return {
+            "workers": workers,
+            "busy_seconds": self.busy,
+            "blocked_seconds": self.blocked,
+            "idle_seconds": self.idle,
+            "utilization": self.busy / capacity if capacity else 0.0,
+        }
+
+
+def _read_stage(docx_files, read_queue, timer):
+    """Стадия read: распакованная основная часть каждого файла или ошибка чтения"""
+    for path in docx_files:
+        started = time.perf_counter()
+        try:
+            item = (path, started, read_main_document(path), None)
+        except Exception as e:
+            item = (path, started, None, f"{type(e).__name__}: {e}")
+        read_at = time.perf_counter()
+        timer.busy += read_at - started
+
+        read_queue.put(item)
+        timer.blocked += time.perf_counter() - read_at
+    read_queue.put(_DONE)
+
+
+def _process_stage(create_executor, jobs, read_queue, write_queue, timer, output_dir,
+                   output_format):
+    """
+    Стадия process: передает прочитанные документы свободным рабочим
+    процессам и отправляет результаты в очередь записи
+
+    Одновременно выполняется не больше jobs документов. Занятое время
+    стадии - время работы рабочих процессов. Пул процессов создает
+    create_executor; если рабочий процесс завершился аварийно
+    (BrokenProcessPool), файлы, выполнявшиеся в пуле, отмечаются ошибкой,
+    пул создается заново, и очередь чтения разбирается дальше
+    """
+    executor = create_executor()
+    # Выполняемые задания: future -> (DOCX файл, файл результата, начало чтения, пул)
+    pending = {}
+    reading = True
+
+    try:
+        while reading or pending:
+            while reading and len(pending) < jobs:
+                # Пока идет обработка, очередь чтения только проверяется
+                waiting_since = time.perf_counter()
+                try:
+                    item = read_queue.get(block=not pending)
+                except queue.Empty:
+                    break
+                if not pending:
+                    timer.idle += time.perf_counter() - waiting_since
+                if item is _DONE:
+                    reading = False
+                    break
+
+                path, started, document, error = item
+                output_path = output_path_for(path, output_dir, output_format)
+                if error is not None:
+                    _put(write_queue, (path, output_path, started, None, error), timer)
+                    continue
+                try:
+                    future = executor.submit(_process_document, document)
+                except BrokenProcessPool:
+                    # Пул сломан заданием, которое еще не собрано: его файлы получат
+                    # ошибку при сборе, а документ передается новому пулу
+                    executor = _replace_executor(executor, create_executor)
+                    future = executor.submit(_process_document, document)
+                pending[future] = (path, output_path, started, executor)
+
+            if not pending:
+                continue
+
+            # Пока есть свободные процессы, ожидание прерывается для проверки очереди чтения
+            polling = reading and len(pending) < jobs
+            done, _ = wait(pending, timeout=_POLL_INTERVAL if polling else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                path, output_path, started, future_executor = pending.pop(future)
+                try:
+                    sheets, stats, seconds = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool) and future_executor is executor:
+                        executor = _replace_executor(executor, create_executor)
+                    _put(write_queue, (path, output_path, started, None, f"{type(e).__name__}: {e}"),
+                         timer)
+                    continue
+                timer.busy += seconds
+                _put(write_queue, (path, output_path, started, (sheets, stats), None), timer)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _put(write_queue, item, timer):
+    """Отправляет результат на запись; ожидание места в очереди - блокировка стадии"""
+    waiting_since = time.perf_counter()
+    write_queue.put(item)
+    timer.blocked += time.perf_counter() - waiting_since
+
+
+def _write_stage(write_queue, results, timer, output_format, index_path):
+    """
+    Стадия write: записывает книги во временный файл и переименовывает их
+
+    Ошибка записи одного файла попадает в его результат: поток разбирает
+    очередь до конца, иначе обработка остановилась бы на заполненной очереди
+    """
+    record_index = None
+    processor = None
+    setup_error = None
+    try:
+        # Соединение SQLite используется в потоке, в котором создано
+        record_index = RecordIndex(index_path) if index_path else None
+        processor = DocxToExcelProcessor(output_format=output_format, record_index=record_index)
+    except Exception as e:
+        setup_error = f"{type(e).__name__}: {e}"
+
+    try:
+        while True:
+            waiting_since = time.perf_counter()
+            item = write_queue.get()
+            timer.idle += time.perf_counter() - waiting_since
+            if item is _DONE:
+                return
+
+            started = time.perf_counter()
+            docx_path, excel_path, read_started, processed, error = item
+            try:
+                result = _write_result(processor, docx_path, excel_path, read_started, processed,
+                                       error or setup_error)
+            except Exception as e:
+                result = {"input": docx_path, "output": excel_path, "ok": False,
+                          "error": f"{type(e).__name__}: {e}",
+                          "seconds": time.perf_counter() - read_started}
+            results.append(result)
+            timer.busy += time.perf_counter() - started
+    finally:
+        if record_index is not None:
+            record_index.close()
+
+
+def _write_result(processor, docx_path, excel_path, started, processed, error):
+    """
+    Записывает результат одного файла; возвращает словарь как docx_to_excel_cli.convert_file
+
+    Книга записывается во временный файл и переименовывается, а записи
+    индекса добавляются только после этого (write_processed_tables)
+    """
+    result = {"input": docx_path, "output": excel_path, "ok": False}
+    if error is None:
+        sheets, stats = processed
+        try:
+            table_count = processor.write_processed_tables(docx_path, excel_path, sheets, stats)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            if not table_count:
+                result["output"] = None
+            result.update(ok=True, tables=table_count, stats=stats)
+
+    if error is not None:
+        result["error"] = error
+    # Время от начала чтения файла до окончания записи результата
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _init_pipeline_worker(table_filter=None):
+    global _pipeline_processor
+    _pipeline_processor = DocxToExcelProcessor(share_cache=True, table_filter=table_filter)
+
+
+def _process_document(document):
+    """
+    Разбирает таблицы распакованной основной части DOCX и обрабатывает их
+    в рабочем процессе
+
+    Возвращает (листы, статистика, время обработки в секундах)
+    """
+    started = time.perf_counter()
+    processor = _pipeline_processor or DocxToExcelProcessor()
+    tables = iter_document_tables(io.BytesIO(document), processor.merged_cells)
+    sheets, stats = processor.process_document_tables(tables)
+    return sheets, stats, time.perf_counter() - started
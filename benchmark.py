@@ -0,0 +1,447 @@
+"""
+Замеры производительности конвертации на синтетических документах
+
+Создание синтетического обзора:
+    python -m benchmark generate <файл.docx> --rows 10000 [--tables 3] [--seed 1]
+
+Замеры для набора размеров документа с сохранением результатов в JSON:
+    python -m benchmark run [--sizes 100 1000 10000 200000] [--repeat 3] [--output результаты.json]
+
+Сравнение двух сохраненных запусков:
+    python -m benchmark compare <старые.json> <новые.json>
+
+Время запуска (импорт модулей в новом процессе) и сравнение с целевым:
+    python -m benchmark startup [--repeat 5]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from docx_to_excel_logic import DocxToExcelProcessor, _ColumnTable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+# Модули, время импорта которых замеряется: окно программы, пакетная
+# обработка и логика обработки
+STARTUP_MODULES = ["simple_docx_to_excel", "docx_to_excel_cli", "docx_to_excel_logic"]
+
+# Целевое время импорта модуля окна программы, секунд: python-docx и
+# openpyxl загружаются только при первой обработке, поэтому окно должно
+# появляться без их загрузки
+STARTUP_TARGET_SECONDS = 0.25
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+HEADER = ["№", "Дата", "Код", "ФИО", "Дата рождения", "Сведения", "Суд",
+          "Окончание срока", "Примечание", "Дополнительно", "Суды"]
+
+PERSONS = ["Иванов Иван Иванович", "Петров Петр Петрович", "Сидорова Анна Викторовна",
+           "Кузнецов Дмитрий Сергеевич", "Смирнова Елена Олеговна", "Попов Андрей Николаевич"]
+
+# Тексты о судимостях с типичными сокращениями; {d} заменяется датой
+COURT_TEXTS = [
+    "{d} Приморским р/с СПб по ст. 158 ч. 2 УК РФ к 2 г. л/св",
+    "пост. Кировского р/с от {d} УДО на 1 г 6 м.",
+    "осужденный {d} МССУ № 12 ЛО по ч.1 ст.159 к 300 ч ОР",
+    "Приговором Невского р/с {d} ИС 3 года, удерж. 10% з/п",
+    "{d} Мировым судьей с/у 5, ст 228 ч 2 п «а» 5 лет ИК",
+    "приг. Выборгского г/с ЛО от {d} по ст. 161 ч. 1, ст. 69 ч. 5 к 3 г. 6 мес. л/св",
+    "Колпинским г/с {d}, ЗЗД управлять ТС 2 г.; ПМЖ нет",
+    "судом по ст. 30 ч.3, {d};{d}  постановлением",
+    "отбыв. наказания в ИК, принуд. работы 11 мес, 21 дн.",
+]
+
+END_DATE_TEXTS = ["{d}", "{d} {d}", "{d} по отбытии срока", "по отбытии срока", "УДО", ""]
+
+NOTES = ["", "примечание", "ранее: {d}", "сведения уточняются"]
+
+
+def format_random_date(rng):
+    """Случайная дата в одном из форматов, которые встречаются в обзорах"""
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(1950, 2024)
+    short_year = year % 100
+    return rng.choice([
+        f"{day:02d}.{month:02d}.{short_year:02d}",
+        f"{day:02d}.{month:02d}.{year}",
+        f"{day}.{month}.{short_year:02d}",
+        f"{day:02d}{month:02d}.{short_year:02d}",
+        f"{day:02d}{month:02d}{year}",
+        f"{day}/{month}/{short_year:02d}",
+        f"{day:02d}/{month:02d}/{year}",
+        f"{day}-{month}-{short_year:02d}",
+        f"{day:02d}-{month:02d}-{year}",
+    ])
+
+
+def generate_row(rng, number):
+    """Строка обзора из 11 столбцов в раскладке, которую ожидает DocxToExcelProcessor"""
+    def fill(template):
+        return template.replace("{d}", "{}").format(
+            *(format_random_date(rng) for _ in range(template.count("{d}")))
+        )
+
+    def court_text(probability):
+        if rng.random() >= probability:
+            return ""
+        # Длинная история судимостей из нескольких записей
+        return " ".join(fill(rng.choice(COURT_TEXTS)) for _ in range(rng.randint(1, 4)))
+
+    birth_date = format_random_date(rng)
+    if rng.random() < 0.5:
+        birth_date += " г.р."
+
+    return [
+        str(number),
+        format_random_date(rng) if rng.random() < 0.9 else "дата неизвестна",
+        f"К-{number}",
+        rng.choice(PERSONS),
+        birth_date,
+        court_text(0.5) or "нет",
+        court_text(0.4),
+        fill(rng.choice(END_DATE_TEXTS)),
+        fill(rng.choice(NOTES)),
+        "",
+        court_text(0.3),
+    ]
+
+
+def generate_docx(path, rows, tables=3, seed=1):
+    """
+    Создает синтетический обзор: tables таблиц, всего около rows строк
+
+    Документ пишется напрямую в XML без python-docx, поэтому даже
+    документы на сотни тысяч строк создаются за секунды. У первой таблицы
+    есть строка заголовка, вторая начинается сразу с данных (первая
+    строка сохраняется при обработке).
+    """
+    rng = random.Random(seed)
+    rows_per_table = [rows // tables + (1 if index < rows % tables else 0) for index in range(tables)]
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        archive.writestr("_rels/.rels", ROOT_RELS_XML)
+        with archive.open("word/document.xml", "w", force_zip64=True) as stream:
+            stream.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<w:document xmlns:w="{W_NS}"><w:body>'.encode("utf-8")
+            )
+            stream.write(_paragraph_xml("Обзор").encode("utf-8"))
+
+            number = 0
+            for index, table_rows in enumerate(rows_per_table):
+                stream.write(b"<w:tbl>")
+                if index != 1:
+                    stream.write(_row_xml(HEADER).encode("utf-8"))
+                for _ in range(table_rows):
+                    number += 1
+                    stream.write(_row_xml(generate_row(rng, number)).encode("utf-8"))
+                stream.write(b"</w:tbl>")
+                stream.write(_paragraph_xml("").encode("utf-8"))
+
+            stream.write(b"</w:body></w:document>")
+
+
+def _paragraph_xml(text):
+    if not text:
+        return "<w:p/>"
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _row_xml(values):
+    cells = "".join(f"<w:tc>{_paragraph_xml(value)}</w:tc>" for value in values)
+    return f"<w:tr>{cells}</w:tr>"
+
+
+def peak_rss_bytes():
+    """Пиковый объем занятой процессом памяти или None, если узнать нельзя"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в килобайтах, в macOS - в байтах
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - started, result
+
+
+def measure_stages(docx_path):
+    """
+    Время каждого этапа обработки по отдельности
+
+    Этапы выполняются так же, как в режиме execution="columns":
+    удаление столбцов и строки, затем проход по листу для каждого правила.
+    Кэши преобразований перед замером очищаются.
+    """
+    processor = DocxToExcelProcessor()
+    processor._create_stats()
+
+    stages = {}
+    stages["read"], tables = _timed(processor._extract_tables, docx_path)
+
+    stage_names = ["delete_columns", "_normalize_dates", "_normalize_birth_dates",
+                   "_process_end_dates", "_move_court_info",
+                   "_normalize_dates_in_court_info", "_format_court_info", "column_widths"]
+    for name in stage_names:
+        stages[name] = 0.0
+
+    for rows in tables:
+        sheet = _ColumnTable(rows)
+
+        def delete_columns():
+            delete_first_row = not processor._is_date(sheet.cell(row=1, column=2).value)
+            sheet.delete_cols(3, 1)
+            sheet.delete_cols(1, 1)
+            if delete_first_row:
+                sheet.delete_rows(1, 1)
+
+        steps = [
+            ("delete_columns", delete_columns),
+            ("_normalize_dates", lambda: processor._normalize_dates(sheet, 1)),
+            ("_normalize_birth_dates", lambda: processor._normalize_birth_dates(sheet, 3)),
+            ("_process_end_dates", lambda: processor._process_end_dates(sheet, 6, 8)),
+            ("_move_court_info", lambda: processor._move_court_info(sheet, (4, 5), 9)),
+            ("_normalize_dates_in_court_info", lambda: processor._normalize_dates_in_court_info(sheet, 9)),
+            ("_format_court_info", lambda: processor._format_court_info(sheet, 9)),
+        ]
+        for name, step in steps:
+            elapsed, _ = _timed(step)
+            stages[name] += elapsed
+
+        def column_widths():
+            tracker = processor._create_width_tracker()
+            for row in sheet:
+                tracker.add_row(row)
+            return tracker.widths()
+
+        elapsed, _ = _timed(column_widths)
+        stages["column_widths"] += elapsed
+
+    return stages
+
+
+def run_case(rows, repeat=1, tables=3, seed=1):
+    """
+    Замеры для документа из rows строк; выполняется в отдельном процессе,
+    чтобы пиковый объем памяти относился только к этому документу
+
+    Для каждого замера берется лучшее время из repeat повторов
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        docx_path = os.path.join(directory, "benchmark.docx")
+        generate_docx(docx_path, rows, tables=tables, seed=seed)
+
+        timings = {
+            "convert_docx_to_excel": [],
+            "process_excel_file": [],
+            "convert_and_process": [],
+        }
+        stages = None
+        rows_processed = 0
+
+        for _ in range(repeat):
+            processor = DocxToExcelProcessor()
+            two_step_path = os.path.join(directory, "two_step.xlsx")
+            elapsed, _ = _timed(processor.convert_docx_to_excel, docx_path, two_step_path)
+            timings["convert_docx_to_excel"].append(elapsed)
+            elapsed, _ = _timed(processor.process_excel_file, two_step_path)
+            timings["process_excel_file"].append(elapsed)
+
+            processor = DocxToExcelProcessor()
+            elapsed, (_, stats) = _timed(
+                processor.convert_and_process, docx_path, os.path.join(directory, "one_step.xlsx")
+            )
+            timings["convert_and_process"].append(elapsed)
+            rows_processed = stats["rows_processed"]
+
+            case_stages = measure_stages(docx_path)
+            if stages is None:
+                stages = case_stages
+            else:
+                stages = {name: min(stages[name], value) for name, value in case_stages.items()}
+
+        best = {name: min(values) for name, values in timings.items()}
+        return {
+            "rows": rows,
+            "rows_processed": rows_processed,
+            "docx_bytes": os.path.getsize(docx_path),
+            "seconds": best,
+            "rows_per_second": {
+                name: rows_processed / seconds if seconds else None
+                for name, seconds in best.items()
+            },
+            "stages": stages,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+
+def measure_startup(module, repeat=5):
+    """Лучшее из repeat время импорта module в новом интерпретаторе, секунд"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - started)"
+    )
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=directory, check=True,
+                                capture_output=True, text=True).stdout
+        times.append(float(output))
+    return min(times)
+
+
+def run_startup(repeat=5):
+    """Время импорта модулей STARTUP_MODULES"""
+    return {module: measure_startup(module, repeat) for module in STARTUP_MODULES}
+
+
+def print_startup(startup, stream=sys.stdout):
+    print("Время запуска:", file=stream)
+    for module, seconds in startup.items():
+        print(f"  import {module}: {seconds:.3f} с", file=stream)
+    seconds = startup.get(STARTUP_MODULES[0])
+    if seconds is not None:
+        verdict = "в норме" if seconds <= STARTUP_TARGET_SECONDS else "ПРЕВЫШЕНО"
+        print(f"  цель для {STARTUP_MODULES[0]}: {STARTUP_TARGET_SECONDS:.3f} с - {verdict}", file=stream)
+
+
+def run_benchmarks(sizes, repeat=1, tables=3, seed=1):
+    """Выполняет замеры для каждого размера документа в новом процессе"""
+    cases = []
+    for rows in sizes:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            cases.append(executor.submit(run_case, rows, repeat, tables, seed).result())
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "tables": tables,
+        "seed": seed,
+        "startup": run_startup(),
+        "startup_target_seconds": STARTUP_TARGET_SECONDS,
+        "cases": cases,
+    }
+
+
+def print_results(results, stream=sys.stdout):
+    if "startup" in results:
+        print_startup(results["startup"], stream)
+    for case in results["cases"]:
+        print(f"Строк: {case['rows']}", file=stream)
+        for name, seconds in case["seconds"].items():
+            print(f"  {name}: {seconds:.3f} с, {case['rows_per_second'][name] or 0:.0f} строк/с", file=stream)
+        for name, seconds in case["stages"].items():
+            print(f"    {name}: {seconds:.3f} с", file=stream)
+        if case["peak_rss_bytes"] is not None:
+            print(f"  пиковая память: {case['peak_rss_bytes'] / 1024 / 1024:.1f} МБ", file=stream)
+
+
+def compare_results(old, new, stream=sys.stdout):
+    """Печатает отношение времени нового запуска к старому для общих размеров"""
+    for module, seconds in new.get("startup", {}).items():
+        old_seconds = old.get("startup", {}).get(module)
+        if old_seconds:
+            print(f"import {module}: {old_seconds:.3f} -> {seconds:.3f} с "
+                  f"(x{seconds / old_seconds:.2f})", file=stream)
+
+    old_cases = {case["rows"]: case for case in old["cases"]}
+    for case in new["cases"]:
+        old_case = old_cases.get(case["rows"])
+        if old_case is None:
+            continue
+        print(f"Строк: {case['rows']}", file=stream)
+        for section in ("seconds", "stages"):
+            for name, seconds in case[section].items():
+                old_seconds = old_case[section].get(name)
+                if old_seconds:
+                    print(f"  {name}: {old_seconds:.3f} -> {seconds:.3f} с "
+                          f"(x{seconds / old_seconds:.2f})", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark",
+                                     description="Замеры производительности конвертации")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="создать синтетический обзор")
+    generate.add_argument("path", help="путь к создаваемому DOCX файлу")
+    generate.add_argument("--rows", type=int, default=1000, help="число строк")
+    generate.add_argument("--tables", type=int, default=3, help="число таблиц")
+    generate.add_argument("--seed", type=int, default=1, help="начальное значение генератора")
+
+    run = commands.add_parser("run", help="выполнить замеры")
+    run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                     help="размеры документов в строках")
+    run.add_argument("--repeat", type=int, default=1, help="число повторов каждого замера")
+    run.add_argument("--tables", type=int, default=3, help="число таблиц в документе")
+    run.add_argument("--seed", type=int, default=1, help="начальное значение генератора")
+    run.add_argument("--output", default=None, help="сохранить результаты в JSON")
+
+    startup = commands.add_parser("startup", help="замерить время запуска")
+    startup.add_argument("--repeat", type=int, default=5, help="число повторов замера")
+
+    compare = commands.add_parser("compare", help="сравнить два сохраненных запуска")
+    compare.add_argument("old", help="JSON с результатами прежнего запуска")
+    compare.add_argument("new", help="JSON с результатами нового запуска")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        generate_docx(args.path, args.rows, tables=args.tables, seed=args.seed)
+    elif args.command == "run":
+        results = run_benchmarks(args.sizes, repeat=args.repeat, tables=args.tables, seed=args.seed)
+        print_results(results)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+    elif args.command == "startup":
+        startup = run_startup(args.repeat)
+        print_startup(startup)
+        if startup[STARTUP_MODULES[0]] > STARTUP_TARGET_SECONDS:
+            return 1
+    else:
+        with open(args.old, encoding="utf-8") as old, open(args.new, encoding="utf-8") as new:
+            compare_results(json.load(old), json.load(new))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# Длина текста пустой ячейки при автоподборе ширины: len(str(None)).
+# Исторически пустые ячейки внутри занятого диапазона листа учитывались
+# как текст "None", поэтому такой столбец не бывает уже 6 символов.
+EMPTY_CELL_LENGTH = len(str(None))
+
+# Шаг выборки строк после первых sample_rows строк
+SAMPLE_STEP = 100
+
+
+class ColumnWidthTracker:
+    """
+    Ширина столбцов, рассчитываемая по мере добавления строк.
+
+    Для каждого столбца хранится максимальная длина значения и число
+    заполненных ячеек, поэтому ширина известна сразу после последней
+    строки и лист не нужно просматривать повторно. Ширина столбца -
+    длина самого длинного значения + 2.
+
+    max_width - ограничение ширины столбца (None - без ограничения)
+    sample_rows - режим выборки для очень больших листов: длины значений
+        измеряются в первых sample_rows строках и далее в каждой
+        SAMPLE_STEP-й строке; None - измеряются все строки
+    """
+
+    def __init__(self, max_width=None, sample_rows=None):
+        self.max_width = max_width
+        self.sample_rows = sample_rows
+        self._row_count = 0
+        # Последняя строка, в которой есть ячейки, и число столбцов
+        self._max_row = 0
+        self._max_column = 0
+        # Число измеренных строк и их число на момент последней непустой строки
+        self._measured_rows = 0
+        self._measured_at_max_row = 0
+        # Для каждого столбца: максимальная длина значения и число заполненных ячеек
+        self._max_lengths = []
+        self._filled = []
+
+    def add_row(self, values):
+        """Учитывает строку значений; None означает отсутствующую ячейку"""
+        self._row_count += 1
+        column_count = len(values)
+
+        measured = self._is_measured(self._row_count)
+        if measured:
+            self._measured_rows += 1
+            max_lengths = self._max_lengths
+            filled = self._filled
+            if column_count > len(max_lengths):
+                max_lengths.extend([0] * (column_count - len(max_lengths)))
+                filled.extend([0] * (column_count - len(filled)))
+
+            for index, value in enumerate(values):
+                if value is None:
+                    continue
+                length = len(value) if value.__class__ is str else len(str(value))
+                if length > max_lengths[index]:
+                    max_lengths[index] = length
+                filled[index] += 1
+
+        if column_count:
+            self._max_row = self._row_count
+            self._measured_at_max_row = self._measured_rows
+            if column_count > self._max_column:
+                self._max_column = column_count
+
+    def widths(self):
+        """
+        Ширина столбцов: {буква столбца: ширина}
+
+        Без выборки и ограничения совпадает с прежним автоподбором по
+        всем ячейкам листа openpyxl с теми же строками
+        """
+        if not self._row_count:
+            return {}
+
+        # openpyxl загружается только при первом расчете ширины
+        from openpyxl.utils import get_column_letter
+
+        measured_rows = max(self._measured_at_max_row, 1)
+        widths = {}
+        for index in range(max(self._max_column, 1)):
+            max_length = self._max_lengths[index] if index < len(self._max_lengths) else 0
+            filled = self._filled[index] if index < len(self._filled) else 0
+            if filled < measured_rows:
+                max_length = max(max_length, EMPTY_CELL_LENGTH)
+            width = max_length + 2
+            if self.max_width is not None:
+                width = min(width, self.max_width)
+            widths[get_column_letter(index + 1)] = width
+        return widths
+
+    def _is_measured(self, row_number):
+        if self.sample_rows is None or row_number <= self.sample_rows:
+            return True
+        return (row_number - self.sample_rows) % SAMPLE_STEP == 0
@@ -0,0 +1,229 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+# Версия формата записей кэша; при несовместимом изменении формата
+# увеличивается, и старые записи перестают находиться
+CACHE_FORMAT_VERSION = 1
+
+# Размер кэша по умолчанию, байт
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ConversionCache:
+    """
+    Дисковый кэш результатов конвертации DOCX в Excel.
+
+    Хранит два вида записей:
+    - таблицы: обработанные строки таблицы и счетчики статистики, ключ -
+      хэш исходных строк таблицы и версии правил обработки;
+    - файлы: список ключей таблиц документа, суммарная статистика и
+      размер/время изменения записанного Excel-файла, ключ - хэш
+      содержимого DOCX файла.
+
+    Неизмененный файл пропускается целиком, а в измененном заново
+    обрабатываются только таблицы с новым содержимым. Общий размер
+    записей ограничен max_size байт: при превышении удаляются записи,
+    к которым дольше всего не обращались. Записи пишутся через временный
+    файл и переименование, поэтому каталог кэша можно использовать
+    из нескольких процессов одновременно.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        # Оценка текущего размера; None - еще не подсчитан
+        self._size = None
+
+    def file_key(self, docx_path, salt):
+        """Ключ файла: хэш содержимого DOCX и параметров обработки salt"""
+        digest = hashlib.sha256(self._salt_bytes(salt))
+        with open(docx_path, "rb") as stream:
+            for chunk in iter(lambda: stream.read(_HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def table_key(self, rows, salt):
+        """Ключ таблицы: хэш текстов ячеек всех строк и параметров обработки salt"""
+        digest = hashlib.sha256(self._salt_bytes(salt))
+        for row in rows:
+            digest.update(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def get_table(self, key):
+        """Возвращает (обработанные строки, статистика) или None"""
+        entry = self._read_entry("tables", key)
+        if entry is None:
+            return None
+        return entry["rows"], entry["stats"]
+
+    def put_table(self, key, rows, stats):
+        self._write_entry("tables", key, {"rows": rows, "stats": stats})
+
+    def get_file(self, key):
+        """Возвращает описание обработанного файла или None"""
+        return self._read_entry("files", key)
+
+    def put_file(self, key, table_keys, stats, excel_path):
+        """
+        Запоминает результат обработки файла
+
+        excel_path - записанный Excel-файл (None, если таблиц не было);
+        запоминаются его размер и время изменения, которые при
+        переименовании файла не меняются
+        """
+        output = None
+        if excel_path is not None:
+            status = os.stat(excel_path)
+            output = {"size": status.st_size, "mtime_ns": status.st_mtime_ns}
+        self._write_entry("files", key, {"tables": table_keys, "stats": stats, "output": output})
+
+    def output_matches(self, entry, excel_path):
+        """Проверяет, что excel_path - тот самый файл, который был записан"""
+        output = entry["output"]
+        if output is None:
+            # В документе не было таблиц, и файл не создавался
+            return True
+        try:
+            status = os.stat(excel_path)
+        except OSError:
+            return False
+        return status.st_size == output["size"] and status.st_mtime_ns == output["mtime_ns"]
+
+    def invalidate_file(self, docx_path, salt):
+        """
+        Удаляет из кэша записи файла и его таблиц
+
+        Возвращает True, если файл был в кэше
+        """
+        key = self.file_key(docx_path, salt)
+        entry = self._read_entry("files", key)
+        if entry is None:
+            return False
+        for table_key in entry["tables"]:
+            self._remove_entry("tables", table_key)
+        self._remove_entry("files", key)
+        return True
+
+    def clear(self):
+        """Удаляет все записи кэша; возвращает количество удаленных записей"""
+        removed = 0
+        for _, path, _, _ in self._iter_entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self._size = 0
+        return removed
+
+    def info(self):
+        """Количество записей по видам и общий размер кэша в байтах"""
+        counts = {"files": 0, "tables": 0}
+        size = 0
+        for kind, _, entry_size, _ in self._iter_entries():
+            counts[kind] += 1
+            size += entry_size
+        self._size = size
+        return {"files": counts["files"], "tables": counts["tables"], "size": size, "max_size": self.max_size}
+
+    def _salt_bytes(self, salt):
+        return json.dumps([CACHE_FORMAT_VERSION, salt], ensure_ascii=False).encode("utf-8") + b"\0"
+
+    def _entry_path(self, kind, key):
+        # Записи раскладываются по подкаталогам, чтобы не держать
+        # десятки тысяч файлов в одном каталоге
+        return os.path.join(self.directory, kind, key[:2], f"{key}.json.gz")
+
+    def _read_entry(self, kind, key):
+        path = self._entry_path(kind, key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as stream:
+                entry = json.load(stream)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError):
+            # Поврежденная запись считается отсутствующей
+            self._remove_entry(kind, key)
+            return None
+
+        # Время изменения записи служит временем последнего обращения
+        # для вытеснения
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _write_entry(self, kind, key, entry):
+        path = self._entry_path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as raw_stream:
+                with gzip.open(raw_stream, "wt", encoding="utf-8") as stream:
+                    json.dump(entry, stream, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if self._size is not None:
+            self._size += os.path.getsize(path)
+        self._evict()
+
+    def _remove_entry(self, kind, key):
+        path = self._entry_path(kind, key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if self._size is not None:
+            self._size = max(self._size - size, 0)
+
+    def _iter_entries(self):
+        """Все записи кэша: (вид, путь, размер, время последнего обращения)"""
+        for kind in ("files", "tables"):
+            kind_directory = os.path.join(self.directory, kind)
+            if not os.path.isdir(kind_directory):
+                continue
+            for bucket in os.scandir(kind_directory):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    if not entry.name.endswith(".json.gz"):
+                        continue
+                    try:
+                        status = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield kind, entry.path, status.st_size, status.st_mtime_ns
+
+    def _evict(self):
+        """Удаляет давно не использованные записи, пока размер кэша больше max_size"""
+        if self.max_size is None:
+            return
+        # Размер пересчитывается по каталогу только при подозрении на
+        # превышение: другие процессы могли изменить кэш
+        if self._size is not None and self._size <= self.max_size:
+            return
+
+        entries = sorted(self._iter_entries(), key=lambda entry: entry[3])
+        size = sum(entry_size for _, _, entry_size, _ in entries)
+        for _, path, entry_size, _ in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
@@ -0,0 +1,368 @@
+"""
+Локальный HTTP-сервис конвертации DOCX в Excel
+
+Запуск:
+    python -m conversion_service [--host 127.0.0.1] [--port 8765] [--workers 2] [--queue-size 8]
+        [--timeout СЕКУНДЫ]
+
+Запросы:
+    POST /convert     - тело запроса: DOCX файл; ответ: обработанная книга
+                        XLSX, статистика обработки - в заголовке X-Conversion-Stats
+                        (JSON). С параметром ?response=json ответ - JSON
+                        {"tables", "stats", "xlsx"} с книгой в base64
+    GET  /metrics     - число заданий, задержки (перцентили) и пропускная способность
+
+    curl --data-binary @обзор.docx -o обзор.xlsx http://127.0.0.1:8765/convert
+
+Процессоры DocxToExcelProcessor создаются один раз в каждом рабочем
+процессе при запуске сервиса, поэтому импорт python-docx/openpyxl и кэши
+преобразований не повторяются для каждого файла. Если в работе и в
+очереди уже workers + queue_size заданий, новые запросы сразу получают
+ответ 503 с заголовком Retry-After, а тело запроса не читается. Если
+рабочий процесс аварийно завершился, запрос получает ответ 500, а пул
+процессов создается заново.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from docx_to_excel_cli import _init_worker, convert_file
+from docx_to_excel_logic import warm_up
+
+DEFAULT_PORT = 8765
+
+# Максимальный размер загружаемого файла по умолчанию, байт
+DEFAULT_MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+
+# Число последних заданий, по которым считаются перцентили задержки
+LATENCY_WINDOW = 1000
+
+# Интервал, за который считается пропускная способность, секунд
+THROUGHPUT_WINDOW = 60
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ConversionService:
+    """
+    HTTP-сервис конвертации поверх asyncio.start_server.
+
+    Задания выполняются в пуле из workers процессов; одновременно
+    принимается не больше workers + queue_size заданий (выполняемых
+    и ожидающих), остальные запросы отклоняются с кодом 503.
+    timeout - максимальное время обработки одного файла, секунд
+    """
+
+    def __init__(self, workers=1, queue_size=4, timeout=None, max_upload_size=DEFAULT_MAX_UPLOAD_SIZE):
+        self.workers = max(workers, 1)
+        self.queue_size = max(queue_size, 0)
+        self.timeout = timeout
+        self.max_upload_size = max_upload_size
+        self._executor = None
+        self._started = time.monotonic()
+        # Принятые и еще не завершенные задания
+        self._active = 0
+        self._counters = {"accepted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        # Завершенные задания: (время завершения, длительность, строк обработано)
+        self._finished = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Запускает рабочие процессы и сервер; возвращает asyncio.Server"""
+        self._executor = self._create_executor()
+        # Рабочие процессы создаются при первых заданиях; задания прогрева
+        # запускают их сразу, чтобы первый запрос не ждал импортов
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, warm_up) for _ in range(self.workers)
+        ))
+        self._started = time.monotonic()
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def _create_executor(self):
+        # Процесс, созданный копированием сервиса (fork) во время работы,
+        # например в пуле взамен аварийного, унаследовал бы открытые
+        # соединения, и клиенты не получали бы конец ответа. Поэтому
+        # процессы запускаются через forkserver, где он доступен
+        context = None
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                   initializer=_init_worker)
+
+    def _replace_broken_executor(self, executor):
+        """
+        Заменяет пул, в котором аварийно завершился рабочий процесс: иначе
+        все следующие задания сразу завершались бы ошибкой BrokenProcessPool
+        """
+        # Задания, выполнявшиеся в том же пуле, тоже получают ошибку; пул
+        # заменяется только один раз
+        if self._executor is executor:
+            self._executor = self._create_executor()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Останавливает рабочие процессы"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def capacity(self):
+        """Максимальное число принятых заданий: выполняемые и ожидающие"""
+        return self.workers + self.queue_size
+
+    def metrics(self):
+        """Счетчики заданий, перцентили задержки и пропускная способность"""
+        now = time.monotonic()
+        latencies = sorted(seconds for _, seconds, _ in self._finished)
+        recent = [(finished, rows) for finished, _, rows in self._finished
+                  if now - finished <= THROUGHPUT_WINDOW]
+        window = min(THROUGHPUT_WINDOW, max(now - self._started, 1e-9))
+
+        return {
+            **self._counters,
+            "in_flight": min(self._active, self.workers),
+            "queued": max(self._active - self.workers, 0),
+            "capacity": self.capacity,
+            "uptime_seconds": now - self._started,
+            "latency_seconds": {
+                "p50": _percentile(latencies, 50),
+                "p90": _percentile(latencies, 90),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+                "samples": len(latencies),
+            },
+            "throughput": {
+                "window_seconds": window,
+                "jobs_per_second": len(recent) / window,
+                "rows_per_second": sum(rows for _, rows in recent) / window,
+            },
+        }
+
+    async def convert(self, docx_data):
+        """
+        Обрабатывает DOCX файл в пуле процессов
+
+        Возвращает результат docx_to_excel_cli.convert_file, дополненный
+        содержимым книги ("xlsx", None - если таблиц нет).
+        Если рабочий процесс аварийно завершился, пул процессов создается
+        заново, а исключение BrokenProcessPool передается вызывающему
+        """
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        with tempfile.TemporaryDirectory(prefix="docx_to_excel_") as directory:
+            docx_path = os.path.join(directory, "input.docx")
+            excel_path = os.path.join(directory, "output.xlsx")
+            # Файлы записываются и читаются в потоке, чтобы не задерживать
+            # обработку других соединений
+            await loop.run_in_executor(None, _write_file, docx_path, docx_data)
+
+            # Пул берется после записи файла: за это время его мог заменить
+            # _replace_broken_executor после сбоя другого задания
+            executor = self._executor
+            try:
+                result = await loop.run_in_executor(
+                    executor, convert_file, docx_path, excel_path, self.timeout
+                )
+            except BrokenProcessPool:
+                self._counters["failed"] += 1
+                self._replace_broken_executor(executor)
+                raise
+            result["xlsx"] = None
+            if result["ok"] and result["output"] is not None:
+                result["xlsx"] = await loop.run_in_executor(None, _read_file, excel_path)
+
+        if result["ok"]:
+            self._counters["completed"] += 1
+            rows = result["stats"].get("rows_processed", 0)
+            self._finished.append((time.monotonic(), time.monotonic() - started, rows))
+        else:
+            self._counters["failed"] += 1
+        return result
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            request = await _read_request_head(reader)
+            if request is None:
+                return
+            method, target, headers = request
+            url = urlsplit(target)
+
+            if url.path == "/metrics":
+                if method != "GET":
+                    await _send(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "используйте GET"})
+                else:
+                    await _send(writer, HTTPStatus.OK, self.metrics())
+            elif url.path == "/convert":
+                if method != "POST":
+                    await _send(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "используйте POST"})
+                else:
+                    await self._handle_convert(reader, writer, headers, parse_qs(url.query))
+            else:
+                await _send(writer, HTTPStatus.NOT_FOUND, {"error": f"неизвестный путь {url.path}"})
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            # Клиент отключился или прислал некорректный запрос
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_convert(self, reader, writer, headers, query):
+        try:
+            length = int(headers["content-length"])
+        except (KeyError, ValueError):
+            await _send(writer, HTTPStatus.LENGTH_REQUIRED, {"error": "нужен заголовок Content-Length"})
+            return
+        if length > self.max_upload_size:
+            await _send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        {"error": f"файл больше {self.max_upload_size} байт"})
+            return
+
+        # Место в очереди занимается до чтения тела: отклоненные запросы
+        # не загружают файл в память
+        if self._active >= self.capacity:
+            self._counters["rejected"] += 1
+            await _send(writer, HTTPStatus.SERVICE_UNAVAILABLE,
+                        {"error": "очередь заданий заполнена"}, headers={"Retry-After": "1"})
+            return
+
+        self._active += 1
+        try:
+            body = await reader.readexactly(length)
+            self._counters["accepted"] += 1
+            try:
+                result = await self.convert(body)
+            except BrokenProcessPool as e:
+                await _send(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                            {"error": f"рабочий процесс аварийно завершился: {e}"})
+                return
+            except OSError as e:
+                # Не удалось записать или прочитать временные файлы задания
+                self._counters["failed"] += 1
+                await _send(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                            {"error": f"ошибка временных файлов: {type(e).__name__}: {e}"})
+                return
+        finally:
+            self._active -= 1
+
+        if not result["ok"]:
+            await _send(writer, HTTPStatus.UNPROCESSABLE_ENTITY, {"error": result["error"]})
+        elif query.get("response") == ["json"] or result["xlsx"] is None:
+            # Без таблиц книга не создается, поэтому возвращается только статистика
+            xlsx = result["xlsx"]
+            await _send(writer, HTTPStatus.OK, {
+                "tables": result["tables"],
+                "stats": result["stats"],
+                "xlsx": base64.b64encode(xlsx).decode("ascii") if xlsx is not None else None,
+            })
+        else:
+            await _send(writer, HTTPStatus.OK, result["xlsx"], content_type=XLSX_CONTENT_TYPE, headers={
+                "X-Table-Count": str(result["tables"]),
+                "X-Conversion-Stats": json.dumps(result["stats"]),
+            })
+
+
+def _write_file(path, data):
+    with open(path, "wb") as stream:
+        stream.write(data)
+
+
+def _read_file(path):
+    with open(path, "rb") as stream:
+        return stream.read()
+
+
+def _percentile(sorted_values, percent):
+    """Перцентиль по ближайшему рангу; None для пустого списка"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+async def _read_request_head(reader):
+    """Строка запроса и заголовки: (метод, путь, {имя в нижнем регистре: значение})"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        return None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+async def _send(writer, status, body, content_type="application/json; charset=utf-8", headers=None):
+    """Отправляет ответ и завершает соединение; словарь body отправляется как JSON"""
+    if isinstance(body, dict):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+    ]
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, **options):
+    """Запускает сервис и обслуживает запросы до остановки"""
+    service = ConversionService(**options)
+    try:
+        server = await service.start(host, port)
+        print(f"Сервис конвертации: http://{host}:{port} (процессов: {service.workers}, "
+              f"очередь: {service.queue_size})", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m conversion_service",
+                                     description="Локальный HTTP-сервис конвертации DOCX в Excel")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес сервиса")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт сервиса")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="число рабочих процессов (по умолчанию - число ядер)")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="число заданий, ожидающих свободного процесса; сверх него - ответ 503")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="максимальное время обработки одного файла, секунд")
+    parser.add_argument("--max-upload-mb", type=float, default=DEFAULT_MAX_UPLOAD_SIZE / 1024 / 1024,
+                        help="максимальный размер загружаемого файла, МБ")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, queue_size=args.queue_size,
+                          timeout=args.timeout,
+                          max_upload_size=int(args.max_upload_mb * 1024 * 1024)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Пространства имен OOXML
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+W_BODY = f"{{{W_NS}}}body"
+W_TBL = f"{{{W_NS}}}tbl"
+W_TR = f"{{{W_NS}}}tr"
+W_TR_PR = f"{{{W_NS}}}trPr"
+W_GRID_BEFORE = f"{{{W_NS}}}gridBefore"
+W_TC = f"{{{W_NS}}}tc"
+W_TC_PR = f"{{{W_NS}}}tcPr"
+W_GRID_SPAN = f"{{{W_NS}}}gridSpan"
+W_V_MERGE = f"{{{W_NS}}}vMerge"
+W_P = f"{{{W_NS}}}p"
+W_R = f"{{{W_NS}}}r"
+W_HYPERLINK = f"{{{W_NS}}}hyperlink"
+W_T = f"{{{W_NS}}}t"
+W_TAB = f"{{{W_NS}}}tab"
+W_PTAB = f"{{{W_NS}}}ptab"
+W_BR = f"{{{W_NS}}}br"
+W_CR = f"{{{W_NS}}}cr"
+W_NO_BREAK_HYPHEN = f"{{{W_NS}}}noBreakHyphen"
+W_VAL = f"{{{W_NS}}}val"
+W_TYPE = f"{{{W_NS}}}type"
+
+# Политики обработки объединенных ячеек
+# "repeat" - текст объединенной ячейки повторяется в каждой ячейке сетки,
+#            которую она занимает (так же, как row.cells в python-docx)
+# "first"  - текст остается только в первой (левой верхней) ячейке,
+#            остальные ячейки объединения пустые
+MERGED_CELLS_POLICIES = ("repeat", "first")
+
+# Глубина строки таблицы верхнего уровня: document / body / tbl / tr
+_TOP_LEVEL_ROW_DEPTH = 3
+
+
+def iter_docx_tables(docx_path, merged_cells="repeat"):
+    """
+    Потоково читает таблицы верхнего уровня из DOCX
+
+    Для каждой таблицы возвращает итератор по ее строкам, каждая строка -
+    список текстов ячеек. Файл word/document.xml разбирается инкрементально
+    прямо из zip-архива, в памяти одновременно находится только одна строка,
+    поэтому потребление памяти не зависит от длины документа.
+
+    Итераторы строк (DocxTableRows) нужно читать по порядку, как у
+    itertools.groupby: при переходе к следующей таблице непрочитанные
+    строки предыдущей пропускаются без сбора текстов ячеек.
+
+    На обычных таблицах результат совпадает с извлечением через
+    python-docx (document.tables, row.cells, cell.text).
+    """
+    with zipfile.ZipFile(docx_path) as archive:
+        with archive.open(_main_document_part(archive)) as stream:
+            yield from iter_document_tables(stream, merged_cells)
+
+
+def read_main_document(docx_path):
+    """
+    Распакованное содержимое основной части DOCX (word/document.xml)
+
+    Таблицы из него читает iter_document_tables(io.BytesIO(...))
+    """
+    with zipfile.ZipFile(docx_path) as archive:
+        return archive.read(_main_document_part(archive))
+
+
+def iter_document_tables(stream, merged_cells="repeat"):
+    """
+    То же, что iter_docx_tables, но для уже открытого XML основной
+    части документа (файлового объекта)
+    """
+    if merged_cells not in MERGED_CELLS_POLICIES:
+        raise ValueError(f"Неизвестная политика объединенных ячеек: {merged_cells}")
+
+    state = {"skip_rows": False}
+    events = _iter_table_events(stream, merged_cells, state)
+    for event, _ in events:
+        # Здесь встречаются только события начала таблицы
+        rows = DocxTableRows(events, state)
+        yield rows
+        # Пропускаем строки, которые не были прочитаны
+        rows.skip()
+
+
+class DocxTableRows:
+    """
+    Итератор по строкам одной таблицы iter_docx_tables
+
+    skip() пропускает оставшиеся строки таблицы: XML строк по-прежнему
+    читается из архива, но тексты ячеек не собираются
+    """
+
+    def __init__(self, events, state):
+        self._events = events
+        self._state = state
+        self._finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        event, row = next(self._events)
+        if event == "end":
+            self._finished = True
+            raise StopIteration
+        return row
+
+    def skip(self):
+        """Пропускает непрочитанные строки таблицы"""
+        self._state["skip_rows"] = True
+        try:
+            for _ in self:
+                pass
+        finally:
+            self._state["skip_rows"] = False
+
+
+def _iter_table_events(stream, merged_cells, state):
+    """
+    Генерирует события ("start", None), ("row", [тексты]) и ("end", None)
+    для каждой таблицы верхнего уровня документа
+
+    Пока state["skip_rows"] истинно, строки не разбираются: вместо
+    текстов ячеек передается None
+    """
+    stack = []
+    # Ячейки предыдущей строки: смещение в сетке -> (текст, ширина)
+    previous_row = {}
+
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            if element.tag == W_TBL and _is_top_level_table(stack):
+                previous_row = {}
+                yield "start", None
+            continue
+
+        stack.pop()
+        depth = len(stack)
+
+        if depth == _TOP_LEVEL_ROW_DEPTH and element.tag == W_TR and _is_top_level_table(stack):
+            if state["skip_rows"]:
+                row = None
+            else:
+                row, previous_row = _read_row(element, previous_row, merged_cells)
+            # Освобождаем разобранную строку
+            stack[-1].remove(element)
+            yield "row", row
+        elif depth == 2 and stack[-1].tag == W_BODY:
+            if element.tag == W_TBL:
+                yield "end", None
+            # Освобождаем разобранный элемент тела документа
+            stack[-1].remove(element)
+
+
+def _is_top_level_table(stack):
+    """Проверяет, что последний элемент стека - таблица в теле документа"""
+    return len(stack) == 3 and stack[1].tag == W_BODY and stack[2].tag == W_TBL
+
+
+def _main_document_part(archive):
+    """Находит основную часть документа по _rels/.rels"""
+    try:
+        with archive.open("_rels/.rels") as stream:
+            relationships = ET.parse(stream).getroot()
+    except KeyError:
+        return "word/document.xml"
+
+    for relationship in relationships.iter(f"{{{REL_NS}}}Relationship"):
+        if relationship.get("Type") == OFFICE_DOCUMENT_REL:
+            target = relationship.get("Target", "")
+            return posixpath.normpath(target.lstrip("/"))
+
+    return "word/document.xml"
+
+
+def _read_row(tr, previous_row, merged_cells):
+    """
+    Преобразует элемент w:tr в список текстов ячеек
+
+    Возвращает (список текстов, ячейки строки по смещениям в сетке)
+    """
+    row = []
+    row_cells = {}
+    grid_offset = _int_property(tr.find(W_TR_PR), W_GRID_BEFORE, 0)
+
+    for tc in tr.iterfind(W_TC):
+        tc_pr = tc.find(W_TC_PR)
+        span = _int_property(tc_pr, W_GRID_SPAN, 1)
+        v_merge = None
+        if tc_pr is not None:
+            v_merge_element = tc_pr.find(W_V_MERGE)
+            if v_merge_element is not None:
+                v_merge = v_merge_element.get(W_VAL, "continue")
+
+        if v_merge == "continue" and grid_offset in previous_row:
+            # Продолжение вертикального объединения: берем ячейку сверху
+            text, cell_span = previous_row[grid_offset]
+            if merged_cells == "repeat":
+                row.extend([text] * cell_span)
+            else:
+                row.extend([""] * cell_span)
+        else:
+            text = _cell_text(tc)
+            cell_span = span
+            if merged_cells == "repeat":
+                row.extend([text] * span)
+            else:
+                row.append(text)
+                row.extend([""] * (span - 1))
+
+        row_cells[grid_offset] = (text, cell_span)
+        grid_offset += span
+
+    return row, row_cells
+
+
+def _int_property(properties, tag, default):
+    """Читает целочисленный атрибут w:val дочернего элемента свойств"""
+    if properties is None:
+        return default
+    element = properties.find(tag)
+    if element is None:
+        return default
+    try:
+        return int(element.get(W_VAL))
+    except (TypeError, ValueError):
+        return default
+
+
+def _cell_text(tc):
+    """Текст ячейки: абзацы ячейки, соединенные переводом строки"""
+    return "\n".join(_paragraph_text(p) for p in tc.iterfind(W_P))
+
+
+def _paragraph_text(p):
+    """Текст абзаца, включая видимый текст гиперссылок"""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            _append_run_text(child, parts)
+        elif child.tag == W_HYPERLINK:
+            for run in child.iterfind(W_R):
+                _append_run_text(run, parts)
+    return "".join(parts)
+
+
+def _append_run_text(run, parts):
+    """Добавляет текст фрагмента, переводя табуляции и разрывы в символы"""
+    for child in run:
+        tag = child.tag
+        if tag == W_T:
+            if child.text:
+                parts.append(child.text)
+        elif tag == W_TAB or tag == W_PTAB:
+            parts.append("\t")
+        elif tag == W_BR:
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NO_BREAK_HYPHEN:
+            parts.append("-")
@@ -0,0 +1,518 @@
+"""
+Запуск конвертации DOCX в Excel из командной строки, без графического интерфейса
+
+Пакетная конвертация всех DOCX файлов каталога:
+    python -m docx_to_excel_cli batch <каталог_docx> <каталог_xlsx> [--jobs N] [--timeout СЕКУНДЫ]
+        [--cache КАТАЛОГ_КЭША] [--format xlsx|csv|jsonl|parquet] [--memory-limit МБ]
+        [--index БАЗА.sqlite] [--tables 1,3-5] [--min-columns N] [--max-columns N]
+        [--keep-header ВЫРАЖЕНИЕ] [--skip-header ВЫРАЖЕНИЕ]
+        [--pipeline [--read-queue N] [--write-queue N]]
+
+Автоматическая конвертация файлов, появляющихся в каталоге:
+    python -m docx_to_excel_cli watch <каталог_docx> <каталог_xlsx> [--jobs N] [--interval СЕКУНДЫ]
+        [--settle СЕКУНДЫ]
+
+Управление кэшем конвертации:
+    python -m docx_to_excel_cli cache info <каталог_кэша>
+    python -m docx_to_excel_cli cache clear <каталог_кэша>
+    python -m docx_to_excel_cli cache invalidate <каталог_кэша> <файл.docx>...
+
+Индекс записей (сводный реестр):
+    python -m docx_to_excel_cli index info <база.sqlite>
+    python -m docx_to_excel_cli index export [--full] <база.sqlite> <реестр.xlsx>
+"""
+import _thread
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from conversion_cache import DEFAULT_MAX_SIZE, ConversionCache
+from docx_to_excel_logic import DocxToExcelProcessor
+from record_index import RecordIndex
+from row_stream_writers import ROW_STREAM_WRITERS
+from table_filter import TableFilter, parse_positions
+
+# Форматы результата: книга Excel и форматы потоковой записи строк
+OUTPUT_FORMATS = ["xlsx"] + list(ROW_STREAM_WRITERS)
+
+# Процессор рабочего процесса пула; создается один раз на процесс,
+# чтобы кэши преобразований использовались для всех его файлов
+_worker_processor = None
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m docx_to_excel_cli",
+        description="Конвертация таблиц из DOCX в Excel с обработкой данных",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="конвертировать все DOCX файлы каталога")
+    batch.add_argument("input_dir", help="каталог с DOCX файлами")
+    batch.add_argument("output_dir", help="каталог для Excel файлов")
+    batch.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                       help="число рабочих процессов (по умолчанию - число ядер)")
+    batch.add_argument("--timeout", type=float, default=None,
+                       help="максимальное время обработки одного файла, секунд")
+    batch.add_argument("--report", default=None,
+                       help="сохранить результаты по каждому файлу в JSON")
+    batch.add_argument("--cache", default=None,
+                       help="каталог кэша: неизмененные файлы и таблицы не обрабатываются повторно")
+    batch.add_argument("--cache-size", type=float, default=DEFAULT_MAX_SIZE / 1024 / 1024,
+                       help="максимальный размер кэша, МБ")
+    batch.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx",
+                       help="формат результата (parquet требует pyarrow)")
+    batch.add_argument("--memory-limit", type=float, default=None,
+                       help="память под строки одной таблицы, МБ; сверх нее строки "
+                            "переносятся во временный файл")
+    batch.add_argument("--index", default=None,
+                       help="база SQLite, в которую добавляются записи обработанных таблиц")
+    batch.add_argument("--stages-log", default=None,
+                       help="замерять этапы обработки каждого файла и сохранить замеры в JSON Lines")
+    batch.add_argument("--pipeline", action="store_true",
+                       help="конвейер: чтение, обработка и запись разных файлов выполняются "
+                            "одновременно (без --cache, --timeout, --memory-limit и --stages-log)")
+    batch.add_argument("--read-queue", type=int, default=2,
+                       help="для --pipeline: сколько прочитанных файлов ждут обработки")
+    batch.add_argument("--write-queue", type=int, default=2,
+                       help="для --pipeline: сколько обработанных файлов ждут записи")
+    add_table_filter_arguments(batch)
+    batch.set_defaults(handler=_run_batch_command)
+
+    watch = commands.add_parser("watch", help="конвертировать новые и измененные DOCX файлы каталога")
+    watch.add_argument("input_dir", help="наблюдаемый каталог с DOCX файлами")
+    watch.add_argument("output_dir", help="каталог для Excel файлов")
+    watch.add_argument("--jobs", type=int, default=1, help="число рабочих процессов")
+    watch.add_argument("--interval", type=float, default=2.0,
+                       help="интервал просмотра каталога, секунд")
+    watch.add_argument("--settle", type=float, default=2.0,
+                       help="сколько секунд файл не должен меняться, чтобы считаться дописанным")
+    watch.add_argument("--queue-size", type=int, default=100,
+                       help="максимальное число файлов, ожидающих обработки")
+    watch.add_argument("--timeout", type=float, default=None,
+                       help="максимальное время обработки одного файла, секунд")
+    watch.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx", help="формат результата")
+    watch.add_argument("--cache", default=None, help="каталог кэша конвертации")
+    watch.add_argument("--index", default=None, help="база SQLite индекса записей")
+    add_table_filter_arguments(watch)
+    watch.set_defaults(handler=_run_watch_command)
+
+    cache = commands.add_parser("cache", help="управление кэшем конвертации")
+    cache_commands = cache.add_subparsers(dest="cache_command", required=True)
+
+    cache_info = cache_commands.add_parser("info", help="размер и число записей кэша")
+    cache_info.add_argument("cache_dir", help="каталог кэша")
+    cache_info.set_defaults(handler=_run_cache_info_command)
+
+    cache_clear = cache_commands.add_parser("clear", help="удалить все записи кэша")
+    cache_clear.add_argument("cache_dir", help="каталог кэша")
+    cache_clear.set_defaults(handler=_run_cache_clear_command)
+
+    cache_invalidate = cache_commands.add_parser(
+        "invalidate", help="удалить из кэша результаты обработки указанных файлов"
+    )
+    cache_invalidate.add_argument("cache_dir", help="каталог кэша")
+    cache_invalidate.add_argument("files", nargs="+", help="DOCX файлы")
+    # Отбор таблиц входит в ключи кэша: указываются те же параметры, что и при обработке
+    add_table_filter_arguments(cache_invalidate)
+    cache_invalidate.set_defaults(handler=_run_cache_invalidate_command)
+
+    index = commands.add_parser("index", help="индекс записей для сводного реестра")
+    index_commands = index.add_subparsers(dest="index_command", required=True)
+
+    index_info = index_commands.add_parser("info", help="число записей и номер ревизии")
+    index_info.add_argument("index_path", help="база индекса")
+    index_info.set_defaults(handler=_run_index_info_command)
+
+    index_export = index_commands.add_parser("export", help="записать сводную книгу из индекса")
+    index_export.add_argument("index_path", help="база индекса")
+    index_export.add_argument("excel_path", help="сводная книга Excel")
+    index_export.add_argument("--full", action="store_true",
+                              help="перестроить книгу целиком, а не только измененные записи")
+    index_export.set_defaults(handler=_run_index_export_command)
+
+    return parser
+
+
+def add_table_filter_arguments(parser):
+    """Параметры отбора таблиц DOCX (table_filter.TableFilter)"""
+    parser.add_argument("--tables", type=parse_positions, default=None,
+                        help="номера обрабатываемых таблиц документа, например 1,3-5")
+    parser.add_argument("--min-columns", type=int, default=None,
+                        help="пропускать таблицы, в первых строках которых меньше столбцов")
+    parser.add_argument("--max-columns", type=int, default=None,
+                        help="пропускать таблицы, в первых строках которых больше столбцов")
+    parser.add_argument("--keep-header", action="append", default=[],
+                        help="обрабатывать только таблицы, первые строки которых содержат "
+                             "это регулярное выражение (можно указать несколько раз)")
+    parser.add_argument("--skip-header", action="append", default=[],
+                        help="пропускать таблицы, первые строки которых содержат "
+                             "это регулярное выражение (можно указать несколько раз)")
+
+
+def table_filter_from_args(args):
+    """TableFilter по параметрам командной строки или None, если отбор не задан"""
+    if (args.tables is None and args.min_columns is None and args.max_columns is None
+            and not args.keep_header and not args.skip_header):
+        return None
+    return TableFilter(positions=args.tables, min_columns=args.min_columns,
+                       max_columns=args.max_columns, keep_headers=args.keep_header,
+                       skip_headers=args.skip_header)
+
+
+def open_cache(cache_dir, cache_size_mb=None):
+    """Кэш конвертации в каталоге cache_dir; размер задается в мегабайтах"""
+    if cache_size_mb is None:
+        return ConversionCache(cache_dir)
+    return ConversionCache(cache_dir, max_size=int(cache_size_mb * 1024 * 1024))
+
+
+def find_docx_files(input_dir):
+    """DOCX файлы каталога, кроме временных файлов Word (~$...)"""
+    return sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.lower().endswith(".docx") and not name.startswith("~$")
+    )
+
+
+def output_path_for(docx_path, output_dir, output_format="xlsx"):
+    """Путь к файлу результата для DOCX файла в выходном каталоге"""
+    name, _ = os.path.splitext(os.path.basename(docx_path))
+    return os.path.join(output_dir, f"{name}.{output_format}")
+
+
+def run_batch(input_dir, output_dir, jobs=1, timeout=None, cache_dir=None, cache_size_mb=None,
+              instrument=False, output_format="xlsx", memory_limit_mb=None, index_path=None,
+              table_filter=None):
+    """
+    Конвертирует все DOCX файлы каталога в пуле процессов
+
+    Ошибка, превышение времени или аварийное завершение рабочего процесса
+    на одном файле не прерывают обработку остальных: после аварийного
+    завершения пул создается заново, а ошибку получают только файлы,
+    выполнявшиеся в нем. Если задан cache_dir, неизмененные с прошлого
+    запуска файлы пропускаются, а в измененных обрабатываются только
+    новые таблицы.
+    instrument - замерять этапы обработки (stats["stages"] каждого файла).
+    output_format - формат результата (см. OUTPUT_FORMATS).
+    memory_limit_mb - память под строки одной таблицы в мегабайтах
+    (memory_limit процессора). index_path - база индекса записей
+    (record_index.RecordIndex), общая для всех рабочих процессов.
+    table_filter - отбор таблиц (table_filter.TableFilter).
+    Возвращает сводку: результаты по файлам, суммарную статистику
+    и производительность.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    docx_files = find_docx_files(input_dir)
+
+    started = time.perf_counter()
+    results = []
+    jobs = max(jobs, 1)
+
+    def create_executor():
+        return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(cache_dir, cache_size_mb, instrument, output_format,
+                                             memory_limit_mb, index_path, table_filter))
+
+    # Пулу передается не больше jobs файлов сразу: если рабочий процесс
+    # завершится аварийно (BrokenProcessPool), ошибку получат только файлы,
+    # выполнявшиеся в сломанном пуле, а остальные будут переданы новому
+    queued = deque(docx_files)
+    # Выполняемые задания: future -> (DOCX файл, пул)
+    pending = {}
+    executor = create_executor()
+    try:
+        while queued or pending:
+            while queued and len(pending) < jobs:
+                path = queued[0]
+                try:
+                    future = executor.submit(convert_file, path,
+                                             output_path_for(path, output_dir, output_format),
+                                             timeout)
+                except BrokenProcessPool:
+                    # Пул сломан заданием, которое еще не собрано
+                    executor = _replace_executor(executor, create_executor)
+                    continue
+                queued.popleft()
+                pending[future] = (path, executor)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, future_executor = pending.pop(future)
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # Рабочий процесс завершился аварийно или результат не
+                    # удалось передать: ошибка относится к одному файлу
+                    if isinstance(e, BrokenProcessPool) and future_executor is executor:
+                        executor = _replace_executor(executor, create_executor)
+                    results.append({"input": path, "ok": False,
+                                    "error": f"{type(e).__name__}: {e}"})
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+
+    # Результаты в порядке файлов, а не в порядке завершения
+    order = {path: index for index, path in enumerate(docx_files)}
+    results.sort(key=lambda result: order[result["input"]])
+
+    return summarize(results, elapsed)
+
+
+def summarize(results, elapsed):
+    """Сводка по результатам обработки файлов"""
+    succeeded = [result for result in results if result["ok"]]
+    stats = merge_stats(result["stats"] for result in succeeded)
+    # Строки файлов и таблиц, взятых из кэша, не обрабатывались в этом
+    # запуске и не входят в скорость обработки
+    cached_rows = stats.get("rows_reused", 0)
+    rows = stats.get("rows_processed", 0) - cached_rows
+
+    return {
+        "files_total": len(results),
+        "files_succeeded": len(succeeded),
+        "files_failed": len(results) - len(succeeded),
+        "elapsed_seconds": elapsed,
+        "files_per_second": len(succeeded) / elapsed if elapsed else 0.0,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "rows_cached": cached_rows,
+        "stats": stats,
+        "results": results,
+    }
+
+
+def merge_stats(stats_list):
+    """Суммирует счетчики статистики нескольких файлов"""
+    merged = {}
+    for stats in stats_list:
+        for key, value in stats.items():
+            # Замеры этапов (stats["stages"]) относятся к отдельному файлу
+            if isinstance(value, (int, float)):
+                merged[key] = merged.get(key, 0) + value
+    return dict(sorted(merged.items()))
+
+
+def _replace_executor(executor, create_executor):
+    """Останавливает сломанный пул процессов и создает новый"""
+    executor.shutdown(wait=False, cancel_futures=True)
+    return create_executor()
+
+
+def _init_worker(cache_dir=None, cache_size_mb=None, instrument=False, output_format="xlsx",
+                 memory_limit_mb=None, index_path=None, table_filter=None):
+    global _worker_processor
+    conversion_cache = open_cache(cache_dir, cache_size_mb) if cache_dir else None
+    memory_limit = int(memory_limit_mb * 1024 * 1024) if memory_limit_mb is not None else None
+    record_index = RecordIndex(index_path) if index_path else None
+    _worker_processor = DocxToExcelProcessor(share_cache=True, conversion_cache=conversion_cache,
+                                             instrument=instrument, output_format=output_format,
+                                             memory_limit=memory_limit, record_index=record_index,
+                                             table_filter=table_filter)
+
+
+def convert_file(docx_path, excel_path, timeout=None):
+    """
+    Обрабатывает один файл в рабочем процессе
+
+    Результат записывается во временный файл и переименовывается только
+    после успешного завершения (DocxToExcelProcessor._write_workbook),
+    поэтому при ошибке или превышении времени частично записанный
+    Excel-файл не остается, а записи индекса (index_path) не добавляются.
+    Время проверяется между операциями Python: по истечении timeout
+    в основном потоке рабочего процесса возбуждается прерывание.
+
+    Возвращает словарь с результатом, который можно передать между процессами
+    """
+    processor = _worker_processor or DocxToExcelProcessor()
+    result = {"input": docx_path, "output": excel_path, "ok": False}
+    started = time.perf_counter()
+
+    lock = threading.Lock()
+    state = {"finished": False, "timed_out": False}
+
+    def interrupt():
+        with lock:
+            if not state["finished"]:
+                state["timed_out"] = True
+                _thread.interrupt_main()
+
+    timer = None
+    try:
+        try:
+            if timeout:
+                timer = threading.Timer(timeout, interrupt)
+                timer.daemon = True
+                timer.start()
+            # Файл хэшируется один раз и для проверки кэша, и для обработки
+            file_key = processor.cache_key(docx_path)
+            cached = processor.cached_result(docx_path, excel_path, file_key)
+            if cached is not None:
+                # Файл не изменился, и результат прошлой обработки на месте
+                table_count, stats = cached
+            else:
+                table_count, stats = processor.convert_and_process(docx_path, excel_path,
+                                                                   file_key=file_key)
+        finally:
+            with lock:
+                state["finished"] = True
+            if timer is not None:
+                timer.cancel()
+    except KeyboardInterrupt:
+        if not state["timed_out"]:
+            raise
+        result["error"] = f"превышено время обработки ({timeout:g} с)"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    else:
+        if not table_count:
+            result["output"] = None
+        result.update(ok=True, tables=table_count, stats=stats)
+
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def print_summary(summary, stream=sys.stdout):
+    """Печатает отчет по ошибкам и итоговую производительность"""
+    for result in summary["results"]:
+        if not result["ok"]:
+            print(f"ОШИБКА {result['input']}: {result['error']}", file=stream)
+        elif not result["tables"]:
+            print(f"Нет таблиц: {result['input']}", file=stream)
+
+    print(
+        f"Файлов: {summary['files_total']}, успешно: {summary['files_succeeded']}, "
+        f"с ошибками: {summary['files_failed']}",
+        file=stream,
+    )
+    print(
+        f"Время: {summary['elapsed_seconds']:.2f} с, "
+        f"{summary['files_per_second']:.2f} файлов/с, "
+        f"{summary['rows_per_second']:.0f} строк/с",
+        file=stream,
+    )
+    if summary["rows_cached"]:
+        print(f"Строк из кэша (не входят в скорость): {summary['rows_cached']}", file=stream)
+    for key, value in summary["stats"].items():
+        print(f"  {key}: {value}", file=stream)
+
+
+def _run_batch_command(args):
+    if args.pipeline:
+        return _run_pipeline_command(args)
+
+    summary = run_batch(args.input_dir, args.output_dir, jobs=args.jobs, timeout=args.timeout,
+                        cache_dir=args.cache, cache_size_mb=args.cache_size,
+                        instrument=args.stages_log is not None, output_format=args.format,
+                        memory_limit_mb=args.memory_limit, index_path=args.index,
+                        table_filter=table_filter_from_args(args))
+    print_summary(summary)
+
+    if args.stages_log:
+        # Замеры пишет основной процесс, чтобы строки разных файлов не перемешались
+        with open(args.stages_log, "a", encoding="utf-8") as log:
+            for result in summary["results"]:
+                for record in result.get("stats", {}).get("stages", []):
+                    log.write(json.dumps({"file": result["input"], **record}, ensure_ascii=False) + "\n")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report:
+            json.dump(summary, report, ensure_ascii=False, indent=2)
+
+    return 1 if summary["files_failed"] else 0
+
+
+def _run_pipeline_command(args):
+    from batch_pipeline import print_stages, run_pipeline
+
+    unsupported = [name for name, value in (("--cache", args.cache), ("--timeout", args.timeout),
+                                            ("--memory-limit", args.memory_limit),
+                                            ("--stages-log", args.stages_log)) if value is not None]
+    if unsupported:
+        print(f"--pipeline не поддерживает {', '.join(unsupported)}", file=sys.stderr)
+        return 2
+
+    summary = run_pipeline(args.input_dir, args.output_dir, jobs=args.jobs,
+                           read_queue_size=args.read_queue, write_queue_size=args.write_queue,
+                           output_format=args.format, index_path=args.index,
+                           table_filter=table_filter_from_args(args))
+    print_summary(summary)
+    print_stages(summary)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report:
+            json.dump(summary, report, ensure_ascii=False, indent=2)
+
+    return 1 if summary["files_failed"] else 0
+
+
+def _run_watch_command(args):
+    from folder_watcher import FolderWatcher
+
+    watcher = FolderWatcher(
+        args.input_dir, args.output_dir, jobs=args.jobs, interval=args.interval, settle=args.settle,
+        timeout=args.timeout, output_format=args.format, queue_size=args.queue_size,
+        worker_options=(args.cache, None, False, args.format, None, args.index,
+                        table_filter_from_args(args)),
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _run_cache_info_command(args):
+    info = open_cache(args.cache_dir).info()
+    print(f"Файлов: {info['files']}, таблиц: {info['tables']}, "
+          f"размер: {info['size'] / 1024 / 1024:.1f} МБ")
+    return 0
+
+
+def _run_cache_clear_command(args):
+    removed = open_cache(args.cache_dir).clear()
+    print(f"Удалено записей: {removed}")
+    return 0
+
+
+def _run_cache_invalidate_command(args):
+    processor = DocxToExcelProcessor(conversion_cache=open_cache(args.cache_dir),
+                                     table_filter=table_filter_from_args(args))
+    for path in args.files:
+        if processor.invalidate_cached(path):
+            print(f"Удален из кэша: {path}")
+        else:
+            print(f"Нет в кэше: {path}")
+    return 0
+
+
+def _run_index_info_command(args):
+    with RecordIndex(args.index_path) as index:
+        info = index.info()
+    print(f"Записей: {info['records']}, ревизия: {info['revision']}")
+    return 0
+
+
+def _run_index_export_command(args):
+    with RecordIndex(args.index_path) as index:
+        count = index.write_master_workbook(args.excel_path, full=args.full)
+    print(f"Записано записей: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,83 +1,1731 @@
-from docx import Document
-import openpyxl
-from openpyxl.utils import get_column_letter
+import contextlib
+import itertools
+import json
+import os
+import pickle
 import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict, deque, namedtuple
 from datetime import datetime
 
+from column_widths import ColumnWidthTracker
+from docx_table_reader import iter_docx_tables
+from row_stream_writers import PARQUET_AVAILABLE, ROW_STREAM_WRITERS
+from vectorized_dates import PANDAS_AVAILABLE
+
+# python-docx, openpyxl (вместе с xlsx_stream_writer) и multiprocessing
+# импортируются при первом использовании, а регулярные выражения модуля
+# компилируются при первом обращении к ним: импорт модуля остается
+# быстрым, и окно программы появляется, не дожидаясь их загрузки.
+# warm_up() выполняет всю эту подготовку заранее.
+
+
+class _LazyPattern:
+    """
+    Регулярное выражение, компилируемое при первом обращении
+    
+    После компиляции глобальное имя модуля name заменяется готовым
+    выражением, поэтому дальнейшие обращения идут к нему напрямую.
+    """
+    
+    def __init__(self, name, pattern, flags=0):
+        self._name = name
+        self._pattern = pattern
+        self._flags = flags
+    
+    def compile(self):
+        compiled = re.compile(self._pattern, self._flags)
+        globals()[self._name] = compiled
+        return compiled
+    
+    def __getattr__(self, attribute):
+        return getattr(self.compile(), attribute)
+
+
+def warm_up():
+    """
+    Заранее загружает библиотеки и компилирует регулярные выражения
+    
+    Вызов не обязателен: без него все это происходит при первой
+    обработке файла. Можно вызывать из фонового потока.
+    """
+    import docx
+    import openpyxl
+    import xlsx_stream_writer
+    
+    for value in list(globals().values()):
+        if isinstance(value, _LazyPattern):
+            value.compile()
+
+# Даты в тексте: ДД.ММ.ГГ(ГГ), ДД/ММ/ГГ(ГГ), ДД-ММ-ГГ(ГГ), ДДММ.ГГ и ДДММГГГГ.
+# Все форматы собраны в одно выражение, поэтому текст просматривается
+# один раз; дата не может быть частью более длинной последовательности цифр.
+_DATE_TOKEN_RE = _LazyPattern('_DATE_TOKEN_RE', 
+    r'(?<!\d)(?:'
+    r'(\d{1,2})([./-])(\d{1,2})\2(\d{4}|\d{2})'  # ДД.ММ.ГГ(ГГ), ДД/ММ/ГГ(ГГ), ДД-ММ-ГГ(ГГ)
+    r'|(\d{2})(\d{2})\.(\d{2})'                   # ДДММ.ГГ (пропущена точка)
+    r'|(\d{2})(\d{2})(\d{4})'                      # ДДММГГГГ (без разделителей)
+    r')(?!\d)'
+)
+
+# Начало значения, похожее на дату (проверка первой строки таблицы).
+# В отличие от _DATE_TOKEN_RE за датой могут идти цифры, а год ДД.ММ.ГГ
+# проверяется только по первым двум цифрам: значения "12.05.202" и
+# "123456789" по-прежнему считаются датами.
+_DATE_START_RE = _LazyPattern('_DATE_START_RE', 
+    r'\d{1,2}([./-])\d{1,2}\1\d{2}'  # ДД.ММ.ГГ, ДД/ММ/ГГ, ДД-ММ-ГГ
+    r'|\d{4}\.\d{2}'                 # ДДММ.ГГ
+    r'|\d{8}'                        # ДДММГГГГ
+)
+
+# Признаки информации о судах. Текст считается информацией о суде, если в
+# нем есть хотя бы одно из:
+#   - дата ДД.ММ.ГГГГ, после которой в той же строке есть "суд";
+#   - "суд", после которого в той же строке есть "по ст";
+#   - одно из ключевых слов _COURT_KEYWORD_RE.
+# Все ключевые слова и само слово "суд" ищутся одним проходом по тексту;
+# дата и "по ст" проверяются только в строках, где найдено слово "суд".
+# Регистр букв не учитывается.
+_COURT_KEYWORD_RE = _LazyPattern('_COURT_KEYWORD_RE', 
+    r'р/с'                    # районный суд (сокращение)
+    r'|г/с'                   # городской суд (сокращение)
+    r'|судом'                 # слово "судом"
+    r'|осужденный'            # слово "осужденный"
+    r'|постановлением'        # слово "постановлением"
+    r'|УК РФ'                 # отсылка к УК РФ
+    r'|л/св'                  # лишение свободы
+    r'|ст\. \d'               # статья (например, "ст. 158")
+    r'|ИС \d+ (?:г|лет)'      # испытательный срок ("г" включает "год")
+    r'|Мировым судьей'        # Мировой судья
+    r'|МССУ'                  # МССУ (мировой судебный участок)
+    r'|(?P<court>суд)',       # "суд" - признак только вместе с датой или статьей
+    re.IGNORECASE,
+)
+_COURT_DATE_RE = _LazyPattern('_COURT_DATE_RE', r'\d{2}\.\d{2}\.\d{4}')
+_COURT_ARTICLE_RE = _LazyPattern('_COURT_ARTICLE_RE', r'по ст', re.IGNORECASE)
+
+# Правила форматирования информации о судах для _apply_formatting_rules.
+# Компилируются один раз при первом использовании. Замены, которые не могут
+# влиять друг на друга, объединены в одно регулярное выражение, а нужная
+# замена выбирается по совпавшему тексту.
+
+# Творительный падеж: после "...ским" последовательно добавлялись
+# "районным судом" и "городским судом", что дает одну составную замену
+_COURT_INSTRUMENTAL_RE = _LazyPattern('_COURT_INSTRUMENTAL_RE', r'([А-Яа-я]+ским|[А-Яа-я]+ским\s+[а-я]/с)')
+_COURT_INSTRUMENTAL_REPLACEMENT = r'\1 городским судом районным судом'
+
+# Родительный падеж для постановлений, приговоров и определений
+_COURT_GENITIVE_RE = _LazyPattern('_COURT_GENITIVE_RE', 
+    r'([Пп]остановлением|[Пп]риговором|[Оо]пределением)\s+([А-Яа-я]+ского)\s+([рг])/с'
+)
+_COURT_GENITIVE_NAMES = {'р': 'районного суда', 'г': 'городского суда'}
+
+# Сокращения: совпавший текст -> полная форма
+_COURT_ABBREVIATIONS = {
+    'р/с': 'районный суд',
+    'г/с': 'городской суд',
+    'л/св': 'лишения свободы',
+    'л/с': 'лишения свободы',
+    'УДО': 'условно-досрочное освобождение',
+    'ИС': 'испытательный срок',
+    'ОС': 'ограничение свободы',
+    'ИК': 'исправительная колония',
+    'ОР': 'обязательных работ',
+    'ИР': 'исправительных работ',
+    'ЗЗД': 'запрет заниматься деятельностью',
+    'ПМЖ': 'постоянное место жительства',
+    'ТС': 'транспортными средствами',
+    'з/п': 'заработной платы',
+    'МССУ': 'Мировой судья судебного участка',
+    'СПб': 'г. Санкт-Петербурга',
+    'ЛО': 'Ленинградской области',
+}
+_COURT_ABBREVIATIONS_RE = _LazyPattern('_COURT_ABBREVIATIONS_RE', 
+    r'р/с(?!\s+[А-Яа-я]+ского)'
+    r'|г/с(?!\s+[А-Яа-я]+ского)'
+    r'|л/св\b'
+    r'|л/с\b'
+    r'|\b(?:УДО|ИС|ОС|ИК|ОР|ИР|ЗЗД|ПМЖ|ТС|з/п|СПб|ЛО)\b'
+    r'|МССУ'
+)
+
+# Статьи, части и пункты УК РФ
+_COURT_ARTICLES_RE = _LazyPattern('_COURT_ARTICLES_RE', 
+    r'(?:ст(?:\.\s*|\s+)|ч(?:\.\s*|\s+))(\d+)'
+    r'|п(?:\.\s*|\s+)[«"]([а-яa-z]+)[»"]'
+)
+
+# Сроки: сокращенные единицы (г, м, мес, д, дн) и уже полные слова,
+# окончания которых согласуются с числом
+_COURT_TIME_UNITS_RE = _LazyPattern('_COURT_TIME_UNITS_RE', 
+    r'(\d+)(?:\s*(г|мес|м|дн|д)\.?(?!\w)|\s+(год|месяц|день))'
+)
+_TIME_UNITS = {'г': 'год', 'м': 'месяц', 'мес': 'месяц', 'д': 'день', 'дн': 'день'}
+_TIME_UNIT_FORMS = {
+    'год': ('год', 'года', 'лет'),
+    'месяц': ('месяц', 'месяца', 'месяцев'),
+    'день': ('день', 'дня', 'дней'),
+}
+
+# Постановления, приговоры и осужденные
+_COURT_DECISIONS_RE = _LazyPattern('_COURT_DECISIONS_RE', r'[пП]ост(?:ан)?\.|[пП]риг\.|осужденн(?:ый|ая)?')
+
+# Пробелы: схлопывание пробельных символов, пробел после знаков
+# препинания и отсутствие пробела перед ними
+_COURT_SPACING_RE = _LazyPattern('_COURT_SPACING_RE', r'\s*([.,;:])\s*|\s+')
+_PUNCTUATION = '.,;:'
+
+# Завершающие замены после расстановки точки и заглавной буквы
+_COURT_FINAL_RE = _LazyPattern('_COURT_FINAL_RE', 
+    r'(?<=\d)([гм])(?=\.)'
+    r'|удерж\.|уд-м|удерж-м'
+    r'|отбыв\.'
+    r'|принуд\.'
+)
+_COURT_FINAL_REPLACEMENTS = {
+    'удерж.': 'удержанием',
+    'уд-м': 'удержанием',
+    'удерж-м': 'удержанием',
+    'отбыв.': 'отбыванием',
+    'принуд.': 'принудительных',
+}
+
+
+def _replace_court_genitive(match):
+    return f"{match.group(1)} {match.group(2)} {_COURT_GENITIVE_NAMES[match.group(3)]}"
+
+
+def _replace_court_abbreviation(match):
+    return _COURT_ABBREVIATIONS[match.group(0)]
+
+
+def _replace_court_article(match):
+    if match.group(2) is not None:
+        return f'пункт "{match.group(2)}"'
+    if match.group(0)[0] == 'с':
+        return f"статья {match.group(1)}"
+    return f"часть {match.group(1)}"
+
+
+def _replace_time_unit(match):
+    num = int(match.group(1))
+    unit = _TIME_UNITS[match.group(2)] if match.group(2) else match.group(3)
+    one, few, many = _TIME_UNIT_FORMS[unit]
+    
+    # Корректируем окончания для сроков (1 год, 2 года, 5 лет)
+    if num % 10 == 1 and num % 100 != 11:
+        return f"{num} {one}"
+    elif 2 <= num % 10 <= 4 and (num % 100 < 10 or num % 100 >= 20):
+        return f"{num} {few}"
+    else:
+        return f"{num} {many}"
+
+
+def _replace_court_decision(match):
+    first = match.group(0)[1]
+    if first == 'о':
+        return 'Постановлением'
+    if first == 'р':
+        return 'Приговором'
+    return 'Осужден(а)'
+
+
+def _replace_court_spacing(match):
+    mark = match.group(1)
+    if mark is None:
+        return ' '
+    # После знака препинания ставим пробел, если дальше не идет другой знак
+    end = match.end()
+    if end < len(match.string) and match.string[end] in _PUNCTUATION:
+        return mark
+    return mark + ' '
+
+
+def _replace_court_final(match):
+    unit = match.group(1)
+    if unit is not None:
+        return f" {unit}."
+    return _COURT_FINAL_REPLACEMENTS[match.group(0)]
+
+
+# Событие хода обработки, передаваемое в progress:
+# stage - этап: "read" (чтение таблицы), "process" (применение правил),
+#         "write" (запись листа) или "done" (файл готов)
+# table - номер таблицы (листа), начиная с 1; 0 для "done"
+# rows_done, rows_total - обработано строк таблицы и всего строк на
+#         этапе; rows_total = 0, если число строк заранее неизвестно
+ProgressEvent = namedtuple("ProgressEvent", "stage table rows_done rows_total")
+
+# Как часто (в строках) сообщается ход обработки и проверяется отмена
+_PROGRESS_INTERVAL = 200
+
+
+class ConversionCancelled(Exception):
+    """Обработка прервана через CancellationToken"""
+
+
+class CancellationToken:
+    """
+    Признак отмены обработки, который можно установить из другого потока.
+    
+    Обработка проверяет его между таблицами и через каждые несколько сотен
+    строк и при отмене завершается исключением ConversionCancelled;
+    недописанный файл результата при этом не остается.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+    
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ConversionCancelled("Обработка отменена")
+
+
+class _StageRecorder:
+    """
+    Замеры этапов обработки: время по часам, процессорное время и пик
+    выделенной памяти (tracemalloc) для каждого этапа каждого листа
+    
+    Записи - словари {"sheet", "stage", "wall_seconds", "cpu_seconds",
+    "memory_peak_bytes"}; для этапов, относящихся ко всей книге
+    (загрузка, сохранение), sheet = None.
+    """
+    
+    def __init__(self):
+        self.records = []
+        self._started_tracing = False
+    
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+    
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+    
+    @contextlib.contextmanager
+    def measure(self, sheet, stage):
+        tracemalloc.reset_peak()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - wall_started
+            cpu_seconds = time.process_time() - cpu_started
+            _, memory_peak = tracemalloc.get_traced_memory()
+            self.records.append({
+                "sheet": sheet,
+                "stage": stage,
+                "wall_seconds": wall_seconds,
+                "cpu_seconds": cpu_seconds,
+                "memory_peak_bytes": max(memory_peak - memory_before, 0),
+            })
+
+
+class _ProgressReporter:
+    """
+    Сопровождает один вызов обработки: передает события хода обработки
+    в progress, проверяет отмену и, если задан recorder, замеряет этапы
+    """
+    
+    def __init__(self, callback=None, cancel_token=None, recorder=None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.recorder = recorder
+        # Номер и имя текущей таблицы (листа)
+        self.table = 0
+        self.sheet = None
+    
+    def start_table(self, table, sheet):
+        """Начало обработки очередной таблицы"""
+        self.table = table
+        self.sheet = sheet
+        self.report("read")
+    
+    def stage(self, name, whole_workbook=False):
+        """Контекст замера этапа текущего листа (или всей книги)"""
+        if self.recorder is None:
+            return contextlib.nullcontext()
+        return self.recorder.measure(None if whole_workbook else self.sheet, name)
+    
+    def report(self, stage, rows_done=0, rows_total=0):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        if self.callback is not None:
+            self.callback(ProgressEvent(stage, self.table, rows_done, rows_total))
+    
+    def check(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+    
+    def finish(self):
+        """Сообщает о завершении; отмена после записи результата уже не действует"""
+        self.table = 0
+        self.sheet = None
+        if self.callback is not None:
+            self.callback(ProgressEvent("done", 0, 0, 0))
+
+
+class _LRUCache:
+    """
+    Ограниченный кэш результатов чистых преобразований текста.
+    
+    При превышении maxsize вытесняется значение, к которому дольше всего
+    не обращались. maxsize = 0 отключает кэширование. Счетчики hits и
+    misses считают попадания и промахи с момента последнего сброса.
+    """
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+    
+    def get_or_compute(self, key, compute, *args):
+        """Возвращает значение из кэша или вычисляет compute(*args) и запоминает его"""
+        if not self.maxsize:
+            return compute(*args)
+        
+        try:
+            value = self._values[key]
+        except KeyError:
+            self.misses += 1
+            value = compute(*args)
+            self._values[key] = value
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+            return value
+        
+        self.hits += 1
+        self._values.move_to_end(key)
+        return value
+    
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+    
+    def clear(self):
+        self._values.clear()
+        self.reset_counters()
+    
+    def __len__(self):
+        return len(self._values)
+
+
+# Число столбцов, к которым обращаются правила обработки после удаления
+# столбцов A и C (последний - столбец 9 (I) с информацией о судах)
+_PROCESSED_COLUMN_COUNT = 9
+
+# При date_backend="auto" даты обрабатываются целым столбцом (pandas)
+# в таблицах не короче стольких строк: на более коротких таблицах
+# накладные расходы pandas больше выигрыша, а построчной обработке
+# помогает кэш дат
+VECTORIZED_DATES_MIN_ROWS = 10000
+
+
+def _project_row(row):
+    """
+    Строка без столбцов A и C, как после delete_cols(3) и delete_cols(1)
+    
+    Пустые строки заменяются на None, как в _ColumnTable
+    """
+    return [value if value != "" else None for value in itertools.chain(row[1:2], row[3:])]
+
+
+# Длина записи строки во временном файле _SpillableRows
+_SPILL_RECORD_HEADER = struct.Struct("<I")
+
+
+class _SpillableRows:
+    """
+    Строки таблицы с ограничением занимаемой памяти
+    
+    Пока примерный объем строк (sys.getsizeof строки и ее значений) не
+    больше memory_limit байт, строки хранятся в списке rows. После
+    превышения все строки переносятся во временный файл (записи pickle
+    с длиной перед каждой) и дальше дописываются в него, а при обходе
+    читаются из файла по одной. Одновременно допускается только один обход.
+    """
+    
+    def __init__(self, memory_limit):
+        self.memory_limit = memory_limit
+        self.rows = []
+        # Номер последней непустой строки (0 - таких нет)
+        self.last_filled = 0
+        self._count = 0
+        self._size = 0
+        self._file = None
+    
+    @property
+    def spilled(self):
+        return self._file is not None
+    
+    def append(self, row):
+        self._count += 1
+        if row:
+            self.last_filled = self._count
+        
+        if self._file is not None:
+            self._write_row(row)
+            return
+        
+        self.rows.append(row)
+        self._size += sys.getsizeof(row) + sum(
+            sys.getsizeof(value) for value in row if value is not None
+        )
+        if self._size > self.memory_limit:
+            self._spill()
+    
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+    
+    def __len__(self):
+        return self._count
+    
+    def __iter__(self):
+        if self._file is None:
+            return iter(self.rows)
+        return self._iter_file()
+    
+    def _spill(self):
+        self._file = tempfile.TemporaryFile()
+        for row in self.rows:
+            self._write_row(row)
+        self.rows = []
+        self._size = 0
+    
+    def _write_row(self, row):
+        # Каждая строка сериализуется отдельно: общий Pickler/Unpickler
+        # держал бы ссылки на все записанные и прочитанные строки
+        data = pickle.dumps(row, pickle.HIGHEST_PROTOCOL)
+        self._file.write(_SPILL_RECORD_HEADER.pack(len(data)))
+        self._file.write(data)
+    
+    def _iter_file(self):
+        self._file.flush()
+        self._file.seek(0)
+        read = self._file.read
+        for _ in range(self._count):
+            (length,) = _SPILL_RECORD_HEADER.unpack(read(_SPILL_RECORD_HEADER.size))
+            yield pickle.loads(read(length))
+        self._file.seek(0, os.SEEK_END)
+
+
+class _ColumnCell:
+    """Ячейка _ColumnTable: ссылка на позицию в списке значений столбца"""
+    
+    __slots__ = ("_column", "_index")
+    
+    def __init__(self, column, index):
+        self._column = column
+        self._index = index
+    
+    @property
+    def value(self):
+        return self._column[self._index]
+    
+    @value.setter
+    def value(self, value):
+        self._column[self._index] = value
+
+
+class _TableRow:
+    """
+    Строка _ColumnTable без копирования значений
+    
+    Поддерживает len, обращение по индексу и обход; для записи
+    в openpyxl преобразуется в список (list(row))
+    """
+    
+    __slots__ = ("_columns", "_index", "_length")
+    
+    def __init__(self, columns, index, length):
+        self._columns = columns
+        self._index = index
+        self._length = length
+    
+    def __len__(self):
+        return self._length
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("индекс ячейки вне строки")
+        return self._columns[index][self._index]
+    
+    def __iter__(self):
+        index = self._index
+        for column in itertools.islice(self._columns, self._length):
+            yield column[index]
+
+
+class _ColumnTable:
+    """
+    Таблица в памяти, хранящая значения по столбцам.
+    
+    Каждый столбец - список значений всех строк, длины строк (число
+    ячеек, как у строк листа) - в массиве array. Одинаковые строки
+    текста при загрузке хранятся одним объектом. Пустые строки, как
+    и отсутствующие ячейки, хранятся как None: при сохранении и
+    повторном чтении книги они превращаются в пустые ячейки.
+    
+    Повторяет ту часть интерфейса листа openpyxl, которой пользуются
+    методы обработки DocxToExcelProcessor (cell, max_row, delete_cols,
+    delete_rows), поэтому правила применяются к ней без изменений;
+    удаление столбца не сдвигает значения в строках. Обход таблицы
+    дает строки _TableRow.
+    """
+    
+    def __init__(self, rows):
+        self._columns = []
+        self._lengths = array("I")
+        strings = {}
+        for row in rows:
+            self._append_row(row, strings)
+    
+    def _append_row(self, row, strings):
+        columns = self._columns
+        row_index = len(self._lengths)
+        while len(columns) < len(row):
+            columns.append([None] * row_index)
+        
+        for column, value in zip(columns, row):
+            if value == "":
+                value = None
+            elif type(value) is str:
+                value = strings.setdefault(value, value)
+            column.append(value)
+        for column in columns[len(row):]:
+            column.append(None)
+        self._lengths.append(len(row))
+    
+    @property
+    def max_row(self):
+        # Как в openpyxl: последняя строка, в которой есть ячейки, но не меньше 1
+        lengths = self._lengths
+        for index in range(len(lengths), 0, -1):
+            if lengths[index - 1]:
+                return index
+        return 1
+    
+    def cell(self, row, column):
+        # Как в openpyxl, обращение к ячейке создает ее при необходимости
+        lengths = self._lengths
+        while len(lengths) < row:
+            lengths.append(0)
+            for values in self._columns:
+                values.append(None)
+        while len(self._columns) < column:
+            self._columns.append([None] * len(lengths))
+        if lengths[row - 1] < column:
+            lengths[row - 1] = column
+        return _ColumnCell(self._columns[column - 1], row - 1)
+    
+    def delete_cols(self, idx, amount=1):
+        start = idx - 1
+        stop = start + amount
+        del self._columns[start:stop]
+        lengths = self._lengths
+        for index, length in enumerate(lengths):
+            if length > start:
+                lengths[index] = length - (min(length, stop) - start)
+    
+    def delete_rows(self, idx, amount=1):
+        for values in self._columns:
+            del values[idx - 1:idx - 1 + amount]
+        del self._lengths[idx - 1:idx - 1 + amount]
+    
+    def __len__(self):
+        return len(self._lengths)
+    
+    def __iter__(self):
+        columns = self._columns
+        for index, length in enumerate(self._lengths):
+            yield _TableRow(columns, index, length)
+
+
+def _row_lists(rows):
+    """Строки таблицы списками значений (для кэша и передачи между процессами)"""
+    if isinstance(rows, list):
+        return rows
+    return [row if isinstance(row, list) else list(row) for row in rows]
+
+
 class DocxToExcelProcessor:
     """
     Класс для обработки документов DOCX и преобразования их в Excel
     с дополнительной обработкой данных.
     """
     
-    def convert_docx_to_excel(self, docx_path, excel_path):
-        """Извлечение таблиц из DOCX и сохранение в Excel"""
-        # Открываем DOCX-файл
-        document = Document(docx_path)
+    # Версия правил обработки; увеличивается при любом изменении правил,
+    # чтобы результаты из дискового кэша конвертации перестали использоваться
+    RULES_VERSION = 1
+    
+    def __init__(self, table_reader="stream", merged_cells="repeat", output_backend="stream",
+                 cache_size=4096, share_cache=False, conversion_cache=None, execution="fused",
+                 column_width_limit=None, column_width_sample=None, instrument=False,
+                 instrument_log=None, table_workers=0, output_format="xlsx", memory_limit=None,
+                 record_index=None, date_backend="auto", table_filter=None):
+        """
+        table_reader - способ чтения таблиц DOCX:
+            "stream" - потоковый разбор word/document.xml (docx_table_reader)
+            "docx"   - через объектную модель python-docx
+        merged_cells - политика объединенных ячеек для потокового чтения
+            (см. docx_table_reader.MERGED_CELLS_POLICIES)
+        output_backend - способ записи книги Excel:
+            "stream"   - строки сразу пишутся на диск (xlsx_stream_writer)
+            "openpyxl" - через обычную рабочую книгу openpyxl
+        cache_size - максимальное число значений в каждом из кэшей
+            преобразований (даты, форматирование текста о судах, проверка
+            на информацию о суде); 0 отключает кэширование
+        share_cache - сохранять кэши между файлами, обработанными этим
+            экземпляром; по умолчанию кэши очищаются перед каждым файлом
+        conversion_cache - дисковый кэш результатов (conversion_cache.ConversionCache),
+            используемый convert_and_process; None - без кэша
+        execution - порядок применения правил к строкам таблицы в памяти:
+            "fused"   - столбцы A и C отбрасываются при чтении строки, и все
+                        правила применяются к строке за один проход
+            "columns" - удаление столбцов и строки, затем отдельный проход
+                        по листу для каждого правила (_process_sheet)
+            Результат и статистика в обоих режимах одинаковые. Лист
+            openpyxl при output_backend="openpyxl" всегда обрабатывается
+            проходами по столбцам
+        column_width_limit - максимальная ширина столбца при автоподборе;
+            None - без ограничения
+        column_width_sample - для очень больших листов: ширина столбцов
+            рассчитывается по первым column_width_sample строкам и далее
+            по выборке строк (см. column_widths.ColumnWidthTracker);
+            None - по всем строкам
+        instrument - замерять время по часам, процессорное время и пик
+            выделенной памяти (tracemalloc) каждого этапа каждого листа;
+            замеры возвращаются в stats["stages"]. Для замера отдельных
+            правил они применяются проходами по столбцам (как при
+            execution="columns"), а tracemalloc заметно замедляет
+            обработку, поэтому режим предназначен для диагностики
+        instrument_log - файл, в конец которого замеры дописываются
+            в формате JSON Lines (по записи на этап); включает instrument
+        table_workers - число процессов для параллельной обработки таблиц
+            одного документа (convert_and_process и process_excel_file);
+            0 или 1 - таблицы обрабатываются в текущем процессе. Пул
+            создается на время обработки файла, поэтому параллельная
+            обработка окупается на документах с многими большими
+            таблицами. Не используется вместе с conversion_cache и
+            instrument
+        output_format - формат результата convert_docx_to_excel и
+            convert_and_process:
+            "xlsx"    - книга Excel, лист на таблицу (способ записи
+                        задает output_backend)
+            "csv"     - CSV в UTF-8 с BOM, первый столбец - номер таблицы
+            "jsonl"   - JSON Lines, объект с номером таблицы на строку
+            "parquet" - Parquet, требует pyarrow
+            Кроме xlsx, строки всех таблиц пишутся в один файл по мере
+            обработки (row_stream_writers). process_excel_file всегда
+            записывает книгу Excel
+        memory_limit - примерный объем памяти под строки одной таблицы,
+            байт: если строки таблицы занимают больше, они переносятся во
+            временный файл, а обработка и запись продолжаются чтением из
+            него (результат не меняется). None - строки хранятся в памяти.
+            Действует при execution="fused"; с conversion_cache и
+            table_workers таблицы все равно собираются в памяти
+        record_index - постоянный индекс записей (record_index.RecordIndex),
+            в который convert_and_process добавляет обработанные строки
+            каждой таблицы; счетчики новых, измененных и повторных записей
+            попадают в stats. None - без индекса. Файл, пропущенный по
+            дисковому кэшу, в индекс повторно не добавляется
+        date_backend - способ нормализации дат в столбцах дат, дат
+            рождения и дат окончания:
+            "python" - построчно, с кэшем дат
+            "pandas" - целым столбцом средствами pandas/NumPy
+                       (vectorized_dates), требует pandas
+            "auto"   - pandas, если он установлен и в таблице не меньше
+                       VECTORIZED_DATES_MIN_ROWS строк, иначе построчно
+            Результат и статистика обработки одинаковые; различаются
+            только счетчики кэша дат
+        table_filter - отбор таблиц DOCX (table_filter.TableFilter) для
+            convert_docx_to_excel и convert_and_process: пропущенные
+            таблицы не обрабатываются и не записываются, листы остальных
+            называются по номеру таблицы в документе. Число пропущенных
+            таблиц по причинам попадает в stats. None - обрабатываются все
+        """
+        if table_reader not in ("stream", "docx"):
+            raise ValueError(f"Неизвестный способ чтения таблиц: {table_reader}")
+        if output_backend not in ("stream", "openpyxl"):
+            raise ValueError(f"Неизвестный способ записи книги: {output_backend}")
+        if execution not in ("fused", "columns"):
+            raise ValueError(f"Неизвестный порядок обработки: {execution}")
+        if output_format != "xlsx" and output_format not in ROW_STREAM_WRITERS:
+            raise ValueError(f"Неизвестный формат результата: {output_format}")
+        if output_format == "parquet" and not PARQUET_AVAILABLE:
+            raise ImportError("Для записи в формате Parquet требуется пакет pyarrow")
+        if date_backend not in ("auto", "python", "pandas"):
+            raise ValueError(f"Неизвестный способ нормализации дат: {date_backend}")
+        if date_backend == "pandas" and not PANDAS_AVAILABLE:
+            raise ImportError("Для нормализации дат средствами pandas требуется пакет pandas")
+        self.table_reader = table_reader
+        self.merged_cells = merged_cells
+        self.output_backend = output_backend
+        self.share_cache = share_cache
+        self.conversion_cache = conversion_cache
+        self.execution = execution
+        self.column_width_limit = column_width_limit
+        self.column_width_sample = column_width_sample
+        self.instrument = instrument or instrument_log is not None
+        self.instrument_log = instrument_log
+        self.table_workers = table_workers
+        self.output_format = output_format
+        self.memory_limit = memory_limit
+        self.record_index = record_index
+        self.date_backend = date_backend
+        self.table_filter = table_filter
+        
+        # Кэши чистых преобразований текста ячеек
+        self._date_cache = _LRUCache(cache_size)
+        self._formatting_cache = _LRUCache(cache_size)
+        self._court_info_cache = _LRUCache(cache_size)
+    
+    def convert_docx_to_excel(self, docx_path, excel_path, progress=None, cancel_token=None,
+                              stats=None):
+        """
+        Извлечение таблиц из DOCX и сохранение в Excel
+        
+        progress - функция, которой передаются события ProgressEvent
+        cancel_token - CancellationToken для отмены обработки
+        stats - словарь, в который добавляются счетчики таблиц, пропущенных
+        table_filter (tables_skipped, tables_skipped_<причина>), например
+        статистика последующего process_excel_file
+        """
+        reporter = self._create_reporter(progress, cancel_token)
+        if stats is None:
+            stats = {}
+        
+        # Каждая таблица из docx становится отдельным листом
+        def sheets():
+            for position, rows in self._iter_selected_tables(docx_path, stats):
+                reporter.start_table(position, f"Таблица_{position}")
+                yield position, f"Таблица_{position}", self._read_rows(rows, reporter)
+        
+        try:
+            # Если таблиц нет, файл не создается и возвращается 0
+            table_count = self._write_workbook(excel_path, sheets(), reporter, self.output_format)
+        finally:
+            self._stop_instrumentation(reporter)
+        
+        # Замеры этапов доступны только в журнале instrument_log
+        self._export_stages(reporter, docx_path)
+        reporter.finish()
+        return table_count
+    
+    def process_excel_file(self, excel_path, progress=None, cancel_token=None):
+        """
+        Удаление столбцов A и C из Excel-файла и обработка первой строки
+        
+        progress и cancel_token - как в convert_docx_to_excel
+        """
+        stats = self._create_stats()
+        reporter = self._create_reporter(progress, cancel_token)
+        
+        try:
+            if self.output_backend == "stream":
+                self._process_excel_file_stream(excel_path, stats, reporter)
+            else:
+                import openpyxl
+                
+                # Загружаем рабочую книгу
+                with reporter.stage("load", whole_workbook=True):
+                    workbook = openpyxl.load_workbook(excel_path)
+                
+                # Обрабатываем каждый лист: значения листа переносятся в
+                # _ColumnTable, а после обработки записываются в новый лист
+                # на месте исходного
+                for i, sheet_name in enumerate(workbook.sheetnames):
+                    reporter.start_table(i + 1, sheet_name)
+                    with reporter.stage("read"):
+                        table = _ColumnTable(workbook[sheet_name].iter_rows(values_only=True))
+                    self._process_sheet(table, stats, reporter)
+                    with reporter.stage("write"):
+                        sheet = self._replace_sheet(workbook, sheet_name, table)
+                    
+                    # Автоподбор ширины столбцов
+                    with reporter.stage("column_widths"):
+                        self._adjust_column_width(sheet)
+                
+                # Сохраняем изменения
+                reporter.check()
+                with reporter.stage("save", whole_workbook=True):
+                    workbook.save(excel_path)
+        finally:
+            self._stop_instrumentation(reporter)
+        
+        # Общее количество нормализованных дат
+        self._finalize_stats(stats)
+        self._add_stage_stats(stats, reporter, excel_path)
+        
+        reporter.finish()
+        
+        return stats
+    
+    def convert_and_process(self, docx_path, excel_path, progress=None, cancel_token=None,
+                            file_key=None):
+        """
+        Извлечение таблиц из DOCX, обработка и сохранение в Excel за один проход
+        
+        В отличие от последовательного вызова convert_docx_to_excel и
+        process_excel_file, строки таблиц обрабатываются в памяти,
+        а рабочая книга записывается на диск ровно один раз.
+        
+        progress и cancel_token - как в convert_docx_to_excel;
+        file_key - ключ файла в дисковом кэше, если он уже вычислен (cache_key)
+        
+        Возвращает (количество таблиц, статистика обработки)
+        """
+        reporter = self._create_reporter(progress, cancel_token)
+        
+        try:
+            if self.conversion_cache is not None:
+                table_count, stats = self._convert_and_process_cached(
+                    docx_path, excel_path, reporter, file_key
+                )
+            else:
+                stats = self._create_stats()
+                
+                tables = (
+                    (position, f"Таблица_{position}", rows)
+                    for position, rows in self._iter_selected_tables(docx_path, stats)
+                )
+                # Применяем все правила обработки к строкам в памяти
+                processed_sheets = self._process_tables(tables, stats, reporter)
+                index_tables = []
+                processed_sheets = self._index_sheets(processed_sheets, index_tables)
+                
+                table_count = self._write_workbook(
+                    excel_path, processed_sheets, reporter, self.output_format
+                )
+                # Записи попадают в индекс только после записи книги
+                self._commit_index(index_tables, docx_path, stats)
+                
+                self._finalize_stats(stats)
+        finally:
+            self._stop_instrumentation(reporter)
+        
+        self._add_stage_stats(stats, reporter, docx_path)
+        
+        reporter.finish()
+        
+        return table_count, stats
+    
+    def process_document_tables(self, tables):
+        """
+        Отбор (table_filter) и обработка таблиц, уже прочитанных из DOCX
+        
+        tables - итератор по таблицам, каждая таблица - итератор по строкам
+        (как у docx_table_reader.iter_docx_tables). Чтение, обработка и
+        запись файла здесь разделены, чтобы конвейер пакетной обработки
+        (batch_pipeline) выполнял их для разных файлов одновременно.
+        
+        Возвращает (список троек (номер таблицы в документе, имя листа,
+        обработанные строки списками), статистика обработки)
+        """
+        stats = self._create_stats()
+        reporter = _ProgressReporter()
+        tables = (
+            (position, f"Таблица_{position}", rows)
+            for position, rows in self._select_tables(tables, stats)
+        )
+        sheets = [
+            (position, title, _row_lists(rows))
+            for position, title, rows in self._process_tables(tables, stats, reporter)
+        ]
+        self._finalize_stats(stats)
+        return sheets, stats
+    
+    def write_processed_tables(self, docx_path, excel_path, sheets, stats):
+        """
+        Записывает листы, полученные process_document_tables, в формате
+        output_format и добавляет их строки в record_index (счетчики
+        записей - в stats)
+        
+        Возвращает количество листов; если листов нет, файл не создается
+        """
+        index_tables = []
+        sheets = self._index_sheets(sheets, index_tables)
+        table_count = self._write_workbook(excel_path, sheets, None, self.output_format)
+        self._commit_index(index_tables, docx_path, stats)
+        return table_count
+    
+    def cache_key(self, docx_path):
+        """
+        Ключ DOCX файла в дисковом кэше или None, если кэш не используется
+        
+        Ключ вычисляется по всему содержимому файла; его можно передать
+        в cached_result и convert_and_process, чтобы не читать файл снова
+        """
+        if self.conversion_cache is None:
+            return None
+        return self.conversion_cache.file_key(docx_path, self._cache_salt())
+    
+    def cached_result(self, docx_path, excel_path, file_key=None):
+        """
+        Результат из дискового кэша, если файл уже был обработан
+        
+        Возвращает (количество таблиц, статистика обработки), если DOCX
+        файл не изменился с прошлой обработки, а excel_path - записанный
+        тогда Excel-файл; иначе None. file_key - как в convert_and_process
+        """
+        if self.conversion_cache is None:
+            return None
+        
+        stats = self._create_stats()
+        if file_key is None:
+            file_key = self.cache_key(docx_path)
+        entry = self.conversion_cache.get_file(file_key)
+        if entry is None or not self.conversion_cache.output_matches(entry, excel_path):
+            return None
+        
+        self._add_stats(stats, entry["stats"])
+        stats["files_skipped"] += 1
+        stats["tables_reused"] += len(entry["tables"])
+        stats["rows_reused"] = stats["rows_processed"]
+        self._finalize_stats(stats)
+        
+        return len(entry["tables"]), stats
+    
+    def invalidate_cached(self, docx_path):
+        """Удаляет из дискового кэша результаты обработки DOCX файла"""
+        if self.conversion_cache is None:
+            return False
+        return self.conversion_cache.invalidate_file(docx_path, self._cache_salt())
+    
+    def _convert_and_process_cached(self, docx_path, excel_path, reporter, file_key=None):
+        """
+        convert_and_process с использованием дискового кэша
+        
+        Неизмененный файл не обрабатывается вовсе, а в измененном
+        обрабатываются только таблицы, которых еще нет в кэше; для
+        остальных берутся сохраненные строки и статистика
+        """
+        if file_key is None:
+            file_key = self.cache_key(docx_path)
+        result = self.cached_result(docx_path, excel_path, file_key)
+        if result is not None:
+            return result
+        
+        cache = self.conversion_cache
+        salt = self._cache_salt()
+        
+        stats = self._create_stats()
+        file_stats = {}
+        table_keys = []
+        
+        def processed_sheets():
+            for position, rows in self._iter_selected_tables(docx_path, file_stats):
+                reporter.start_table(position, f"Таблица_{position}")
+                with reporter.stage("read"):
+                    rows = list(rows)
+                table_key = cache.table_key(rows, salt)
+                table_keys.append(table_key)
+                
+                cached = cache.get_table(table_key)
+                if cached is not None:
+                    processed_rows, table_stats = cached
+                    self._add_stats(stats, table_stats)
+                    stats["tables_reused"] += 1
+                    stats["rows_reused"] += table_stats.get("rows_processed", 0)
+                else:
+                    before = dict(stats)
+                    # Строки, перенесенные во временный файл (memory_limit), и строки
+                    # _ColumnTable для записи в кэш собираются в список списков
+                    processed_rows = _row_lists(self._process_rows(rows, stats, reporter))
+                    table_stats = {key: stats[key] - before[key] for key in before}
+                    cache.put_table(table_key, processed_rows, table_stats)
+                
+                self._add_stats(file_stats, table_stats)
+                yield position, f"Таблица_{position}", processed_rows
+        
+        index_tables = []
+        table_count = self._write_workbook(
+            excel_path, self._index_sheets(processed_sheets(), index_tables), reporter,
+            self.output_format
+        )
+        self._commit_index(index_tables, docx_path, stats)
+        # Счетчики пропущенных таблиц считаются для файла целиком
+        for key, value in file_stats.items():
+            if key.startswith("tables_skipped"):
+                stats[key] += value
+        cache.put_file(file_key, table_keys, file_stats, excel_path if table_count else None)
+        
+        self._finalize_stats(stats)
+        
+        return table_count, stats
+    
+    def _cache_salt(self):
+        """
+        Параметры, от которых зависит результат обработки строк таблицы
+        
+        Двузначный год раскрывается относительно текущего года, поэтому
+        после смены года записи кэша перестают использоваться
+        """
+        salt = [self.RULES_VERSION, self.merged_cells, datetime.now().year]
+        if self.table_filter is not None:
+            salt.append(self.table_filter.signature())
+        return salt
+    
+    def _add_stats(self, stats, other):
+        """Прибавляет счетчики other к stats"""
+        for key, value in other.items():
+            stats[key] = stats.get(key, 0) + value
+    
+    def _process_excel_file_stream(self, excel_path, stats, reporter):
+        """
+        Обработка Excel-файла с потоковой записью результата
+        
+        Листы читаются по одному в режиме только для чтения, обрабатываются
+        в памяти и записываются во временный файл, который затем заменяет
+        исходный. Сохраняются значения ячеек, имена листов и ширина столбцов.
+        """
+        import openpyxl
+        
+        with reporter.stage("load", whole_workbook=True):
+            workbook = openpyxl.load_workbook(excel_path, read_only=True)
+        temp_path = f"{excel_path}.tmp"
+        
+        try:
+            sheets = (
+                (i + 1, sheet_name, workbook[sheet_name].iter_rows(values_only=True))
+                for i, sheet_name in enumerate(workbook.sheetnames)
+            )
+            processed_sheets = self._process_tables(sheets, stats, reporter)
+            
+            self._write_workbook(temp_path, processed_sheets, reporter)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        finally:
+            workbook.close()
+        
+        os.replace(temp_path, excel_path)
+    
+    def _replace_sheet(self, workbook, sheet_name, rows):
+        """
+        Заменяет лист книги openpyxl новым листом с теми же именем и
+        позицией, заполненным строками rows; возвращает новый лист
+        """
+        sheet = workbook[sheet_name]
+        index = workbook.index(sheet)
+        workbook.remove(sheet)
+        
+        sheet = workbook.create_sheet(title=sheet_name, index=index)
+        for row in rows:
+            sheet.append(list(row))
+        return sheet
+    
+    def _write_workbook(self, excel_path, sheets, reporter=None, output_format="xlsx"):
+        """
+        Записывает листы в Excel-файл выбранным способом записи
+        
+        sheets - итерируемая последовательность троек (номер таблицы в
+        документе, имя листа, строки); номер таблицы записывается в
+        строки форматов row_stream_writers
+        output_format - "xlsx" или формат из row_stream_writers.ROW_STREAM_WRITERS
+        Возвращает количество записанных листов; если листов нет,
+        файл не создается
+        
+        Книга записывается во временный файл рядом с excel_path и заменяет
+        его только после успешной записи: при ошибке или отмене прежний
+        файл excel_path остается без изменений
+        """
+        temp_path = f"{excel_path}.part"
+        try:
+            sheet_count = self._write_workbook_file(temp_path, sheets, reporter, output_format)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        if sheet_count:
+            os.replace(temp_path, excel_path)
+        return sheet_count
+    
+    def _write_workbook_file(self, excel_path, sheets, reporter, output_format):
+        """Запись книги для _write_workbook"""
+        if reporter is None:
+            reporter = _ProgressReporter()
+        
+        sheets = iter(sheets)
+        first_sheet = next(sheets, None)
+        if first_sheet is None:
+            return 0
+        sheets = itertools.chain([first_sheet], sheets)
+        
+        sheet_count = 0
+        
+        if output_format != "xlsx" or self.output_backend == "stream":
+            if output_format != "xlsx":
+                writer = ROW_STREAM_WRITERS[output_format](excel_path)
+            else:
+                from xlsx_stream_writer import XlsxStreamWriter
+                
+                writer = XlsxStreamWriter(excel_path, self.column_width_limit, self.column_width_sample)
+            
+            with writer:
+                for position, title, rows in sheets:
+                    # Ширина столбцов XLSX рассчитывается при записи строк
+                    with reporter.stage("write"):
+                        if output_format != "xlsx":
+                            sheet = writer.add_sheet(title, position)
+                        else:
+                            sheet = writer.add_sheet(title)
+                        sheet_count += 1
+                        for row in self._iter_rows_with_progress(rows, reporter):
+                            sheet.append(row)
+                
+                with reporter.stage("save", whole_workbook=True):
+                    writer.close()
+            return sheet_count
+        
+        import openpyxl
+        
+        # Создаем новую рабочую книгу Excel
+        workbook = openpyxl.Workbook()
+        # Удаляем стандартный лист
+        default_sheet = workbook.active
+        workbook.remove(default_sheet)
+        
+        for _, title, rows in sheets:
+            sheet = workbook.create_sheet(title=title)
+            sheet_count += 1
+            
+            # Ширина столбцов рассчитывается по мере добавления строк
+            with reporter.stage("write"):
+                width_tracker = self._create_width_tracker()
+                for row in self._iter_rows_with_progress(rows, reporter):
+                    # openpyxl принимает строки только списками или кортежами
+                    if not isinstance(row, (list, tuple)):
+                        row = list(row)
+                    sheet.append(row)
+                    width_tracker.add_row(row)
+            
+            with reporter.stage("column_widths"):
+                self._set_column_widths(sheet, width_tracker.widths())
+        
+        # Сохраняем Excel-файл
+        reporter.check()
+        with reporter.stage("save", whole_workbook=True):
+            workbook.save(excel_path)
+        
+        return sheet_count
+    
+    def _create_reporter(self, progress, cancel_token):
+        """Сопровождение одного вызова обработки; при instrument - с замерами этапов"""
+        recorder = None
+        if self.instrument:
+            recorder = _StageRecorder()
+            recorder.start()
+        return _ProgressReporter(progress, cancel_token, recorder)
+    
+    def _stop_instrumentation(self, reporter):
+        if reporter.recorder is not None:
+            reporter.recorder.stop()
+    
+    def _add_stage_stats(self, stats, reporter, path):
+        """Добавляет замеры этапов в stats["stages"] и журнал instrument_log"""
+        if reporter.recorder is None:
+            return
+        stats["stages"] = reporter.recorder.records
+        self._export_stages(reporter, path)
+    
+    def _export_stages(self, reporter, path):
+        """Дописывает замеры этапов в журнал instrument_log"""
+        if reporter.recorder is None or self.instrument_log is None:
+            return
+        with open(self.instrument_log, "a", encoding="utf-8") as log:
+            for record in reporter.recorder.records:
+                log.write(json.dumps({"file": path, **record}, ensure_ascii=False) + "\n")
+    
+    def _read_rows(self, rows, reporter):
+        """
+        Строки таблицы; при замерах этапов чтение выполняется сразу,
+        чтобы его время не смешивалось со временем обработки
+        """
+        if reporter.recorder is None:
+            return rows
+        with reporter.stage("read"):
+            return list(rows)
+    
+    def _iter_rows_with_progress(self, rows, reporter):
+        """Строки листа с сообщением о ходе записи через каждые _PROGRESS_INTERVAL строк"""
+        rows_total = len(rows) if isinstance(rows, (list, _SpillableRows, _ColumnTable)) else 0
+        reporter.report("write", 0, rows_total)
+        rows_done = 0
+        for rows_done, row in enumerate(rows, 1):
+            yield row
+            if rows_done % _PROGRESS_INTERVAL == 0:
+                reporter.report("write", rows_done, rows_total)
+        reporter.report("write", rows_done, rows_total)
+    
+    def _extract_tables(self, docx_path):
+        """
+        Извлекает все таблицы из DOCX в виде списков строк
+        
+        Каждая таблица - список строк, каждая строка - список текстов ячеек
+        """
+        return [list(rows) for rows in self._iter_tables(docx_path)]
+    
+    def _iter_tables(self, docx_path):
+        """
+        Возвращает итератор по таблицам DOCX, каждая таблица - итератор
+        по строкам, каждая строка - список текстов ячеек
+        """
+        if self.table_reader == "stream":
+            return iter_docx_tables(docx_path, self.merged_cells)
+        
+        # Открываем DOCX-файл
+        from docx import Document
+        
+        document = Document(docx_path)
+        return (
+            ([cell.text for cell in row.cells] for row in table.rows)
+            for table in document.tables
+        )
+    
+    def _iter_selected_tables(self, docx_path, stats=None):
+        """
+        Таблицы DOCX, отобранные table_filter: пары (номер таблицы
+        в документе с 1, строки)
+        
+        Решение принимается по первым строкам таблицы; остальные строки
+        пропущенной таблицы не разбираются (DocxTableRows.skip), а после
+        последней таблицы из table_filter.positions документ дальше не
+        читается. Пропущенные таблицы учитываются в stats
+        """
+        return self._select_tables(self._iter_tables(docx_path), stats)
+    
+    def _select_tables(self, tables, stats=None):
+        """_iter_selected_tables для уже открытого итератора таблиц"""
+        table_filter = self.table_filter
+        if table_filter is None:
+            yield from enumerate(tables, 1)
+            return
+        
+        last_position = table_filter.last_position
+        for position, rows in enumerate(tables, 1):
+            if last_position is not None and position > last_position:
+                break
+            
+            header_rows = list(itertools.islice(rows, table_filter.header_rows))
+            reason = table_filter.check(position, header_rows)
+            if reason is None:
+                yield position, itertools.chain(header_rows, rows)
+                continue
+            
+            skip = getattr(rows, "skip", None)
+            if skip is not None:
+                skip()
+            if stats is not None:
+                self._add_stats(stats, {"tables_skipped": 1, f"tables_skipped_{reason}": 1})
+    
+    def _create_stats(self):
+        """Создает словарь счетчиков обработки"""
+        # Начинаем новый подсчет попаданий в кэши, а если кэши не
+        # разделяются между файлами - очищаем их
+        for cache in self._caches().values():
+            if self.share_cache:
+                cache.reset_counters()
+            else:
+                cache.clear()
+        
+        return {
+            "sheets_processed": 0,
+            "rows_deleted": 0,
+            "dates_normalized": 0,
+            "birth_dates_normalized": 0,
+            "end_dates_normalized": 0,
+            "text_moved": 0,
+            "court_info_moved": 0,
+            "court_dates_normalized": 0,
+            "formatted_cells": 0,
+            "rows_processed": 0,
+            "tables_reused": 0,
+            "rows_reused": 0,
+            "files_skipped": 0,
+            "records_added": 0,
+            "records_changed": 0,
+            "records_duplicate": 0,
+            "tables_skipped": 0,
+            "tables_skipped_position": 0,
+            "tables_skipped_columns": 0,
+            "tables_skipped_header": 0
+        }
+    
+    def _finalize_stats(self, stats):
+        """Подсчитывает общее количество нормализованных дат и статистику кэшей"""
+        stats["total_dates_normalized"] = stats["dates_normalized"] + stats["birth_dates_normalized"] + stats["end_dates_normalized"] + stats["court_dates_normalized"]
+        
+        # Попадания и промахи кэшей преобразований
+        for name, cache in self._caches().items():
+            stats[f"{name}_cache_hits"] = cache.hits
+            stats[f"{name}_cache_misses"] = cache.misses
+    
+    def _caches(self):
+        """Кэши преобразований по именам, используемым в статистике"""
+        return {
+            "date": self._date_cache,
+            "formatting": self._formatting_cache,
+            "court_info": self._court_info_cache,
+        }
+    
+    def _index_sheets(self, sheets, index_tables):
+        """
+        Готовит записи record_index из строк каждого листа перед его записью
+        
+        sheets - тройки (номер таблицы, имя листа, строки). Записи каждого
+        листа добавляются в index_tables парами (имя листа, записи) и
+        попадают в индекс только в _commit_index, после того как книга
+        записана. Без индекса возвращает sheets без изменений
+        """
+        if self.record_index is None:
+            return sheets
+        return self._iter_indexed_sheets(sheets, index_tables)
+    
+    def _iter_indexed_sheets(self, sheets, index_tables):
+        from record_index import prepare_row
         
-        # Проверяем, есть ли таблицы
-        if not document.tables:
-            return 0
+        for position, title, rows in sheets:
+            entries = [entry for entry in map(prepare_row, rows) if entry is not None]
+            index_tables.append((title, entries))
+            yield position, title, rows
+    
+    def _commit_index(self, index_tables, source, stats):
+        """Добавляет записи, подготовленные _index_sheets, в record_index одной транзакцией"""
+        if self.record_index is None or not index_tables:
+            return
+        counts = self.record_index.add_tables(index_tables, source)
+        for name, count in counts.items():
+            stats[f"records_{name}"] += count
+    
+    def _process_tables(self, tables, stats, reporter):
+        """
+        Применяет правила обработки к каждой таблице
         
-        # Создаем новую рабочую книгу Excel
-        workbook = openpyxl.Workbook()
-        # Удаляем стандартный лист
-        default_sheet = workbook.active
-        workbook.remove(default_sheet)
+        tables - тройки (номер таблицы, имя листа, строки); номер - позиция
+        таблицы в документе, он передается в события хода обработки, поэтому
+        при отборе таблиц (table_filter) номера совпадают с номерами в DOCX.
+        Возвращает тройки (номер таблицы, имя листа, обработанные строки)
+        в том же порядке
+        """
+        if self.table_workers > 1 and reporter.recorder is None:
+            yield from self._process_tables_parallel(tables, stats, reporter)
+            return
+        
+        for position, title, rows in tables:
+            reporter.start_table(position, title)
+            rows = self._read_rows(rows, reporter)
+            yield position, title, self._process_rows(rows, stats, reporter)
+    
+    def _process_tables_parallel(self, tables, stats, reporter):
+        """
+        Обработка таблиц в пуле процессов
+        
+        Строки таблиц передаются в рабочие процессы обычными списками, а
+        результаты возвращаются в исходном порядке таблиц, поэтому листы
+        книги и сумма счетчиков статистики не зависят от того, какой
+        процесс закончил раньше. Одновременно в обработке не больше
+        2 * table_workers таблиц, чтобы прочитанные, но еще не записанные
+        таблицы не занимали память.
+        """
+        pending = deque()
+        max_pending = 2 * self.table_workers
+        from concurrent.futures import ProcessPoolExecutor
+        
+        executor = ProcessPoolExecutor(
+            max_workers=self.table_workers,
+            initializer=_init_table_worker,
+            initargs=(self._table_worker_options(),),
+        )
+        try:
+            for position, title, rows in tables:
+                reporter.start_table(position, title)
+                future = executor.submit(_process_table_in_worker, [list(row) for row in rows])
+                pending.append((position, title, future))
+                
+                while len(pending) >= max_pending:
+                    yield self._collect_table_result(pending.popleft(), stats, reporter)
+            
+            while pending:
+                yield self._collect_table_result(pending.popleft(), stats, reporter)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _collect_table_result(self, task, stats, reporter):
+        """Ждет результата таблицы из пула и добавляет ее счетчики к stats"""
+        table, title, future = task
+        processed_rows, table_stats, cache_counters = future.result()
+        
+        self._add_stats(stats, table_stats)
+        # Попадания в кэши рабочих процессов учитываются в общей статистике
+        caches = self._caches()
+        for name, (hits, misses) in cache_counters.items():
+            caches[name].hits += hits
+            caches[name].misses += misses
+        
+        reporter.table = table
+        reporter.sheet = title
+        reporter.report("process", table_stats["rows_processed"], table_stats["rows_processed"])
+        return table, title, processed_rows
+    
+    def _table_worker_options(self):
+        """Параметры процессора рабочего процесса, влияющие на обработку строк"""
+        return {
+            "execution": self.execution,
+            "cache_size": self._date_cache.maxsize,
+            "date_backend": self.date_backend,
+        }
+    
+    def _process_table_rows(self, rows):
+        """
+        Обрабатывает строки одной таблицы в рабочем процессе
         
-        # Счетчик таблиц
-        table_count = 0
+        Возвращает (обработанные строки, счетчики статистики таблицы,
+        попадания и промахи кэшей преобразований)
+        """
+        for cache in self._caches().values():
+            cache.reset_counters()
+        stats = self._create_stats()
+        processed_rows = _row_lists(self._process_rows(rows, stats))
+        cache_counters = {
+            name: (cache.hits, cache.misses) for name, cache in self._caches().items()
+        }
+        return processed_rows, stats, cache_counters
+    
+    def _process_rows(self, rows, stats, reporter=None):
+        """
+        Применяет все правила обработки к строкам таблицы в памяти
         
-        # Для каждой таблицы из docx
-        for i, table in enumerate(document.tables):
-            # Создаем новый лист для каждой таблицы
-            sheet_name = f"Таблица_{i+1}"
-            sheet = workbook.create_sheet(title=sheet_name)
-            table_count += 1
-            
-            # Копируем данные из таблицы docx в Excel
-            for row_idx, row in enumerate(table.rows):
-                for col_idx, cell in enumerate(row.cells):
-                    # Excel использует индексацию с 1, а не с 0
-                    excel_row = row_idx + 1
-                    excel_col = col_idx + 1
-                    sheet.cell(row=excel_row, column=excel_col).value = cell.text
-            
-            # Автоподбор ширины столбцов
-            self._adjust_column_width(sheet)
+        Возвращает обработанные строки: список списков значений ячеек,
+        _SpillableRows (memory_limit) или _ColumnTable (проходы по столбцам)
+        """
+        if reporter is None:
+            reporter = _ProgressReporter()
         
-        # Сохраняем Excel-файл
-        workbook.save(excel_path)
+        # Правила, примененные за один проход по строке, нельзя замерить
+        # по отдельности, поэтому при замерах используются проходы по столбцам
+        if self.execution == "fused" and reporter.recorder is None:
+            return self._process_rows_fused(rows, stats, reporter)
         
-        return table_count
+        table = _ColumnTable(rows)
+        self._process_sheet(table, stats, reporter)
+        return table
     
-    def process_excel_file(self, excel_path):
-        """Удаление столбцов A и C из Excel-файла и обработка первой строки"""
-        # Загружаем рабочую книгу
-        workbook = openpyxl.load_workbook(excel_path)
+    def _process_rows_fused(self, rows, stats, reporter):
+        """
+        Обработка строк за один проход по каждой строке
+        
+        Дает тот же результат, что и _process_sheet на _ColumnTable:
+        столбцы A и C отбрасываются уже при чтении строки (вместо сдвига
+        всех ячеек листа), а правила, которые _process_sheet применяет
+        отдельными проходами по столбцам, применяются к строке подряд.
+        Правила не зависят от соседних строк, поэтому порядок обхода
+        на результат не влияет.
+        """
+        rows = iter(rows)
+        stats["sheets_processed"] += 1
+        
+        # Первая строка удаляется, если во второй ячейке (B1) нет даты
+        first_row = next(rows, None)
+        second_cell_value = None
+        if first_row is not None and len(first_row) > 1:
+            second_cell_value = first_row[1]
+        
+        if self.memory_limit is None:
+            projected_rows = []
+        else:
+            projected_rows = _SpillableRows(self.memory_limit)
+        if self._is_date(second_cell_value):
+            projected_rows.append(_project_row(first_row))
+        else:
+            stats["rows_deleted"] += 1
+        projected_rows.extend(_project_row(row) for row in rows)
+        
+        # Как и у листа, обрабатываются строки до последней непустой,
+        # но не меньше одной
+        max_row = 1
+        if isinstance(projected_rows, _SpillableRows):
+            max_row = max(projected_rows.last_filled, 1)
+        else:
+            for index in range(len(projected_rows), 0, -1):
+                if projected_rows[index - 1]:
+                    max_row = index
+                    break
+        if not len(projected_rows):
+            projected_rows.append([])
+        
+        stats["rows_processed"] += max_row
+        
+        reporter.report("process", 0, max_row)
+        if isinstance(projected_rows, _SpillableRows):
+            if projected_rows.spilled:
+                return self._process_spilled_rows(projected_rows, max_row, stats, reporter)
+            projected_rows = projected_rows.rows
+        
+        # Даты нормализуются сразу для всех строк, если это выгоднее построчной обработки
+        dates_normalized = self._vectorize_dates(max_row)
+        if dates_normalized:
+            self._normalize_row_dates(projected_rows[:max_row], stats)
+        
+        for row_number, values in enumerate(itertools.islice(projected_rows, max_row), 1):
+            self._process_row(values, stats, dates_normalized)
+            if row_number % _PROGRESS_INTERVAL == 0:
+                reporter.report("process", row_number, max_row)
+        reporter.report("process", max_row, max_row)
+        
+        return projected_rows
+    
+    def _process_spilled_rows(self, rows, max_row, stats, reporter):
+        """
+        Обработка строк, перенесенных во временный файл
+        
+        Строки читаются из файла по одной и после обработки дописываются
+        в новый набор _SpillableRows, который и возвращается
+        """
+        processed_rows = _SpillableRows(self.memory_limit)
+        for row_number, values in enumerate(rows, 1):
+            if row_number <= max_row:
+                self._process_row(values, stats)
+                if row_number % _PROGRESS_INTERVAL == 0:
+                    reporter.report("process", row_number, max_row)
+            processed_rows.append(values)
+        reporter.report("process", max_row, max_row)
+        
+        return processed_rows
+    
+    def _process_row(self, values, stats, dates_normalized=False):
+        """
+        Применяет к одной строке (после удаления столбцов A и C) правила
+        в том же порядке и с теми же столбцами, что и _process_sheet
+        
+        values дополняется до 9 ячеек: проходы по столбцам обращаются
+        к ячейкам столбцов 1-9 каждой строки и тем самым создают их.
+        dates_normalized - даты строки уже обработаны _normalize_row_dates
+        """
+        if len(values) < _PROCESSED_COLUMN_COUNT:
+            values.extend([None] * (_PROCESSED_COLUMN_COUNT - len(values)))
+        
+        if not dates_normalized:
+            self._apply_row_dates(
+                values,
+                self._normalize_date_value(values[0]) if values[0] else None,
+                self._normalize_birth_date_value(values[2]) if values[2] else None,
+                self._split_end_date_value(values[5]) if values[5] else None,
+                stats,
+            )
+        
+        # Информация о судах из столбцов 4 и 5 (D и E) переносится в столбец 9 (I)
+        for index in (3, 4):
+            value = values[index]
+            if not value:
+                continue
+            value_str = str(value).strip()
+            if self._is_court_info_cached(value_str):
+                if values[8]:
+                    values[8] = f"{values[8]} {value_str}"
+                else:
+                    values[8] = value_str
+                values[index] = ""
+                stats["court_info_moved"] += 1
+        
+        # Даты в информации о судах
+        value = values[8]
+        if value:
+            text, dates_count = self._normalize_court_dates_value(value)
+            if dates_count:
+                values[8] = text
+                stats["court_dates_normalized"] += dates_count
+        
+        # Форматирование информации о судах
+        value = values[8]
+        if value:
+            formatted_text = self._format_court_value(value)
+            if formatted_text is not None:
+                values[8] = formatted_text
+                stats["formatted_cells"] += 1
+    
+    def _normalize_row_dates(self, rows, stats):
+        """
+        Нормализует даты в строках (после удаления столбцов A и C) сразу
+        для каждого столбца дат через _column_dates
+        """
+        for values in rows:
+            if len(values) < _PROCESSED_COLUMN_COUNT:
+                values.extend([None] * (_PROCESSED_COLUMN_COUNT - len(values)))
+        
+        dates = self._column_dates([values[0] for values in rows], "normalize_dates",
+                                   self._normalize_date_value)
+        birth_dates = self._column_dates([values[2] for values in rows], "first_dates",
+                                         self._normalize_birth_date_value)
+        end_dates = self._column_dates([values[5] for values in rows], "split_end_dates",
+                                       self._split_end_date_value)
+        for values, normalized_date, birth_date, end_date in zip(rows, dates, birth_dates, end_dates):
+            self._apply_row_dates(values, normalized_date, birth_date, end_date, stats)
+    
+    def _apply_row_dates(self, values, normalized_date, birth_date, end_date_result, stats):
+        """Записывает в строку результаты правил дат и обновляет статистику"""
+        # Даты в первом столбце (A)
+        if normalized_date:
+            values[0] = normalized_date
+            stats["dates_normalized"] += 1
+        
+        # Даты рождения в третьем столбце (C)
+        if birth_date:
+            values[2] = birth_date
+            stats["birth_dates_normalized"] += 1
+        
+        # Даты окончания в столбце 6 (F), текст переносится в столбец 8 (H)
+        if end_date_result is not None:
+            end_date, moved_text = end_date_result
+            if moved_text:
+                values[7] = moved_text
+                stats["text_moved"] += 1
+            values[5] = end_date
+            if end_date:
+                stats["end_dates_normalized"] += 1
+    
+    def _process_sheet(self, sheet, stats, reporter=None):
+        """
+        Применяет все правила обработки к одному листу
+        
+        Лист может быть листом openpyxl или _ColumnTable
+        """
+        if reporter is None:
+            reporter = _ProgressReporter()
         
         # Колонки для удаления в обратном порядке (C, A)
         # Важно: удаляем сначала большие индексы, потом меньшие,
         # чтобы не смещались индексы колонок при удалении
         columns_to_remove = [3, 1]  # C = 3, A = 1
         
-        stats = {
-            "sheets_processed": 0,
-            "rows_deleted": 0,
-            "dates_normalized": 0,
-            "birth_dates_normalized": 0,
-            "end_dates_normalized": 0,
-            "text_moved": 0,
-            "court_info_moved": 0,
-            "court_dates_normalized": 0,
-            "formatted_cells": 0
-        }
+        stats["sheets_processed"] += 1
         
-        # Обрабатываем каждый лист
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            stats["sheets_processed"] += 1
-            
+        with reporter.stage("delete_columns"):
             # ВАЖНО: Сначала проверяем, нужно ли удалить первую строку
             # Получаем значение ВТОРОЙ ячейки (B1) для проверки
             second_cell_value = sheet.cell(row=1, column=2).value
@@ -93,42 +1741,46 @@ class DocxToExcelProcessor:
             if delete_first_row:
                 sheet.delete_rows(1, 1)
                 stats["rows_deleted"] += 1
-            
-            # Нормализуем даты в первом столбце (бывший B, теперь A после удаления)
+        
+        # Количество строк с данными, которые будут обработаны
+        max_row = sheet.max_row
+        stats["rows_processed"] += max_row
+        reporter.report("process", 0, max_row)
+        
+        # Нормализуем даты в первом столбце (бывший B, теперь A после удаления)
+        with reporter.stage("_normalize_dates"):
             normalized_count = self._normalize_dates(sheet, 1)  # Столбец 1 (A)
-            stats["dates_normalized"] += normalized_count
-            
-            # Нормализуем даты рождения в третьем столбце (бывший E, теперь C после удаления столбцов A и C)
+        stats["dates_normalized"] += normalized_count
+        
+        # Нормализуем даты рождения в третьем столбце (бывший E, теперь C после удаления столбцов A и C)
+        with reporter.stage("_normalize_birth_dates"):
             birth_normalized_count = self._normalize_birth_dates(sheet, 3)  # Столбец 3 (C)
-            stats["birth_dates_normalized"] += birth_normalized_count
-            
-            # Обрабатываем столбец 8 (бывший J, теперь H/6 после удаления столбцов A и C)
+        stats["birth_dates_normalized"] += birth_normalized_count
+        reporter.check()
+        
+        # Обрабатываем столбец 8 (бывший J, теперь H/6 после удаления столбцов A и C)
+        with reporter.stage("_process_end_dates"):
             end_dates_count, moved_text_count = self._process_end_dates(sheet, 6, 8)  # Столбец 6 (F) и 8 (H)
-            stats["end_dates_normalized"] += end_dates_count
-            stats["text_moved"] += moved_text_count
-            
-            # Обрабатываем столбцы 4 и 5 (бывшие F и G, новые D и E) и ищем информацию о судах
+        stats["end_dates_normalized"] += end_dates_count
+        stats["text_moved"] += moved_text_count
+        
+        # Обрабатываем столбцы 4 и 5 (бывшие F и G, новые D и E) и ищем информацию о судах
+        with reporter.stage("_move_court_info"):
             court_moved = self._move_court_info(sheet, source_columns=(4, 5), target_column=9)
-            stats["court_info_moved"] += court_moved
-            
-            # Нормализуем даты в столбце с информацией о судах
-            court_normalized = self._normalize_dates_in_court_info(sheet, 9)
-            stats["court_dates_normalized"] += court_normalized
-            
-            # Форматируем информацию о судах для улучшения читаемости
-            formatted_cells = self._format_court_info(sheet, 9)
-            stats["formatted_cells"] += formatted_cells
-            
-            # Автоподбор ширины столбцов
-            self._adjust_column_width(sheet)
+        stats["court_info_moved"] += court_moved
+        reporter.check()
         
-        # Сохраняем изменения
-        workbook.save(excel_path)
+        # Нормализуем даты в столбце с информацией о судах
+        with reporter.stage("_normalize_dates_in_court_info"):
+            court_normalized = self._normalize_dates_in_court_info(sheet, 9)
+        stats["court_dates_normalized"] += court_normalized
         
-        # Общее количество нормализованных дат
-        stats["total_dates_normalized"] = stats["dates_normalized"] + stats["birth_dates_normalized"] + stats["end_dates_normalized"] + stats["court_dates_normalized"]
+        # Форматируем информацию о судах для улучшения читаемости
+        with reporter.stage("_format_court_info"):
+            formatted_cells = self._format_court_info(sheet, 9)
+        stats["formatted_cells"] += formatted_cells
         
-        return stats
+        reporter.report("process", max_row, max_row)
     
     def _format_court_info(self, sheet, column_index=9):
         """
@@ -147,132 +1799,66 @@ class DocxToExcelProcessor:
             if not value:
                 continue
                 
-            value_str = str(value).strip()
-            
-            # Применяем форматирование
-            formatted_text = self._apply_formatting_rules(value_str)
-            
-            # Если текст изменился, обновляем ячейку
-            if formatted_text != value_str:
+            formatted_text = self._format_court_value(value)
+            if formatted_text is not None:
                 cell.value = formatted_text
                 formatted_count += 1
         
         return formatted_count
     
+    def _format_court_value(self, value):
+        """
+        Отформатированный текст непустой ячейки с информацией о судах
+        или None, если форматирование текст не меняет
+        """
+        value_str = str(value).strip()
+        
+        # Применяем форматирование (одинаковые тексты берутся из кэша)
+        formatted_text = self._formatting_cache.get_or_compute(
+            value_str, self._apply_formatting_rules, value_str
+        )
+        
+        # Если текст изменился, ячейку нужно обновить
+        if formatted_text != value_str:
+            return formatted_text
+        
+        return None
+    
     def _apply_formatting_rules(self, text):
         """
         Применяет набор правил форматирования к тексту с информацией о судах
         с учетом правильного согласования падежей
         
+        Правила компилируются один раз (см. _COURT_*_RE), а
+        соседние независимые замены объединены, чтобы текст просматривался
+        за минимальное число проходов.
+        
         Возвращает отформатированный текст
         """
         # 1. Контекстная замена сокращений судов с учетом падежей
         # Творительный падеж (кем/чем - судом)
-        text = re.sub(r'([А-Яа-я]+ским|[А-Яа-я]+ским\s+[а-я]/с)', r'\1 районным судом', text)
-        text = re.sub(r'([А-Яа-я]+ским|[А-Яа-я]+ским\s+[а-я]/с)', r'\1 городским судом', text)
+        text = _COURT_INSTRUMENTAL_RE.sub(_COURT_INSTRUMENTAL_REPLACEMENT, text)
         
         # Родительный падеж (чего - суда) - для постановлений, определений, приговоров
-        text = re.sub(r'([Пп]остановлением|[Пп]риговором|[Оо]пределением)\s+([А-Яа-я]+ского)\s+р/с', 
-                    r'\1 \2 районного суда', text)
-        text = re.sub(r'([Пп]остановлением|[Пп]риговором|[Оо]пределением)\s+([А-Яа-я]+ского)\s+г/с', 
-                    r'\1 \2 городского суда', text)
-        
-        # Базовые замены (для именительного падежа и оставшихся случаев)
-        # Но используем их после контекстных замен, чтобы не переопределять
-        court_abbreviations = {
-            r'р/с(?!\s+[А-Яа-я]+ского)': 'районный суд',
-            r'г/с(?!\s+[А-Яа-я]+ского)': 'городской суд',
-            r'л/св\b': 'лишения свободы',
-            r'л/с\b': 'лишения свободы',
-            r'\bУДО\b': 'условно-досрочное освобождение',
-            r'\bИС\b': 'испытательный срок',
-            r'\bОС\b': 'ограничение свободы',
-            r'\bИК\b': 'исправительная колония',
-            r'\bОР\b': 'обязательных работ',
-            r'\bИР\b': 'исправительных работ',
-            r'\bЗЗД\b': 'запрет заниматься деятельностью',
-            r'\bПМЖ\b': 'постоянное место жительства',
-            r'\bТС\b': 'транспортными средствами',
-            r'\bз/п\b': 'заработной платы',
-            r'МССУ': 'Мировой судья судебного участка'
-        }
-        
-        for pattern, replacement in court_abbreviations.items():
-            text = re.sub(pattern, replacement, text)
+        text = _COURT_GENITIVE_RE.sub(_replace_court_genitive, text)
         
-        # 2. Форматирование сокращений для Санкт-Петербурга и Ленинградской области
-        text = re.sub(r'\bСПб\b', 'г. Санкт-Петербурга', text)
-        text = re.sub(r'\bЛО\b', 'Ленинградской области', text)
+        # Базовые замены (для именительного падежа и оставшихся случаев),
+        # а также сокращения для Санкт-Петербурга и Ленинградской области
+        text = _COURT_ABBREVIATIONS_RE.sub(_replace_court_abbreviation, text)
         
         # 3. Форматирование статей УК РФ
-        # Находим все упоминания статей, частей, пунктов
-        text = re.sub(r'ст\.\s*(\d+)', r'статья \1', text)
-        text = re.sub(r'ст\s+(\d+)', r'статья \1', text)
-        text = re.sub(r'ч\.\s*(\d+)', r'часть \1', text)
-        text = re.sub(r'ч\s+(\d+)', r'часть \1', text)
-        text = re.sub(r'п\.\s*[«"]([а-яa-z]+)[»"]', r'пункт "\1"', text)
-        text = re.sub(r'п\s+[«"]([а-яa-z]+)[»"]', r'пункт "\1"', text)
-        
-        # 4. Стандартизация обозначения сроков
-        # Регулярные выражения для поиска сроков
-        time_patterns = [
-            # годы
-            (r'(\d+)\s*г\.?(?!\w)', r'\1 год'),
-            (r'(\d+)\s*г(?!\w)', r'\1 год'),
-            # месяцы
-            (r'(\d+)\s*м\.?(?!\w)', r'\1 месяц'),
-            (r'(\d+)\s*мес\.?(?!\w)', r'\1 месяц'),
-            # дни
-            (r'(\d+)\s*д\.?(?!\w)', r'\1 день'),
-            (r'(\d+)\s*дн\.?(?!\w)', r'\1 день'),
-        ]
-        
-        for pattern, replacement in time_patterns:
-            text = re.sub(pattern, replacement, text)
-        
-        # Корректируем окончания для сроков (1 год, 2 года, 5 лет)
-        def fix_time_units(match):
-            num = int(match.group(1))
-            if match.group(2) == 'год':
-                if num % 10 == 1 and num % 100 != 11:
-                    return f"{num} год"
-                elif 2 <= num % 10 <= 4 and (num % 100 < 10 or num % 100 >= 20):
-                    return f"{num} года"
-                else:
-                    return f"{num} лет"
-            elif match.group(2) == 'месяц':
-                if num % 10 == 1 and num % 100 != 11:
-                    return f"{num} месяц"
-                elif 2 <= num % 10 <= 4 and (num % 100 < 10 or num % 100 >= 20):
-                    return f"{num} месяца"
-                else:
-                    return f"{num} месяцев"
-            elif match.group(2) == 'день':
-                if num % 10 == 1 and num % 100 != 11:
-                    return f"{num} день"
-                elif 2 <= num % 10 <= 4 and (num % 100 < 10 or num % 100 >= 20):
-                    return f"{num} дня"
-                else:
-                    return f"{num} дней"
-            return match.group(0)
+        text = _COURT_ARTICLES_RE.sub(_replace_court_article, text)
         
-        text = re.sub(r'(\d+)\s+(год|месяц|день)', fix_time_units, text)
+        # 4. Стандартизация обозначения сроков вместе с согласованием окончаний
+        # (1 год, 2 года, 5 лет)
+        text = _COURT_TIME_UNITS_RE.sub(_replace_time_unit, text)
         
         # 5. Исправление форматирования постановлений и приговоров
-        text = re.sub(r'[пП]остан\.', 'Постановлением', text)
-        text = re.sub(r'[пП]ост\.', 'Постановлением', text)
-        text = re.sub(r'[пП]риг\.', 'Приговором', text)
-        text = re.sub(r'осужденн(?:ый|ая)?', 'Осужден(а)', text)
+        text = _COURT_DECISIONS_RE.sub(_replace_court_decision, text)
         
-        # 6. Общее форматирование
-        # Убираем множественные пробелы
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Добавляем пробелы после знаков препинания
-        text = re.sub(r'([.,;:])(?!\s)', r'\1 ', text)
-        
-        # Убираем пробелы перед знаками препинания
-        text = re.sub(r'\s+([.,;:])', r'\1', text)
+        # 6. Общее форматирование: множественные пробелы и пробелы
+        # вокруг знаков препинания
+        text = _COURT_SPACING_RE.sub(_replace_court_spacing, text)
         
         # 7. Добавляем точку в конце предложения, если ее нет
         if text and not text.endswith(('.', '!', '?')):
@@ -282,18 +1868,8 @@ class DocxToExcelProcessor:
         if text:
             text = text[0].upper() + text[1:]
         
-        # 9. Другие специфические замены
-        text = re.sub(r'(?<=\d)г(?=\.)(?!\s)', ' г.', text)  # 2022г. -> 2022 г.
-        text = re.sub(r'(?<=\d)м(?=\.)(?!\s)', ' м.', text)  # 6м. -> 6 м.
-        
-        # Заменяем "удерж." на "удержанием"
-        text = re.sub(r'(?:удерж\.|уд-м|удерж-м)', 'удержанием', text)
-        
-        # Заменяем "отбыв." на "отбыванием"
-        text = re.sub(r'отбыв\.', 'отбыванием', text)
-        
-        # Замена сокращения "принуд." на "принудительных"
-        text = re.sub(r'принуд\.', 'принудительных', text)
+        # 9. Другие специфические замены: 2022г. -> 2022 г., удерж. -> удержанием и т.д.
+        text = _COURT_FINAL_RE.sub(_replace_court_final, text)
         
         return text
     
@@ -314,27 +1890,40 @@ class DocxToExcelProcessor:
             if not value:
                 continue
                 
-            value_str = str(value).strip()
-            
-            # Извлекаем все даты из текста
-            dates = self._extract_all_dates_from_text(value_str)
-            
-            # Если даты найдены
-            if dates:
-                # Для каждой найденной даты
-                for date in dates:
-                    # Нормализуем дату
-                    normalized_date = self._parse_and_normalize_date(date)
-                    if normalized_date:
-                        # Заменяем исходную дату на нормализованную
-                        value_str = value_str.replace(date, normalized_date)
-                        normalized_count += 1
-                
+            text, dates_count = self._normalize_court_dates_value(value)
+            if dates_count:
                 # Обновляем значение ячейки
-                cell.value = value_str
+                cell.value = text
+                normalized_count += dates_count
         
         return normalized_count
     
+    def _normalize_court_dates_value(self, value):
+        """
+        Нормализует все даты в непустом значении ячейки с информацией о судах
+        
+        Возвращает (новый текст, количество нормализованных дат); если
+        дат нет, возвращает (None, 0)
+        """
+        value_str = str(value).strip()
+        
+        # Находим все даты в тексте вместе с их позициями
+        dates = self._find_dates(value_str)
+        if not dates:
+            return None, 0
+        
+        # Собираем текст заново за один проход, заменяя каждую
+        # найденную дату на нормализованную
+        parts = []
+        position = 0
+        for start, end, _, normalized_date in dates:
+            parts.append(value_str[position:start])
+            parts.append(normalized_date)
+            position = end
+        parts.append(value_str[position:])
+        
+        return "".join(parts), len(dates)
+    
     def _move_court_info(self, sheet, source_columns=(4, 5), target_column=9):
         """
         Проверяет столбцы source_columns на наличие информации о судах
@@ -344,23 +1933,6 @@ class DocxToExcelProcessor:
         """
         moved_count = 0
         
-        # Ключевые слова и паттерны для определения информации о судах
-        court_keywords = [
-            r'\d{2}\.\d{2}\.\d{4}.*?суд',        # Дата + суд
-            r'суд.*?по ст',                       # суд + статья
-            r'р/с',                               # районный суд (сокращение)
-            r'г/с',                               # городской суд (сокращение)
-            r'судом',                             # слово "судом"
-            r'осужденный',                        # слово "осужденный"
-            r'постановлением',                    # слово "постановлением"
-            r'УК РФ',                             # отсылка к УК РФ
-            r'л/св',                              # лишение свободы
-            r'ст\. \d{1,3}',                      # статья (например, "ст. 158")
-            r'ИС \d+ (год|г|лет)',                # испытательный срок
-            r'Мировым судьей',                    # Мировой судья
-            r'МССУ',                              # МССУ (мировой судебный участок)
-        ]
-        
         # Обрабатываем все строки в указанных столбцах
         for row in range(1, sheet.max_row + 1):
             for col_idx in source_columns:
@@ -373,17 +1945,8 @@ class DocxToExcelProcessor:
                     
                 value_str = str(value).strip()
                 
-                # Проверяем, содержит ли ячейка информацию о суде
-                is_court_info = False
-                
-                # Проверяем наличие ключевых слов/шаблонов
-                for pattern in court_keywords:
-                    if re.search(pattern, value_str, re.IGNORECASE):
-                        is_court_info = True
-                        break
-                
                 # Если нашли информацию о суде
-                if is_court_info:
+                if self._is_court_info_cached(value_str):
                     # Перемещаем информацию в целевой столбец
                     target_cell = sheet.cell(row=row, column=target_column)
                     
@@ -400,6 +1963,38 @@ class DocxToExcelProcessor:
         
         return moved_count
     
+    def _is_court_info_cached(self, text):
+        """_is_court_info с кэшированием результата для одинаковых текстов"""
+        return self._court_info_cache.get_or_compute(text, self._is_court_info, text)
+    
+    def _is_court_info(self, text):
+        """Проверяет наличие в тексте ключевых слов/шаблонов информации о суде"""
+        # Конец строки текста, в которой найдено последнее слово "суд", и
+        # позиция, с которой в этой строке еще не искали дату
+        line_end = -1
+        date_search_start = 0
+        for match in _COURT_KEYWORD_RE.finditer(text):
+            if match.group('court') is None:
+                return True
+            
+            court_start = match.start()
+            if court_start > line_end:
+                # Первое слово "суд" в строке: "по ст" после него ищется до
+                # конца строки, для следующих "суд" окно поиска только меньше
+                line_end = text.find('\n', court_start)
+                if line_end == -1:
+                    line_end = len(text)
+                if _COURT_ARTICLE_RE.search(text, match.end(), line_end):
+                    return True
+                date_search_start = text.rfind('\n', 0, court_start) + 1
+            
+            # Дата должна закончиться до слова "суд"; часть строки до
+            # предыдущего "суд" уже проверена, а дата не может его пересекать
+            if _COURT_DATE_RE.search(text, date_search_start, court_start):
+                return True
+            date_search_start = match.end()
+        return False
+    
     def _normalize_dates(self, sheet, column_index=1):
         """
         Нормализует даты в указанном столбце к формату ДД.ММ.ГГГГ
@@ -408,26 +2003,24 @@ class DocxToExcelProcessor:
         """
         normalized_count = 0
         
-        # Обрабатываем все ячейки в указанном столбце
-        for row in range(1, sheet.max_row + 1):
-            cell = sheet.cell(row=row, column=column_index)
-            value = cell.value
-            
-            # Пропускаем пустые ячейки
-            if not value:
-                continue
-                
-            value_str = str(value).strip()
-            
-            # Проверяем различные форматы дат и преобразуем их
-            normalized_date = self._parse_and_normalize_date(value_str)
-            
+        # Обрабатываем все ячейки в указанном столбце; пустые ячейки пропускаются
+        cells = [sheet.cell(row=row, column=column_index) for row in range(1, sheet.max_row + 1)]
+        dates = self._column_dates([cell.value for cell in cells], "normalize_dates",
+                                   self._normalize_date_value)
+        for cell, normalized_date in zip(cells, dates):
             if normalized_date:
                 cell.value = normalized_date
                 normalized_count += 1
         
         return normalized_count
     
+    def _normalize_date_value(self, value):
+        """Нормализованная дата для непустого значения ячейки или None"""
+        value_str = str(value).strip()
+        
+        # Проверяем различные форматы дат и преобразуем их
+        return self._parse_and_normalize_date(value_str)
+    
     def _normalize_birth_dates(self, sheet, column_index=3):
         """
         Нормализует даты рождения в указанном столбце к формату ДД.ММ.ГГГГ
@@ -437,29 +2030,35 @@ class DocxToExcelProcessor:
         """
         normalized_count = 0
         
-        # Обрабатываем все ячейки в указанном столбце
-        for row in range(1, sheet.max_row + 1):
-            cell = sheet.cell(row=row, column=column_index)
-            value = cell.value
-            
-            # Пропускаем пустые ячейки
-            if not value:
-                continue
-                
-            value_str = str(value).strip()
-            
-            # Извлекаем дату из текста, удаляя посторонние символы и тексты
-            date_only = self._extract_date_from_text(value_str)
-            
-            if date_only:
-                # Нормализуем извлеченную дату
-                normalized_date = self._parse_and_normalize_date(date_only)
-                if normalized_date:
-                    cell.value = normalized_date
-                    normalized_count += 1
+        # Обрабатываем все ячейки в указанном столбце; пустые ячейки пропускаются
+        cells = [sheet.cell(row=row, column=column_index) for row in range(1, sheet.max_row + 1)]
+        birth_dates = self._column_dates([cell.value for cell in cells], "first_dates",
+                                         self._normalize_birth_date_value)
+        for cell, birth_date in zip(cells, birth_dates):
+            if birth_date:
+                cell.value = birth_date
+                normalized_count += 1
         
         return normalized_count
     
+    def _normalize_birth_date_value(self, value):
+        """
+        Первая дата из непустого значения ячейки с датой рождения или None
+        
+        Первой считается самая левая дата текста любого формата; даты,
+        примыкающие к другим цифрам, не распознаются (см. _find_dates)
+        """
+        value_str = str(value).strip()
+        
+        # Извлекаем первую дату из текста, отбрасывая посторонние символы и тексты
+        dates = self._find_dates(value_str)
+        
+        if dates:
+            # Нормализованная дата уже получена при поиске
+            return dates[0][3]
+        
+        return None
+    
     def _process_end_dates(self, sheet, date_column_index=6, text_column_index=8):
         """
         Обрабатывает столбец с датами окончания срока.
@@ -472,79 +2071,124 @@ class DocxToExcelProcessor:
         normalized_count = 0
         moved_text_count = 0
         
-        # Обрабатываем все ячейки в указанном столбце
-        for row in range(1, sheet.max_row + 1):
-            cell = sheet.cell(row=row, column=date_column_index)
-            value = cell.value
-            
-            # Пропускаем пустые ячейки
-            if not value:
+        # Обрабатываем все ячейки в указанном столбце; пустые ячейки пропускаются
+        cells = [sheet.cell(row=row, column=date_column_index) for row in range(1, sheet.max_row + 1)]
+        results = self._column_dates([cell.value for cell in cells], "split_end_dates",
+                                     self._split_end_date_value)
+        for row, (cell, result) in enumerate(zip(cells, results), 1):
+            if result is None:
                 continue
-                
-            value_str = str(value).strip()
             
-            # Проверяем наличие двух дат или даты с текстом
-            dates = self._extract_all_dates_from_text(value_str)
+            end_date, moved_text = result
+            if moved_text:
+                # Перемещаем текст в указанный столбец
+                text_cell = sheet.cell(row=row, column=text_column_index)
+                text_cell.value = moved_text
+                moved_text_count += 1
             
-            if len(dates) == 2:
-                # Если нашли две даты, оставляем только вторую
-                second_date = dates[1]
-                normalized_date = self._parse_and_normalize_date(second_date)
-                if normalized_date:
-                    cell.value = normalized_date
-                    normalized_count += 1
-            elif len(dates) == 1:
-                # Нашли одну дату, нормализуем ее
-                date = dates[0]
-                normalized_date = self._parse_and_normalize_date(date)
-                
-                # Извлекаем текст, который следует за датой
-                text_after_date = value_str[value_str.find(date) + len(date):].strip()
-                
-                if text_after_date:
-                    # Перемещаем текст в указанный столбец
-                    text_cell = sheet.cell(row=row, column=text_column_index)
-                    text_cell.value = text_after_date
-                    moved_text_count += 1
-                
-                if normalized_date:
-                    cell.value = normalized_date
-                    normalized_count += 1
-            else:
-                # Если даты не нашли, но есть текст - перемещаем его
-                if value_str:
-                    text_cell = sheet.cell(row=row, column=text_column_index)
-                    text_cell.value = value_str
-                    cell.value = ""  # Очищаем исходную ячейку
-                    moved_text_count += 1
+            cell.value = end_date
+            if end_date:
+                normalized_count += 1
         
         return normalized_count, moved_text_count
     
-    def _extract_all_dates_from_text(self, text):
+    def _column_dates(self, values, vectorized_name, normalize_value):
         """
-        Извлекает все даты из текста в виде списка
+        Результаты правила дат для значений одного столбца: для непустых
+        значений - normalize_value(value), для пустых - None
         
-        Например, из "14.07.25 14.08.25" извлечет ["14.07.25", "14.08.25"]
+        Если даты обрабатываются целым столбцом (date_backend), результат
+        вычисляет функция vectorized_name модуля vectorized_dates
         """
-        # Шаблоны для поиска дат в тексте
-        date_patterns = [
-            r'\d{1,2}\.\d{1,2}\.\d{2,4}',  # ДД.ММ.ГГ или ДД.ММ.ГГГГ
-            r'\d{1,2}/\d{1,2}/\d{2,4}',    # ДД/ММ/ГГ или ДД/ММ/ГГГГ
-            r'\d{1,2}-\d{1,2}-\d{2,4}',    # ДД-ММ-ГГ или ДД-ММ-ГГГГ
-            r'\d{2}\d{2}\.\d{2}',          # ДДММ.ГГ
-            r'\d{8}'                       # ДДММГГГГ
-        ]
+        if not self._vectorize_dates(len(values)):
+            return [normalize_value(value) if value else None for value in values]
+        
+        import vectorized_dates
+        
+        vectorized = getattr(vectorized_dates, vectorized_name)
+        return vectorized(values, _DATE_TOKEN_RE.pattern, datetime.now().year)
+    
+    def _vectorize_dates(self, row_count):
+        """Обрабатывать ли столбец дат из row_count строк целиком средствами pandas"""
+        if self.date_backend == "pandas":
+            return True
+        return (self.date_backend == "auto" and PANDAS_AVAILABLE
+                and row_count >= VECTORIZED_DATES_MIN_ROWS)
+    
+    def _split_end_date_value(self, value):
+        """
+        Разбирает непустое значение ячейки с датой окончания срока
+        
+        Возвращает (новое значение ячейки, текст для переноса или None);
+        новое значение - нормализованная дата или "", если даты нет.
+        Если ячейку менять не нужно, возвращает None
+        """
+        value_str = str(value).strip()
+        
+        # Проверяем наличие двух дат или даты с текстом; повторы одной
+        # и той же даты не считаются, остается первое вхождение
+        dates = self._find_distinct_dates(value_str)
+        
+        if len(dates) == 2:
+            # Если нашли две даты, оставляем только вторую
+            return dates[1][3], None
+        
+        if len(dates) == 1:
+            # Нашли одну дату, нормализуем ее
+            _, end, _, normalized_date = dates[0]
+            
+            # Извлекаем текст, который следует за датой
+            text_after_date = value_str[end:].strip()
+            
+            return normalized_date, text_after_date or None
+        
+        # Если даты не нашли, но есть текст - перемещаем его,
+        # а исходную ячейку очищаем
+        if value_str:
+            return "", value_str
         
-        # Список для найденных дат
-        found_dates = []
+        return None
+    
+    def _find_dates(self, text):
+        """
+        Находит все даты в тексте за один проход слева направо
         
-        # Ищем все даты в тексте по шаблонам
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text)
-            found_dates.extend(matches)
+        Возвращает список кортежей (начало, конец, исходный текст даты,
+        дата в формате ДД.ММ.ГГГГ) в порядке следования в тексте.
+        Найденные даты не пересекаются и не бывают частью более длинной
+        последовательности цифр.
+        """
+        # Двузначный год раскрывается относительно текущего года, поэтому
+        # год входит в ключ кэша: после смены года значения вычисляются заново
+        current_year = datetime.now().year
+        return self._date_cache.get_or_compute(
+            (current_year, text), self._scan_dates, text, current_year
+        )
+    
+    def _find_distinct_dates(self, text):
+        """
+        Даты текста как в _find_dates, но без повторов: из одинаковых по
+        тексту дат остается первое вхождение
+        """
+        distinct = {}
+        for span in self._find_dates(text):
+            distinct.setdefault(span[2], span)
+        return list(distinct.values())
+    
+    def _scan_dates(self, text, current_year):
+        """Поиск дат для _find_dates без использования кэша"""
+        return [
+            (match.start(), match.end(), match.group(0), self._normalize_date_match(match, current_year))
+            for match in _DATE_TOKEN_RE.finditer(text)
+        ]
+    
+    def _extract_all_dates_from_text(self, text):
+        """
+        Извлекает все даты из текста в виде списка
         
-        # Удаляем возможные дубликаты
-        return list(dict.fromkeys(found_dates))
+        Например, из "14.07.25 14.08.25" извлечет ["14.07.25", "14.08.25"]
+        """
+        return [date for _, _, date, _ in self._find_distinct_dates(text)]
         
     def _extract_date_from_text(self, text):
         """
@@ -552,20 +2196,9 @@ class DocxToExcelProcessor:
         
         Возвращает только дату, если она найдена, иначе None
         """
-        # Шаблоны для поиска даты в тексте
-        date_patterns = [
-            r'(\d{1,2}\.\d{1,2}\.\d{2,4})',  # ДД.ММ.ГГ или ДД.ММ.ГГГГ
-            r'(\d{1,2}/\d{1,2}/\d{2,4})',    # ДД/ММ/ГГ или ДД/ММ/ГГГГ
-            r'(\d{1,2}-\d{1,2}-\d{2,4})',    # ДД-ММ-ГГ или ДД-ММ-ГГГГ
-            r'(\d{2}\d{2}\.\d{2})',          # ДДММ.ГГ
-            r'(\d{8})'                       # ДДММГГГГ
-        ]
-        
-        # Ищем первую дату в тексте по шаблонам
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
+        match = _DATE_TOKEN_RE.search(text)
+        if match:
+            return match.group(0)
         
         return None
     
@@ -581,72 +2214,42 @@ class DocxToExcelProcessor:
         - ДД-ММ-ГГ -> ДД.ММ.ГГГГ
         - ДДММГГГГ -> ДД.ММ.ГГГГ (без разделителей)
         """
-        # Проверяем различные форматы даты
-        
-        # Формат ДД.ММ.ГГ (двузначный год)
-        match = re.match(r'^(\d{1,2})\.(\d{1,2})\.(\d{2})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            full_year = self._expand_year(year)
-            return f"{int(day):02d}.{int(month):02d}.{full_year}"
-        
-        # Формат ДД.ММ.ГГГГ (четырехзначный год)
-        match = re.match(r'^(\d{1,2})\.(\d{1,2})\.(\d{4})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            return f"{int(day):02d}.{int(month):02d}.{year}"
-        
-        # Формат ДДММ.ГГ (пропущена точка между днем и месяцем)
-        match = re.match(r'^(\d{2})(\d{2})\.(\d{2})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            full_year = self._expand_year(year)
-            return f"{int(day):02d}.{int(month):02d}.{full_year}"
-        
-        # Формат ДДММГГГГ (без разделителей)
-        match = re.match(r'^(\d{2})(\d{2})(\d{4})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            return f"{int(day):02d}.{int(month):02d}.{year}"
-        
-        # Формат ДД/ММ/ГГ
-        match = re.match(r'^(\d{1,2})/(\d{1,2})/(\d{2})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            full_year = self._expand_year(year)
-            return f"{int(day):02d}.{int(month):02d}.{full_year}"
-        
-        # Формат ДД/ММ/ГГГГ
-        match = re.match(r'^(\d{1,2})/(\d{1,2})/(\d{4})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            return f"{int(day):02d}.{int(month):02d}.{year}"
-        
-        # Формат ДД-ММ-ГГ
-        match = re.match(r'^(\d{1,2})-(\d{1,2})-(\d{2})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            full_year = self._expand_year(year)
-            return f"{int(day):02d}.{int(month):02d}.{full_year}"
-        
-        # Формат ДД-ММ-ГГГГ
-        match = re.match(r'^(\d{1,2})-(\d{1,2})-(\d{4})$', date_str)
-        if match:
-            day, month, year = match.groups()
-            return f"{int(day):02d}.{int(month):02d}.{year}"
+        # Строка должна целиком состоять из одной даты
+        dates = self._find_dates(date_str)
+        if len(dates) == 1 and dates[0][0] == 0 and dates[0][1] == len(date_str):
+            return dates[0][3]
         
         # Если ни один из форматов не подошел, возвращаем None
         return None
     
-    def _expand_year(self, year_str):
+    def _normalize_date_match(self, match, current_year=None):
+        """Приводит дату, найденную _DATE_TOKEN_RE, к формату ДД.ММ.ГГГГ"""
+        if match.group(1) is not None:
+            # ДД.ММ.ГГ(ГГ), ДД/ММ/ГГ(ГГ), ДД-ММ-ГГ(ГГ)
+            day, month, year = match.group(1, 3, 4)
+        elif match.group(5) is not None:
+            # ДДММ.ГГ
+            day, month, year = match.group(5, 6, 7)
+        else:
+            # ДДММГГГГ
+            day, month, year = match.group(8, 9, 10)
+        
+        if len(year) == 2:
+            year = self._expand_year(year, current_year)
+        
+        return f"{int(day):02d}.{int(month):02d}.{year}"
+    
+    def _expand_year(self, year_str, current_year=None):
         """
         Преобразует двузначный год в четырехзначный
         Правило: 00-25 -> 2000-2025, 26-99 -> 1926-1999
+        (порог - текущий год, его можно передать в current_year)
         """
         year = int(year_str)
         
         # Определяем текущий год для расчета порога преобразования
-        current_year = datetime.now().year
+        if current_year is None:
+            current_year = datetime.now().year
         current_short_year = current_year % 100
         
         if year <= current_short_year:
@@ -664,31 +2267,33 @@ class DocxToExcelProcessor:
         # Преобразуем значение в строку и удаляем пробелы
         value_str = str(value).strip()
         
-        # Шаблоны для проверки дат в различных форматах
-        date_patterns = [
-            r'^\d{1,2}\.\d{1,2}\.\d{2,4}',  # ДД.ММ.ГГ или ДД.ММ.ГГГГ
-            r'^\d{1,2}/\d{1,2}/\d{2,4}',    # ДД/ММ/ГГ или ДД/ММ/ГГГГ
-            r'^\d{1,2}-\d{1,2}-\d{2,4}',    # ДД-ММ-ГГ или ДД-ММ-ГГГГ
-            r'^\d{2}\d{2}\.\d{2}',          # ДДММ.ГГ (пропущена точка между днем и месяцем)
-            r'^\d{8}'                       # ДДММГГГГ (без разделителей)
-        ]
-        
-        for pattern in date_patterns:
-            if re.match(pattern, value_str):
-                return True
-                
-        return False
+        # Значение должно начинаться с даты в одном из поддерживаемых форматов
+        return _DATE_START_RE.match(value_str) is not None
     
     def _adjust_column_width(self, sheet):
-        """Автоподбор ширины столбцов"""
-        for column_cells in sheet.columns:
-            max_length = 0
-            column = column_cells[0].column_letter
-            for cell in column_cells:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            sheet.column_dimensions[column].width = adjusted_width
+        """Автоподбор ширины столбцов по значениям уже заполненного листа"""
+        width_tracker = self._create_width_tracker()
+        for row in sheet.iter_rows(values_only=True):
+            width_tracker.add_row(row)
+        self._set_column_widths(sheet, width_tracker.widths())
+    
+    def _create_width_tracker(self):
+        return ColumnWidthTracker(self.column_width_limit, self.column_width_sample)
+    
+    def _set_column_widths(self, sheet, widths):
+        for column, width in widths.items():
+            sheet.column_dimensions[column].width = width
+
+
+# Процессор рабочего процесса для параллельной обработки таблиц
+_table_worker_processor = None
+
+
+def _init_table_worker(options):
+    global _table_worker_processor
+    # Кэши преобразований сохраняются между таблицами рабочего процесса
+    _table_worker_processor = DocxToExcelProcessor(share_cache=True, **options)
+
+
+def _process_table_in_worker(rows):
+    return _table_worker_processor._process_table_rows(rows)
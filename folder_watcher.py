@@ -0,0 +1,278 @@
+"""
+Наблюдение за каталогом: новые и измененные DOCX файлы конвертируются автоматически
+
+Запуск - через docx_to_excel_cli:
+    python -m docx_to_excel_cli watch <каталог_docx> <каталог_xlsx> [--jobs N] [--interval СЕКУНДЫ]
+        [--settle СЕКУНДЫ]
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from docx_to_excel_cli import _init_worker, convert_file, output_path_for
+
+# События inotify, после которых каталог просматривается сразу
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_INOTIFY_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+class FolderWatcher:
+    """
+    Конвертация DOCX файлов, появляющихся в каталоге input_dir.
+
+    Каталог просматривается каждые interval секунд; в Linux уведомления
+    inotify будят просмотр сразу после изменения файлов, в остальных
+    системах используется только опрос. Файл ставится в очередь, когда
+    его размер и время изменения не менялись settle секунд (файл дописан),
+    и если он новый или изменился после прошлой конвертации. Временные
+    файлы Word (~$...) пропускаются. Файлы, для которых в output_dir уже
+    есть более новый результат, при запуске не обрабатываются повторно.
+
+    Файлы обрабатываются в пуле из jobs процессов (docx_to_excel_cli.convert_file:
+    результат пишется во временный файл и переименовывается). В очереди
+    на обработку ждут не больше queue_size файлов сверх выполняемых,
+    остальные остаются в каталоге до следующего просмотра. По каждому
+    файлу выводятся время обработки, задержка от появления файла до
+    результата и глубина очереди.
+
+    Обработанным считается только успешно сконвертированный файл. Файл
+    с ошибкой ставится в очередь снова, но не больше retries раз, пока
+    он не изменится. Если рабочий процесс аварийно завершился (пул
+    сломан, BrokenProcessPool), пул создается заново, а выполнявшиеся
+    в нем файлы возвращаются в начало очереди.
+
+    worker_options - аргументы docx_to_excel_cli._init_worker
+    """
+
+    def __init__(self, input_dir, output_dir, jobs=1, interval=2.0, settle=2.0, timeout=None,
+                 output_format="xlsx", queue_size=100, retries=2, worker_options=(), stream=sys.stdout):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.jobs = max(jobs, 1)
+        self.interval = interval
+        self.settle = settle
+        self.timeout = timeout
+        self.output_format = output_format
+        self.queue_size = queue_size
+        self.retries = retries
+        self.worker_options = worker_options
+        self.stream = stream
+        # Наблюдаемые файлы: путь -> (размер и время изменения, с какого момента не меняются)
+        self._seen = {}
+        # Размер и время изменения, с которыми файл был обработан последним
+        self._done = {}
+        # Неудачные попытки: путь -> (размер и время изменения, число попыток)
+        self._failed = {}
+        # Файлы, ожидающие обработки: (путь, размер и время изменения, время появления)
+        self._queue = deque()
+        # Выполняемые задания: future -> (путь, размер и время изменения, время появления)
+        self._running = {}
+        self._executor = None
+        self._inotify = None
+
+    def run(self, stop=None):
+        """
+        Наблюдает за каталогом до KeyboardInterrupt или до stop()
+
+        stop - функция без аргументов; наблюдение завершается, когда она
+        возвращает True (после завершения выполняемых заданий)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._inotify = _open_inotify(self.input_dir)
+        self._log(f"Наблюдение за {self.input_dir}: процессов {self.jobs}, "
+                  f"{'inotify' if self._inotify is not None else 'опрос'} каждые {self.interval:g} с")
+        self._mark_converted()
+
+        self._executor = self._create_executor()
+        try:
+            while stop is None or not stop():
+                self._scan(time.monotonic())
+                self._submit()
+                self._wait()
+                self._collect()
+            while self._running:
+                self._wait()
+                self._collect()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            if self._inotify is not None:
+                os.close(self._inotify)
+                self._inotify = None
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                   initargs=tuple(self.worker_options))
+
+    def _restart_executor(self, error):
+        """Создает пул заново после BrokenProcessPool и возвращает выполнявшиеся файлы в очередь"""
+        self._log(f"Пул процессов остановлен ({type(error).__name__}: {error}), "
+                  f"перезапуск; выполнялось файлов: {len(self._running)}")
+        running = list(self._running.values())
+        self._running.clear()
+        for path, signature, since in reversed(running):
+            if self._add_failure(path, signature):
+                self._queue.appendleft((path, signature, since))
+            else:
+                self._log(f"ОШИБКА {os.path.basename(path)}: рабочий процесс завершился аварийно")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+
+    def _add_failure(self, path, signature):
+        """Учитывает неудачную попытку; возвращает True, если файл можно обработать снова"""
+        failed = self._failed.get(path)
+        attempts = failed[1] + 1 if failed is not None and failed[0] == signature else 1
+        self._failed[path] = (signature, attempts)
+        return attempts <= self.retries
+
+    def _mark_converted(self):
+        """Файлы, результат которых новее самого файла, считаются обработанными"""
+        for path, signature in self._list_files():
+            output_path = output_path_for(path, self.output_dir, self.output_format)
+            try:
+                converted = os.stat(output_path).st_mtime_ns >= signature[1]
+            except OSError:
+                converted = False
+            if converted:
+                self._done[path] = signature
+
+    def _list_files(self):
+        """DOCX файлы каталога: (путь, (размер, время изменения))"""
+        try:
+            entries = list(os.scandir(self.input_dir))
+        except OSError as e:
+            self._log(f"Каталог недоступен: {e}")
+            return
+        for entry in entries:
+            if not entry.name.lower().endswith(".docx") or entry.name.startswith("~$"):
+                continue
+            try:
+                status = entry.stat()
+            except OSError:
+                # Файл удален или переименован во время просмотра
+                continue
+            if entry.is_file():
+                yield entry.path, (status.st_size, status.st_mtime_ns)
+
+    def _scan(self, now):
+        """Ставит в очередь дописанные новые и измененные файлы"""
+        seen = {}
+        waiting = {path for path, _, _ in self._queue}
+        waiting.update(path for path, _, _ in self._running.values())
+
+        for path, signature in self._list_files():
+            previous = self._seen.get(path)
+            since = previous[1] if previous is not None and previous[0] == signature else now
+            seen[path] = (signature, since)
+
+            if path in waiting or self._done.get(path) == signature:
+                continue
+            failed = self._failed.get(path)
+            if failed is not None and failed[0] == signature and failed[1] > self.retries:
+                continue
+            if now - since < self.settle or len(self._queue) >= self.queue_size:
+                continue
+            self._queue.append((path, signature, since))
+            waiting.add(path)
+
+        self._seen = seen
+
+    def _submit(self):
+        """Передает файлы из очереди свободным рабочим процессам"""
+        while self._queue and len(self._running) < self.jobs:
+            path, signature, since = self._queue.popleft()
+            try:
+                future = self._executor.submit(
+                    convert_file, path, output_path_for(path, self.output_dir, self.output_format),
+                    self.timeout,
+                )
+            except BrokenProcessPool as e:
+                # Остальные файлы передаются новому пулу в следующем цикле
+                self._queue.appendleft((path, signature, since))
+                self._restart_executor(e)
+                return
+            self._running[future] = (path, signature, since)
+
+    def _wait(self):
+        """Ждет завершения задания, изменения в каталоге или следующего просмотра"""
+        if self._inotify is not None:
+            # Завершение заданий проверяется чаще, чем просматривается каталог
+            timeout = min(self.interval, 0.2) if self._running else self.interval
+            readable, _, _ = select.select([self._inotify], [], [], timeout)
+            if readable:
+                _drain(self._inotify)
+        elif self._running:
+            wait(list(self._running), timeout=self.interval, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(self.interval)
+
+    def _collect(self):
+        """Обрабатывает завершенные задания"""
+        broken = None
+        for future in [future for future in self._running if future.done()]:
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                # Файлы сломанного пула возвращаются в очередь в _restart_executor
+                broken = error
+                continue
+            path, signature, since = self._running.pop(future)
+            if error is None:
+                result = future.result()
+            else:
+                result = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+
+            depth = len(self._queue) + len(self._running)
+            name = os.path.basename(path)
+            if result["ok"]:
+                # Файл, измененный во время обработки, будет поставлен в очередь снова
+                self._done[path] = signature
+                self._failed.pop(path, None)
+                self._log(f"Готово {name}: таблиц {result['tables']}, "
+                          f"обработка {result['seconds']:.2f} с, "
+                          f"задержка {time.monotonic() - since:.2f} с, очередь {depth}")
+            else:
+                retry = self._add_failure(path, signature)
+                self._log(f"ОШИБКА {name}: {result['error']}, очередь {depth}"
+                          f"{', будет повторена' if retry else ''}")
+
+        if broken is not None:
+            self._restart_executor(broken)
+
+    def _log(self, message):
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", file=self.stream, flush=True)
+
+
+def _open_inotify(directory):
+    """Дескриптор inotify для каталога или None, если inotify недоступен"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), _INOTIFY_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _drain(fd):
+    """Читает накопившиеся события inotify: важен только сам факт изменения"""
+    while True:
+        try:
+            if not os.read(fd, 65536):
+                return
+        except BlockingIOError:
+            return
@@ -0,0 +1,317 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+# Столбцы обработанной строки (после удаления столбцов A и C), из
+# которых составляется ключ записи
+PERSON_COLUMN = 1
+BIRTH_DATE_COLUMN = 2
+END_DATE_COLUMN = 5
+
+# Имя листа сводной книги
+MASTER_SHEET_TITLE = "Реестр"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    person_key TEXT NOT NULL,
+    birth_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    row_values TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    source TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    PRIMARY KEY (person_key, birth_date, end_date)
+);
+CREATE INDEX IF NOT EXISTS records_revision ON records (revision);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS masters (
+    path TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+class RecordIndex:
+    """
+    Постоянный индекс записей обработанных обзоров в базе SQLite.
+
+    Запись - обработанная строка таблицы с заполненным столбцом лица.
+    Ключ записи - лицо (текст без учета регистра, лишних пробелов и
+    различия е/ё), нормализованная дата рождения и дата окончания.
+    add_rows добавляет новые записи, обновляет измененные (тот же ключ,
+    другие значения) и только отмечает повторы; каждая проверка - поиск
+    по первичному ключу. Каждое добавление или изменение получает номер
+    ревизии, поэтому сводную книгу можно обновлять по записям,
+    измененным после известной ревизии (iter_records(since=...)).
+
+    Пример:
+        with RecordIndex("реестр.sqlite") as index:
+            counts = index.add_rows(rows, source="обзор.docx", sheet="Таблица_1")
+            index.write_master_workbook("реестр.xlsx")
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Несколько процессов пакетной обработки могут писать в одну базу:
+        # запись ждет освобождения блокировки до timeout секунд.
+        # Транзакции открываются и завершаются явно (isolation_level=None)
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_rows(self, rows, source, sheet):
+        """
+        Добавляет строки одной таблицы в индекс одной транзакцией
+
+        Возвращает счетчики {"added", "changed", "duplicate"}
+        """
+        entries = [entry for entry in map(prepare_row, rows) if entry is not None]
+        return self.add_tables([(sheet, entries)], source)
+
+    def add_tables(self, tables, source):
+        """
+        Добавляет записи всех таблиц одного файла одной транзакцией
+
+        tables - пары (имя листа, записи prepare_row). Записи готовятся
+        заранее, пока строки записываются в книгу, а добавляются после
+        того, как книга записана: если запись книги не удалась, индекс
+        не меняется. Возвращает счетчики {"added", "changed", "duplicate"}
+        """
+        counts = {"added": 0, "changed": 0, "duplicate": 0}
+        now = datetime.now().isoformat(timespec="seconds")
+        cursor = self._connection.cursor()
+        # BEGIN IMMEDIATE сразу берет блокировку записи: номер ревизии
+        # читается и увеличивается внутри той же транзакции
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            revision = self._revision(cursor)
+            for sheet, entries in tables:
+                for key, values, row_hash in entries:
+                    existing = cursor.execute(
+                        "SELECT row_hash FROM records "
+                        "WHERE person_key = ? AND birth_date = ? AND end_date = ?",
+                        key,
+                    ).fetchone()
+                    if existing is None:
+                        revision += 1
+                        cursor.execute(
+                            "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (*key, values, row_hash, source, sheet, now, now, revision),
+                        )
+                        counts["added"] += 1
+                    elif existing[0] != row_hash:
+                        revision += 1
+                        cursor.execute(
+                            "UPDATE records SET row_values = ?, row_hash = ?, source = ?, sheet = ?, "
+                            "updated = ?, revision = ? "
+                            "WHERE person_key = ? AND birth_date = ? AND end_date = ?",
+                            (values, row_hash, source, sheet, now, revision, *key),
+                        )
+                        counts["changed"] += 1
+                    else:
+                        counts["duplicate"] += 1
+
+            cursor.execute("INSERT OR REPLACE INTO meta VALUES ('revision', ?)", (revision,))
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        return counts
+
+    def revision(self):
+        """Номер последней ревизии (0 - записей еще не было)"""
+        return self._revision(self._connection.cursor())
+
+    def info(self):
+        """Число записей и номер последней ревизии"""
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM records").fetchone()
+        return {"records": count, "revision": self.revision()}
+
+    def iter_records(self, since=0):
+        """
+        Записи с ревизией больше since в порядке лица и дат
+
+        Каждая запись - словарь с ключами key, source, sheet, values,
+        first_seen, updated и revision
+        """
+        query = self._connection.execute(
+            "SELECT person_key, birth_date, end_date, source, sheet, row_values, first_seen, "
+            "updated, revision FROM records "
+            "WHERE revision > ? ORDER BY person_key, birth_date, end_date",
+            (since,),
+        )
+        for person_key, birth_date, end_date, source, sheet, values, first_seen, updated, revision in query:
+            yield {
+                "key": (person_key, birth_date, end_date),
+                "source": source,
+                "sheet": sheet,
+                "values": json.loads(values),
+                "first_seen": first_seen,
+                "updated": updated,
+                "revision": revision,
+            }
+
+    def write_master_workbook(self, excel_path, full=False):
+        """
+        Записывает записи индекса в сводную книгу Excel
+
+        Первые столбцы - файл и лист, из которых запись попала в индекс
+        последней, далее значения строки; записи упорядочены по ключу.
+
+        Ревизия, по которую записана книга, запоминается в индексе. При
+        следующем вызове книга не строится из всех записей: ее строки
+        объединяются с записями, добавленными или измененными после этой
+        ревизии (iter_records(since=...)), а если таких записей нет, книга
+        не перезаписывается. Книга строится заново при full=True, а также
+        если ее нет или она изменена после записи. Возвращает число
+        записей в книге.
+        """
+        from xlsx_stream_writer import XlsxStreamWriter
+
+        path = os.path.abspath(excel_path)
+        revision = self.revision()
+        master = None if full else self._master_state(path)
+        if master is not None and master["revision"] == revision:
+            return master["records"]
+
+        changed = (
+            (record["key"], [os.path.basename(record["source"]), record["sheet"], *record["values"]])
+            for record in self.iter_records(since=master["revision"] if master is not None else 0)
+        )
+        count = 0
+        temp_path = f"{excel_path}.tmp"
+        try:
+            with XlsxStreamWriter(temp_path) as writer:
+                sheet = writer.add_sheet(MASTER_SHEET_TITLE)
+                if master is not None:
+                    rows = _merge_master_rows(_read_master_rows(excel_path), changed)
+                else:
+                    rows = (row for _, row in changed)
+                for row in rows:
+                    sheet.append(row)
+                    count += 1
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        os.replace(temp_path, excel_path)
+
+        status = os.stat(path)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO masters VALUES (?, ?, ?, ?, ?)",
+            (path, revision, count, status.st_size, status.st_mtime_ns),
+        )
+        return count
+
+    def _master_state(self, path):
+        """Ревизия и число записей сводной книги, если она не менялась после записи"""
+        row = self._connection.execute(
+            "SELECT revision, records, size, mtime_ns FROM masters WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            status = os.stat(path)
+        except OSError:
+            return None
+        if (status.st_size, status.st_mtime_ns) != (row[2], row[3]):
+            return None
+        return {"revision": row[0], "records": row[1]}
+
+    def _revision(self, cursor):
+        row = cursor.execute("SELECT value FROM meta WHERE name = 'revision'").fetchone()
+        return row[0] if row else 0
+
+
+def prepare_row(row):
+    """
+    Запись индекса для обработанной строки: (ключ, значения в JSON, хэш
+    значений) или None, если в строке не заполнен столбец лица
+    """
+    key = record_key(row)
+    if key is None:
+        return None
+    values = json.dumps(_values(row), ensure_ascii=False)
+    return key, values, hashlib.sha256(values.encode("utf-8")).hexdigest()
+
+
+def _read_master_rows(excel_path):
+    """Строки сводной книги с ключами записей: пары (ключ, строка)"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(excel_path, read_only=True)
+    try:
+        for row in workbook[MASTER_SHEET_TITLE].iter_rows(values_only=True):
+            row = list(row)
+            while row and row[-1] is None:
+                row.pop()
+            yield record_key(row[2:]), row
+    finally:
+        workbook.close()
+
+
+def _merge_master_rows(rows, changed):
+    """
+    Объединяет строки сводной книги с измененными записями; оба источника
+    упорядочены по ключу, запись заменяет строку книги с тем же ключом
+    """
+    rows = iter(rows)
+    current = next(rows, None)
+    for key, row in changed:
+        while current is not None and current[0] < key:
+            yield current[1]
+            current = next(rows, None)
+        if current is not None and current[0] == key:
+            current = next(rows, None)
+        yield row
+    while current is not None:
+        yield current[1]
+        current = next(rows, None)
+
+
+def record_key(row):
+    """
+    Ключ записи (лицо, дата рождения, дата окончания) или None, если
+    в строке не заполнен столбец лица
+    """
+    person = _cell_text(row, PERSON_COLUMN)
+    person_key = _SPACES_RE.sub(" ", person).strip().casefold().replace("ё", "е")
+    if not person_key:
+        return None
+    return person_key, _cell_text(row, BIRTH_DATE_COLUMN).strip(), _cell_text(row, END_DATE_COLUMN).strip()
+
+
+def _cell_text(row, index):
+    if index >= len(row) or row[index] is None:
+        return ""
+    return str(row[index])
+
+
+def _values(row):
+    """Значения строки для хранения: пустые ячейки - None, остальные - текст"""
+    values = [None if value is None or value == "" else str(value) for value in row]
+    while values and values[-1] is None:
+        values.pop()
+    return values
@@ -0,0 +1,194 @@
+import abc
+import csv
+import importlib.util
+import json
+import os
+
+# Parquet доступен только с установленным pyarrow; сам pyarrow
+# загружается при создании ParquetStreamWriter
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Число строк, накапливаемых перед записью группы строк Parquet
+PARQUET_BATCH_ROWS = 10000
+
+
+class RowStreamWriter(abc.ABC):
+    """
+    Потоковая запись обработанных строк таблиц в один файл без книги Excel.
+
+    Интерфейс совпадает с xlsx_stream_writer.XlsxStreamWriter: add_sheet
+    начинает следующую таблицу, append листа дописывает строку. Каждая
+    строка сразу уходит в файл вместе с номером таблицы и номером строки
+    в таблице (с 1). Номер таблицы передается в add_sheet (позиция
+    таблицы в DOCX, которая при отборе таблиц не совпадает с порядковым
+    номером); без него таблицы нумеруются по порядку с 1. При ошибке
+    внутри with недописанный файл удаляется.
+
+    Пример:
+        with CsvStreamWriter("out.csv") as writer:
+            sheet = writer.add_sheet("Таблица_1", 1)
+            sheet.append(["a", "b"])
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._table_count = 0
+        self._closed = False
+
+    def add_sheet(self, title, table=None):
+        """Начинает новую таблицу; table - номер таблицы в документе"""
+        self._table_count += 1
+        if table is None:
+            table = self._table_count
+        return _RowSheet(self, table, title)
+
+    def close(self):
+        """Дописывает и закрывает файл; повторный вызов ничего не делает"""
+        if self._closed:
+            return
+        self._closed = True
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif not self._closed:
+            self._closed = True
+            self._discard()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    @abc.abstractmethod
+    def _write_row(self, table, title, row_number, values):
+        """Записывает одну строку таблицы"""
+
+    @abc.abstractmethod
+    def _close(self):
+        """Дописывает и закрывает файл"""
+
+    def _discard(self):
+        """Освобождает ресурсы без дозаписи файла"""
+        self._close()
+
+
+class CsvStreamWriter(RowStreamWriter):
+    """
+    CSV в кодировке UTF-8 с BOM, чтобы Excel открывал файл с кириллицей.
+
+    Первый столбец - номер таблицы, далее значения ячеек строки; пустые
+    ячейки записываются пустыми строками.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._stream = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._stream)
+
+    def _write_row(self, table, title, row_number, values):
+        self._writer.writerow([table] + ["" if value is None else value for value in values])
+
+    def _close(self):
+        self._stream.close()
+
+
+class JsonLinesStreamWriter(RowStreamWriter):
+    """
+    JSON Lines: по объекту на строку таблицы
+
+        {"table": 1, "sheet": "Таблица_1", "row": 1, "values": ["...", null]}
+
+    Пустые ячейки (None и пустые строки, как и в XLSX) записываются
+    как null, значения, которых нет в JSON
+    (например, даты из листа Excel), - строками.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._stream = open(path, "w", encoding="utf-8")
+
+    def _write_row(self, table, title, row_number, values):
+        values = [None if value == "" else value for value in values]
+        record = {"table": table, "sheet": title, "row": row_number, "values": values}
+        self._stream.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._stream.write("\n")
+
+    def _close(self):
+        self._stream.close()
+
+
+class ParquetStreamWriter(RowStreamWriter):
+    """
+    Parquet со столбцами table, sheet, row и values (список строк).
+
+    Число столбцов таблиц заранее неизвестно и может различаться, поэтому
+    значения строки хранятся одним списком; пустые ячейки записываются
+    как null, остальные значения приводятся к строкам. Строки
+    записываются группами по PARQUET_BATCH_ROWS. Требует pyarrow.
+    """
+
+    def __init__(self, path):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Для записи в формате Parquet требуется пакет pyarrow")
+        import pyarrow
+        import pyarrow.parquet
+
+        super().__init__(path)
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([
+            ("table", pyarrow.int32()),
+            ("sheet", pyarrow.string()),
+            ("row", pyarrow.int32()),
+            ("values", pyarrow.list_(pyarrow.string())),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        self._batch = {name: [] for name in self._schema.names}
+
+    def _write_row(self, table, title, row_number, values):
+        batch = self._batch
+        batch["table"].append(table)
+        batch["sheet"].append(title)
+        batch["row"].append(row_number)
+        batch["values"].append([
+            None if value is None or value == "" else str(value) for value in values
+        ])
+        if len(batch["row"]) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._batch["row"]:
+            table = self._pyarrow.Table.from_pydict(self._batch, schema=self._schema)
+            self._writer.write_table(table)
+            self._batch = {name: [] for name in self._schema.names}
+
+    def _close(self):
+        self._flush()
+        self._writer.close()
+
+    def _discard(self):
+        self._writer.close()
+
+
+class _RowSheet:
+    """Таблица файла RowStreamWriter, строки которой пишутся по мере поступления"""
+
+    def __init__(self, writer, table, title):
+        self._writer = writer
+        self._table = table
+        self._title = title
+        self._row_count = 0
+
+    def append(self, values):
+        """Дописывает строку значений; None означает пустую ячейку"""
+        self._row_count += 1
+        self._writer._write_row(self._table, self._title, self._row_count, values)
+
+
+# Классы записи по форматам вывода, кроме XLSX
+ROW_STREAM_WRITERS = {
+    "csv": CsvStreamWriter,
+    "jsonl": JsonLinesStreamWriter,
+    "parquet": ParquetStreamWriter,
+}
@@ -1,12 +1,24 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
+import queue
 import subprocess
 import platform
-from docx_to_excel_logic import DocxToExcelProcessor
+import threading
+from docx_to_excel_logic import CancellationToken, ConversionCancelled, DocxToExcelProcessor, warm_up
+
+# Как часто (мс) окно забирает сообщения рабочего потока
+POLL_INTERVAL_MS = 100
+
+# Названия этапов обработки для строки хода выполнения
+STAGE_NAMES = {
+    "read": "чтение",
+    "process": "обработка",
+    "write": "запись",
+}
 
 class SimpleDocxToExcelApp:
-    def __init__(self, root):
+    def __init__(self, root, preload=True):
         self.root = root
         self.root.title("Таблицы из DOCX в Excel")
         self.root.geometry("600x600")
@@ -16,10 +28,23 @@ class SimpleDocxToExcelApp:
         self.excel_path = None
         
         # Создаем экземпляр процессора для обработки файлов
-        self.processor = DocxToExcelProcessor()
+        # Кэши преобразований сохраняются между файлами, обработанными за сессию
+        self.processor = DocxToExcelProcessor(share_cache=True)
+        
+        # Обработка выполняется в рабочем потоке; он передает события
+        # в очередь, которую окно читает через root.after
+        self.worker = None
+        self.cancel_token = None
+        self.events = queue.Queue()
         
         # Создание интерфейса
         self.create_gui()
+        
+        # python-docx и openpyxl загружаются при первой обработке; чтобы
+        # она не ждала загрузки, после появления окна библиотеки
+        # загружаются в фоновом потоке
+        if preload:
+            self.root.after_idle(self.start_preload)
     
     def create_gui(self):
         """Создание простого интерфейса"""
@@ -61,22 +86,50 @@ class SimpleDocxToExcelApp:
         
         self.update_status("Выберите DOCX файл для начала обработки.")
         
+        # Ход обработки
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.pack(fill=tk.X, pady=5)
+        
+        self.progress_var = tk.DoubleVar(value=0)
+        self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var, maximum=100)
+        self.progress_bar.pack(fill=tk.X)
+        
+        self.progress_label_var = tk.StringVar()
+        progress_label = ttk.Label(progress_frame, textvariable=self.progress_label_var)
+        progress_label.pack(anchor=tk.W)
+        
         # Фрейм для кнопок
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=10)
         
         # Кнопка обработки
-        process_button = ttk.Button(
+        self.process_button = ttk.Button(
             button_frame, 
             text="Обработать (конвертировать + удалить столбцы A и C)", 
             command=self.process_file
         )
-        process_button.pack(side=tk.LEFT, padx=5)
+        self.process_button.pack(side=tk.LEFT, padx=5)
+        
+        # Кнопка отмены обработки
+        self.cancel_button = ttk.Button(button_frame, text="Отмена", command=self.cancel_processing,
+                                        state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
         
         # Кнопка выхода
         exit_button = ttk.Button(button_frame, text="Выход", command=self.root.destroy)
         exit_button.pack(side=tk.RIGHT, padx=5)
     
+    def start_preload(self):
+        """Фоновая загрузка библиотек обработки"""
+        threading.Thread(target=self.preload, daemon=True).start()
+    
+    def preload(self):
+        """Выполняется в фоновом потоке; ошибка загрузки проявится при обработке файла"""
+        try:
+            warm_up()
+        except Exception:
+            pass
+    
     def update_status(self, message):
         """Обновление статуса в текстовом поле"""
         self.status_text.config(state=tk.NORMAL)
@@ -108,55 +161,145 @@ class SimpleDocxToExcelApp:
             messagebox.showerror("Ошибка", "Сначала выберите DOCX файл")
             return
         
+        if self.worker is not None:
+            return
+        
+        self.update_status("Обработка файла...\nИзвлечение и обработка таблиц из DOCX...\n\nПравила обработки:\n"
+                           "- Все таблицы из Word перенесутся в Excel\n"
+                           "- Первая строка удаляется, если во второй ячейке НЕТ даты\n"
+                           "- Первая строка сохраняется, если во второй ячейке ЕСТЬ дата\n"
+                           "- Столбцы A и C будут удалены\n"
+                           "- Даты во втором столбце будут приведены к формату ДД.ММ.ГГГГ\n"
+                           "- Даты рождения в пятом столбце будут приведены к формату ДД.ММ.ГГГГ\n"
+                           "- Даты окончания в восьмом столбце будут приведены к формату ДД.ММ.ГГГГ\n"
+                           "- Информация о судах из столбцов D и E (бывшие F и G) будет перемещена в столбец I (бывший K)\n"
+                           "- Все даты в столбце I будут отформатированы в виде ДД.ММ.ГГГГ\n"
+                           "- Текст с информацией о судах будет отформатирован для улучшения читаемости")
+        
+        self.progress_var.set(0)
+        self.progress_label_var.set("")
+        self.process_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        
+        # Запускаем обработку в рабочем потоке, чтобы окно не зависало
+        self.cancel_token = CancellationToken()
+        self.worker = threading.Thread(
+            target=self.run_processing,
+            args=(self.docx_path, self.excel_path, self.cancel_token),
+            daemon=True,
+        )
+        self.worker.start()
+        self.root.after(POLL_INTERVAL_MS, self.poll_events)
+    
+    def cancel_processing(self):
+        """Запрос отмены текущей обработки"""
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.progress_label_var.set("Отмена...")
+    
+    def run_processing(self, docx_path, excel_path, cancel_token):
+        """
+        Выполняется в рабочем потоке: к виджетам Tk отсюда обращаться нельзя,
+        поэтому ход и результат обработки передаются через очередь событий
+        """
+        result = None
         try:
-            self.update_status("Обработка файла...\nШаг 1: Извлечение таблиц из DOCX...\n\nПравила обработки:\n"
-                               "- Все таблицы из Word перенесутся в Excel\n"
-                               "- Первая строка удаляется, если во второй ячейке НЕТ даты\n"
-                               "- Первая строка сохраняется, если во второй ячейке ЕСТЬ дата\n"
-                               "- Столбцы A и C будут удалены\n"
-                               "- Даты во втором столбце будут приведены к формату ДД.ММ.ГГГГ\n"
-                               "- Даты рождения в пятом столбце будут приведены к формату ДД.ММ.ГГГГ\n"
-                               "- Даты окончания в восьмом столбце будут приведены к формату ДД.ММ.ГГГГ\n"
-                               "- Информация о судах из столбцов D и E (бывшие F и G) будет перемещена в столбец I (бывший K)\n"
-                               "- Все даты в столбце I будут отформатированы в виде ДД.ММ.ГГГГ\n"
-                               "- Текст с информацией о судах будет отформатирован для улучшения читаемости")
+            # Извлечение таблиц и их обработка в памяти с однократной записью Excel
+            table_count, stats = self.processor.convert_and_process(
+                docx_path, excel_path,
+                progress=lambda event: self.events.put(("progress", event)),
+                cancel_token=cancel_token,
+            )
+            result = ("finished", (excel_path, table_count, stats))
+        except ConversionCancelled:
+            result = ("cancelled", None)
+        except Exception as e:
+            result = ("error", e)
+        finally:
+            # Событие завершения отправляется, даже если поток прерван другим
+            # исключением (BaseException): иначе окно осталось бы в состоянии
+            # обработки с активной кнопкой отмены
+            if result is None:
+                result = ("error", "обработка прервана")
+            self.events.put(result)
+    
+    def poll_events(self):
+        """Забирает события рабочего потока в основном потоке окна"""
+        last_progress = None
+        while True:
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
             
-            # Шаг 1: Извлечение таблиц из DOCX в Excel
-            table_count = self.processor.convert_docx_to_excel(self.docx_path, self.excel_path)
+            if kind == "progress":
+                # Промежуточные события обработки можно пропустить,
+                # показываем только последнее
+                last_progress = payload
+                continue
             
-            if table_count > 0:
-                self.update_status(f"Шаг 1: Таблицы успешно извлечены ({table_count} шт.)\n\n"
-                                   f"Шаг 2: Удаление первых строк и столбцов A и C, нормализация дат, "
-                                   f"форматирование информации о судах...")
-                
-                # Шаг 2: Обработка файла Excel
-                stats = self.processor.process_excel_file(self.excel_path)
-                
-                # Финальное сообщение
-                self.update_status(
-                    f"Обработка успешно завершена!\n\n"
-                    f"- Извлечено таблиц: {table_count}\n"
-                    f"- Обработано листов: {stats['sheets_processed']}\n"
-                    f"- Удалено первых строк: {stats['rows_deleted']}\n"
-                    f"- Нормализовано дат: {stats['total_dates_normalized']}\n"
-                    f"- Перемещено текстовых блоков: {stats['text_moved']}\n"
-                    f"- Перемещено записей о судах: {stats['court_info_moved']}\n"
-                    f"- Отформатировано записей о судах: {stats['formatted_cells']}\n"
-                    f"- Удалены столбцы: A и C\n\n"
-                    f"Результат сохранен в: {self.excel_path}"
-                )
-                
-                # Открываем Excel-файл
-                self.open_file(self.excel_path)
-                
-                messagebox.showinfo("Успех", f"Обработка завершена. Таблицы сохранены в {self.excel_path}")
+            self.finish_processing()
+            if kind == "finished":
+                self.show_result(*payload)
+            elif kind == "cancelled":
+                self.update_status("Обработка отменена.")
+                messagebox.showinfo("Отмена", "Обработка отменена")
             else:
-                self.update_status("В документе не найдено таблиц.")
-                messagebox.showwarning("Предупреждение", "В документе не найдено таблиц")
+                self.update_status(f"Произошла ошибка при обработке файла:\n{str(payload)}")
+                messagebox.showerror("Ошибка", f"Произошла ошибка: {str(payload)}")
+            return
         
-        except Exception as e:
-            self.update_status(f"Произошла ошибка при обработке файла:\n{str(e)}")
-            messagebox.showerror("Ошибка", f"Произошла ошибка: {str(e)}")
+        if last_progress is not None:
+            self.show_progress(last_progress)
+        self.root.after(POLL_INTERVAL_MS, self.poll_events)
+    
+    def show_progress(self, event):
+        """Отображение хода обработки"""
+        if event.stage not in STAGE_NAMES or self.cancel_token.cancelled:
+            return
+        
+        text = f"Таблица {event.table}: {STAGE_NAMES[event.stage]}"
+        if event.rows_total:
+            self.progress_var.set(100 * event.rows_done / event.rows_total)
+            text += f", строк {event.rows_done} из {event.rows_total}"
+        else:
+            self.progress_var.set(0)
+        self.progress_label_var.set(text)
+    
+    def finish_processing(self):
+        """Возвращает кнопки в исходное состояние после завершения рабочего потока"""
+        self.worker = None
+        self.cancel_token = None
+        self.progress_var.set(0)
+        self.progress_label_var.set("")
+        self.process_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+    
+    def show_result(self, excel_path, table_count, stats):
+        """Отображение результата обработки"""
+        if table_count > 0:
+            # Финальное сообщение
+            self.update_status(
+                f"Обработка успешно завершена!\n\n"
+                f"- Извлечено таблиц: {table_count}\n"
+                f"- Обработано листов: {stats['sheets_processed']}\n"
+                f"- Удалено первых строк: {stats['rows_deleted']}\n"
+                f"- Нормализовано дат: {stats['total_dates_normalized']}\n"
+                f"- Перемещено текстовых блоков: {stats['text_moved']}\n"
+                f"- Перемещено записей о судах: {stats['court_info_moved']}\n"
+                f"- Отформатировано записей о судах: {stats['formatted_cells']}\n"
+                f"- Удалены столбцы: A и C\n\n"
+                f"Результат сохранен в: {excel_path}"
+            )
+            
+            # Открываем Excel-файл
+            self.open_file(excel_path)
+            
+            messagebox.showinfo("Успех", f"Обработка завершена. Таблицы сохранены в {excel_path}")
+        else:
+            self.update_status("В документе не найдено таблиц.")
+            messagebox.showwarning("Предупреждение", "В документе не найдено таблиц")
     
     def open_file(self, file_path):
         """Открытие файла в соответствующем приложении"""
@@ -0,0 +1,115 @@
+import re
+
+# Причины пропуска таблицы; в статистике обработки - счетчики
+# tables_skipped_<причина>
+SKIP_REASONS = ("position", "columns", "header")
+
+# Число первых строк таблицы, по которым принимается решение
+DEFAULT_HEADER_ROWS = 2
+
+
+class TableFilter:
+    """
+    Отбор таблиц DOCX для обработки по их первым строкам.
+
+    Обзор кроме таблиц с записями может содержать таблицы титульного
+    листа, подписей и разметки страницы; к ним правила обработки
+    неприменимы. Решение принимается по номеру таблицы в документе и
+    первым header_rows строкам, поэтому остальные строки пропущенной
+    таблицы не разбираются и не записываются.
+
+    positions - номера таблиц в документе (с 1), которые обрабатываются;
+        None - все. Таблицы после последнего номера не читаются вовсе
+    min_columns, max_columns - допустимое число столбцов (самая длинная
+        из первых строк); None - без ограничения
+    keep_headers - регулярные выражения: таблица обрабатывается, только
+        если текст первых строк совпадает хотя бы с одним из них
+    skip_headers - регулярные выражения: таблица пропускается, если текст
+        первых строк совпадает с одним из них
+    Регистр букв в выражениях не учитывается. Текст первых строк - тексты
+    ячеек через пробел, строки разделены переводом строки.
+
+    Пример:
+        TableFilter(min_columns=8, skip_headers=[r"утверждаю", r"подпись"])
+    """
+
+    def __init__(self, positions=None, min_columns=None, max_columns=None, keep_headers=(),
+                 skip_headers=(), header_rows=DEFAULT_HEADER_ROWS):
+        if header_rows < 1:
+            raise ValueError("Решение о таблице принимается хотя бы по одной строке")
+        self.positions = frozenset(positions) if positions is not None else None
+        self.min_columns = min_columns
+        self.max_columns = max_columns
+        self.keep_headers = [re.compile(pattern, re.IGNORECASE) for pattern in keep_headers]
+        self.skip_headers = [re.compile(pattern, re.IGNORECASE) for pattern in skip_headers]
+        self.header_rows = header_rows
+
+    @property
+    def last_position(self):
+        """Номер последней обрабатываемой таблицы или None, если номера не ограничены"""
+        return max(self.positions, default=0) if self.positions is not None else None
+
+    def check(self, position, header_rows):
+        """
+        Решение о таблице с номером position (с 1) по ее первым строкам
+
+        Возвращает None, если таблица обрабатывается, иначе причину
+        пропуска из SKIP_REASONS
+        """
+        if self.positions is not None and position not in self.positions:
+            return "position"
+
+        column_count = max((len(row) for row in header_rows), default=0)
+        if self.min_columns is not None and column_count < self.min_columns:
+            return "columns"
+        if self.max_columns is not None and column_count > self.max_columns:
+            return "columns"
+
+        if self.keep_headers or self.skip_headers:
+            text = _header_text(header_rows)
+            if any(pattern.search(text) for pattern in self.skip_headers):
+                return "header"
+            if self.keep_headers and not any(pattern.search(text) for pattern in self.keep_headers):
+                return "header"
+
+        return None
+
+    def signature(self):
+        """Параметры отбора для ключей дискового кэша конвертации"""
+        return [
+            sorted(self.positions) if self.positions is not None else None,
+            self.min_columns,
+            self.max_columns,
+            [pattern.pattern for pattern in self.keep_headers],
+            [pattern.pattern for pattern in self.skip_headers],
+            self.header_rows,
+        ]
+
+
+def parse_positions(text):
+    """
+    Номера таблиц из строки вида "1,3-5"
+
+    Возвращает множество номеров; ValueError - если строка некорректна
+    """
+    positions = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        start = int(first)
+        stop = int(last) if dash else start
+        if start < 1 or stop < start:
+            raise ValueError(f"Некорректные номера таблиц: {part}")
+        positions.update(range(start, stop + 1))
+    if not positions:
+        raise ValueError("Не указаны номера таблиц")
+    return positions
+
+
+def _header_text(rows):
+    return "\n".join(
+        " ".join(str(value) for value in row if value is not None and value != "")
+        for row in rows
+    )
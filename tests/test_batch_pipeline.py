@@ -0,0 +1,102 @@
+import os
+import zipfile
+
+import openpyxl
+import pytest
+
+import batch_pipeline
+from benchmark import generate_docx
+from docx_to_excel_cli import run_batch
+from record_index import RecordIndex
+
+# Текст документа, на котором рабочий процесс завершается аварийно
+_CRASH_MARKER = "Обзор с аварийным завершением"
+
+_process_document = batch_pipeline._process_document
+
+
+def _crash_on_marker(document):
+    if _CRASH_MARKER.encode("utf-8") in document:
+        os._exit(1)
+    return _process_document(document)
+
+
+def _write_crash_docx(source, path):
+    with zipfile.ZipFile(source) as archive:
+        parts = {name: archive.read(name) for name in archive.namelist()}
+    parts["word/document.xml"] = parts["word/document.xml"].replace(
+        "Обзор".encode("utf-8"), _CRASH_MARKER.encode("utf-8"), 1
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in parts.items():
+            archive.writestr(name, data)
+
+
+def test_pipeline_survives_dead_worker(tmp_path, monkeypatch):
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for seed in range(1, 5):
+        generate_docx(str(input_dir / f"{seed}.docx"), rows=20, tables=2, seed=seed)
+    _write_crash_docx(str(input_dir / "1.docx"), str(input_dir / "3a.docx"))
+    # Рабочие процессы создаются fork и получают подмененную функцию
+    monkeypatch.setattr(batch_pipeline, "_process_document", _crash_on_marker)
+
+    summary = batch_pipeline.run_pipeline(str(input_dir), str(tmp_path / "out"), jobs=1)
+
+    assert summary["files_total"] == 5
+    assert summary["files_failed"] == 1
+    failed = [result for result in summary["results"] if not result["ok"]]
+    assert failed[0]["input"].endswith("3a.docx")
+    assert "BrokenProcessPool" in failed[0]["error"]
+    assert sorted(os.listdir(tmp_path / "out")) == ["1.xlsx", "2.xlsx", "3.xlsx", "4.xlsx"]
+
+
+def _read_workbook(excel_path):
+    workbook = openpyxl.load_workbook(excel_path)
+    try:
+        return {
+            sheet.title: (
+                [list(row) for row in sheet.iter_rows(values_only=True)],
+                {letter: dimension.width for letter, dimension in sheet.column_dimensions.items()},
+            )
+            for sheet in workbook.worksheets
+        }
+    finally:
+        workbook.close()
+
+
+def _read_index(index_path):
+    with RecordIndex(index_path) as index:
+        return [(record["key"], record["source"], record["sheet"], record["values"])
+                for record in index.iter_records()]
+
+
+@pytest.fixture
+def documents(tmp_path):
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for seed in range(1, 4):
+        generate_docx(str(input_dir / f"{seed}.docx"), rows=60, tables=3, seed=seed)
+    # Файл, который не удается прочитать
+    (input_dir / "broken.docx").write_bytes(b"not a zip archive")
+    return str(input_dir)
+
+
+def test_pipeline_matches_batch(documents, tmp_path):
+    batch_dir, pipeline_dir = str(tmp_path / "batch"), str(tmp_path / "pipeline")
+    batch_index, pipeline_index = str(tmp_path / "batch.sqlite"), str(tmp_path / "pipeline.sqlite")
+    batch = run_batch(documents, batch_dir, jobs=1, index_path=batch_index)
+    pipeline = batch_pipeline.run_pipeline(documents, pipeline_dir, jobs=1,
+                                           index_path=pipeline_index)
+
+    for key in ("files_total", "files_succeeded", "files_failed", "stats"):
+        assert pipeline[key] == batch[key]
+    assert batch["files_failed"] == 1 and batch["stats"]["records_added"]
+    assert [(result["input"], result["ok"], result.get("tables")) for result in pipeline["results"]] == \
+        [(result["input"], result["ok"], result.get("tables")) for result in batch["results"]]
+
+    assert sorted(os.listdir(pipeline_dir)) == sorted(os.listdir(batch_dir))
+    for name in os.listdir(batch_dir):
+        assert _read_workbook(os.path.join(pipeline_dir, name)) == \
+            _read_workbook(os.path.join(batch_dir, name))
+    assert _read_index(pipeline_index) == _read_index(batch_index)
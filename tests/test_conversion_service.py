@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import conversion_service
+from conversion_service import ConversionService, _percentile
+
+
+async def _exchange(service, request):
+    """Отправляет запрос обработчику сервиса; возвращает (код ответа, заголовки, тело)"""
+    server = await asyncio.start_server(service._handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in header_lines)
+    return int(status_line.split()[1]), headers, body
+
+
+def _post(body, headers=None):
+    lines = ["POST /convert HTTP/1.1"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    service = ConversionService(workers=1, queue_size=1)
+    service._active = service.capacity
+
+    status, headers, _ = asyncio.run(_exchange(service, _post(b"docx", {"Content-Length": 4})))
+
+    assert status == 503 and headers["Retry-After"] == "1"
+    assert service.metrics()["rejected"] == 1 and service.metrics()["accepted"] == 0
+
+
+def test_upload_size_is_checked_before_reading():
+    service = ConversionService(max_upload_size=3)
+
+    status, _, _ = asyncio.run(_exchange(service, _post(b"docx", {"Content-Length": 4})))
+    assert status == 413
+    status, _, _ = asyncio.run(_exchange(service, _post(b"docx")))
+    assert status == 411
+    assert service.metrics()["accepted"] == 0
+
+
+def test_temporary_file_error_is_answered(monkeypatch):
+    def fail(path, data):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(conversion_service, "_write_file", fail)
+    service = ConversionService()
+
+    status, _, body = asyncio.run(_exchange(service, _post(b"docx", {"Content-Length": 4})))
+
+    assert status == 500 and b"OSError" in body
+    assert service.metrics()["failed"] == 1 and service._active == 0
+
+
+class _Executor:
+    def __init__(self):
+        self.closed = False
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.closed = True
+
+
+def test_broken_executor_is_replaced_once(monkeypatch):
+    service = ConversionService()
+    broken, replacement = _Executor(), _Executor()
+    executors = iter([replacement])
+    monkeypatch.setattr(service, "_create_executor", lambda: next(executors))
+    service._executor = broken
+
+    # Все задания сломанного пула сообщают о сбое, но пул заменяется один раз
+    service._replace_broken_executor(broken)
+    service._replace_broken_executor(broken)
+
+    assert broken.closed and service._executor is replacement and not replacement.closed
+
+
+@pytest.mark.parametrize("values, percent, expected", [
+    ([], 50, None),
+    ([1.0], 99, 1.0),
+    ([1.0, 2.0, 3.0, 4.0], 50, 2.0),
+    ([1.0, 2.0, 3.0, 4.0], 90, 4.0),
+    ([float(value) for value in range(1, 101)], 99, 99.0),
+])
+def test_percentile(values, percent, expected):
+    assert _percentile(values, percent) == expected
@@ -0,0 +1,79 @@
+import random
+import re
+
+import pytest
+
+from docx_to_excel_logic import DocxToExcelProcessor
+
+# Признаки информации о судах до перехода на одно выражение _COURT_KEYWORD_RE
+_OLD_COURT_INFO_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'\d{2}\.\d{2}\.\d{4}.*?суд',
+        r'суд.*?по ст',
+        r'р/с',
+        r'г/с',
+        r'судом',
+        r'осужденный',
+        r'постановлением',
+        r'УК РФ',
+        r'л/св',
+        r'ст\. \d{1,3}',
+        r'ИС \d+ (год|г|лет)',
+        r'Мировым судьей',
+        r'МССУ',
+    )
+]
+
+# Фрагменты для случайных текстов: признаки, их части и варианты регистра
+_FRAGMENTS = [
+    "суд", "СУД", "Суд", "судом", "по ст", "ПО СТ", "по", "ст", ". ", "ст. 1", "ст.",
+    "12.03.2020", "1.2.2020", "12.03.20", "12", "03", ".", "2020", "\n", " ",
+    "р/с", "Р/С", "г/с", "л/св", "Л/СВ", "УК РФ", "ук рф", "ИС 2 г", "ис 3 лет", "ИС ", "ИС 5 ",
+    "год", "осужденный", "ОСУЖДЕННЫЙ", "постановлением", "Мировым судьей", "мировым СУДЬЕЙ",
+    "МССУ", "мссу", "а", "x", "5", "/", "с", "у", "д", "л", "г", "р", "ᲃ", "１２",
+]
+
+
+def _old_is_court_info(text):
+    return any(pattern.search(text) for pattern in _OLD_COURT_INFO_PATTERNS)
+
+
+@pytest.fixture(scope="module")
+def processor():
+    return DocxToExcelProcessor(cache_size=0)
+
+
+@pytest.mark.parametrize("text", [
+    "Приговором Ленинского р/с г. Омска от 12.03.2020 по ст. 158 ч.2 УК РФ 2 г. л/св",
+    "Осужден 12.03.2020 Кировским районным судом",
+    "12.03.2020 Кировский районный суд",
+    "12.03.2020\nКировский районный суд",
+    "суд по ст. 228",
+    "суд\nпо ст. 228",
+    "по ст суд",
+    "суд суд 12.03.2020 суд",
+    "12.03.20 суд",
+    "постановлением мирового судьи",
+    "Мировым судьей судебного участка № 5",
+    "МССУ № 12",
+    "осужденный",
+    "ст. 1234",
+    "ст.158",
+    "ИС 2 года",
+    "ИС 3 лет",
+    "ИС 2",
+    "СУД ПО СТ",
+    "ᲃ",
+    "",
+    "Проживает по адресу: г. Омск, ул. Ленина, 5",
+])
+def test_is_court_info_matches_old_patterns(processor, text):
+    assert processor._is_court_info(text) == _old_is_court_info(text)
+
+
+def test_is_court_info_matches_old_patterns_on_random_texts(processor):
+    generator = random.Random(0)
+    for _ in range(20000):
+        text = "".join(generator.choice(_FRAGMENTS) for _ in range(generator.randint(0, 12)))
+        assert processor._is_court_info(text) == _old_is_court_info(text), text
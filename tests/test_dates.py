@@ -0,0 +1,115 @@
+import re
+from collections import Counter
+
+import pytest
+
+import vectorized_dates
+from docx_to_excel_logic import _DATE_TOKEN_RE, DocxToExcelProcessor, _ColumnTable
+
+
+@pytest.fixture
+def processor():
+    return DocxToExcelProcessor(cache_size=0)
+
+
+_END_DATE_CASES = [
+    # Повтор одной даты - это одна дата; текст после первого вхождения переносится
+    ("01.02.2020 01.02.2020 освоб.", ("01.02.2020", "01.02.2020 освоб.")),
+    ("01.02.2020 01.02.2020", ("01.02.2020", "01.02.2020")),
+    ("01.02.20 01.02.20 01.03.20", ("01.03.2020", None)),
+    ("01.02.20 01.03.20 01.02.20", ("01.03.2020", None)),
+    ("01.02.20 01.03.20", ("01.03.2020", None)),
+    ("01.02.20 01.03.20 01.04.20", ("", "01.02.20 01.03.20 01.04.20")),
+    ("01.02.20 освоб.", ("01.02.2020", "освоб.")),
+    ("освоб.", ("", "освоб.")),
+    ("  ", None),
+]
+
+
+@pytest.mark.parametrize("value, expected", _END_DATE_CASES)
+def test_split_end_date_value(processor, value, expected):
+    assert processor._split_end_date_value(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", _END_DATE_CASES)
+def test_split_end_dates_vectorized(value, expected):
+    pytest.importorskip("pandas")
+    assert vectorized_dates.split_end_dates([value], _DATE_TOKEN_RE.pattern, 2020) == [expected]
+
+
+def test_repeated_end_date_moves_trailing_text(processor):
+    sheet = _ColumnTable([[None] * 5 + ["01.02.2020 01.02.2020 освоб."]])
+
+    assert processor._process_end_dates(sheet, 6, 8) == (1, 1)
+    assert sheet.cell(row=1, column=6).value == "01.02.2020"
+    assert sheet.cell(row=1, column=8).value == "01.02.2020 освоб."
+
+
+def test_repeated_end_date_in_fused_row(processor):
+    values = [None] * 5 + ["01.02.2020 01.02.2020 освоб."]
+    stats = Counter()
+
+    processor._process_row(values, stats)
+
+    assert values[5] == "01.02.2020"
+    assert values[7] == "01.02.2020 освоб."
+    assert stats["text_moved"] == 1
+
+
+
+# Отличия от поиска дат до перехода на _DATE_TOKEN_RE: прежде
+# выбиралась дата первого по приоритету формата (ДД.ММ.ГГГГ раньше
+# ДД/ММ/ГГГГ), а дата могла примыкать к другим цифрам ("123.05.1985" давало
+# 23.05.1985). Теперь первая дата - самая левая в тексте, а даты внутри
+# более длинных последовательностей цифр не распознаются.
+_BIRTH_DATE_CASES = [
+    ("01/02/1990 03.04.1985", "01.02.1990"),
+    ("1205.85 01.01.1990", "12.05.1985"),
+    ("123.05.1985", None),
+    ("12.05.19851", None),
+    ("№123.05.1985 г.р.", None),
+    ("12.05.1985 г.р.", "12.05.1985"),
+]
+
+
+@pytest.mark.parametrize("value, expected", _BIRTH_DATE_CASES)
+def test_birth_date_is_leftmost_standalone_date(processor, value, expected):
+    assert processor._normalize_birth_date_value(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", _BIRTH_DATE_CASES)
+def test_birth_date_vectorized(value, expected):
+    pytest.importorskip("pandas")
+    assert vectorized_dates.first_dates([value], _DATE_TOKEN_RE.pattern, 2020) == [expected]
+
+
+@pytest.mark.parametrize("value", ["123.05.1985", "12.05.19851"])
+def test_end_date_touching_digits_is_text(processor, value):
+    assert processor._split_end_date_value(value) == ("", value)
+
+# Проверка первой строки таблицы до перехода на _DATE_TOKEN_RE
+_OLD_IS_DATE_PATTERNS = [
+    r'^\d{1,2}\.\d{1,2}\.\d{2,4}',
+    r'^\d{1,2}/\d{1,2}/\d{2,4}',
+    r'^\d{1,2}-\d{1,2}-\d{2,4}',
+    r'^\d{2}\d{2}\.\d{2}',
+    r'^\d{8}',
+]
+
+
+def _old_is_date(value):
+    if not value:
+        return False
+    value_str = str(value).strip()
+    return any(re.match(pattern, value_str) for pattern in _OLD_IS_DATE_PATTERNS)
+
+
+@pytest.mark.parametrize("value", [
+    "12.05.2020", "12.05.20", "1.5.20", "12/05/2020", "12-05-20", "1205.20", "12052020",
+    # Неполный год и длинные последовательности цифр - тоже даты
+    "12.05.202", "12.05.20201", "123456789", "1205.201", "12.05.20 г.", " 12.05.20 ",
+    "12.05/20", "12.5.2", "1205.2", "1205202", "Дата", "№ 12.05.20", "", None, 0, 12052020,
+    "١٢.٠٥.٢٠",
+])
+def test_is_date_matches_old_patterns(processor, value):
+    assert processor._is_date(value) == _old_is_date(value)
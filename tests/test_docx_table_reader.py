@@ -0,0 +1,66 @@
+import docx
+import pytest
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from docx_table_reader import iter_docx_tables
+
+
+def _write_merged_docx(path):
+    """Документ с горизонтальными и вертикальными объединениями и w:gridBefore"""
+    document = docx.Document()
+    document.add_paragraph("Обзор")
+    table = document.add_table(rows=5, cols=5)
+    for row_index, row in enumerate(table.rows):
+        for column_index, cell in enumerate(row.cells):
+            cell.text = f"{row_index + 1}.{column_index + 1}"
+    table.cell(0, 0).add_paragraph("второй абзац")
+
+    # По горизонтали, по вертикали и прямоугольником
+    table.cell(0, 1).merge(table.cell(0, 2))
+    table.cell(1, 0).merge(table.cell(3, 0))
+    table.cell(1, 3).merge(table.cell(2, 4))
+
+    # Последняя строка начинается со второго столбца сетки
+    tr = table.rows[4]._tr
+    tr.remove(tr.tc_lst[0])
+    tr_pr = tr.get_or_add_trPr()
+    grid_before = OxmlElement("w:gridBefore")
+    grid_before.set(qn("w:val"), "1")
+    tr_pr.insert(0, grid_before)
+
+    document.add_paragraph("Подпись")
+    second = document.add_table(rows=2, cols=2)
+    second.cell(0, 0).merge(second.cell(1, 1))
+    second.cell(0, 0).text = "все"
+    document.save(path)
+
+
+def _docx_rows(table, merged_cells):
+    """Тексты ячеек строк таблицы по python-docx"""
+    rows = []
+    for row in table.rows:
+        texts = []
+        previous = None
+        for cell in row.cells:
+            # Для "first" текст остается только в первой ячейке сетки каждого
+            # элемента w:tc этой строки
+            first = cell._tc is not previous and cell._tc.getparent() is row._tr
+            texts.append(cell.text if merged_cells == "repeat" or first else "")
+            previous = cell._tc
+        rows.append(texts)
+    return rows
+
+
+@pytest.mark.parametrize("merged_cells", ["repeat", "first"])
+def test_stream_reader_matches_python_docx(tmp_path, merged_cells):
+    path = str(tmp_path / "merged.docx")
+    _write_merged_docx(path)
+
+    expected = [_docx_rows(table, merged_cells) for table in docx.Document(path).tables]
+    actual = [list(rows) for rows in iter_docx_tables(path, merged_cells)]
+
+    assert actual == expected
+    # Объединения действительно есть в документе
+    assert expected[0][2][0] == (expected[0][1][0] if merged_cells == "repeat" else "")
+    assert len(expected[0][4]) == 4
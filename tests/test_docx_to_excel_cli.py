@@ -0,0 +1,67 @@
+import os
+import random
+import zipfile
+
+import docx_to_excel_cli
+from benchmark import _row_xml, generate_docx, generate_row
+from docx_to_excel_cli import run_batch
+
+_convert_file = docx_to_excel_cli.convert_file
+
+
+def _append_row_to_last_table(path):
+    with zipfile.ZipFile(path) as archive:
+        parts = {name: archive.read(name) for name in archive.namelist()}
+    document = parts["word/document.xml"]
+    row = _row_xml(generate_row(random.Random(0), 1000)).encode("utf-8")
+    end = document.rindex(b"</w:tbl>")
+    parts["word/document.xml"] = document[:end] + row + document[end:]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in parts.items():
+            archive.writestr(name, data)
+
+
+def test_cached_rows_are_excluded_from_throughput(tmp_path):
+    input_dir, output_dir, cache_dir = tmp_path / "in", str(tmp_path / "out"), str(tmp_path / "cache")
+    input_dir.mkdir()
+    docx_path = str(input_dir / "1.docx")
+    generate_docx(docx_path, rows=30, tables=3)
+
+    first = run_batch(str(input_dir), output_dir, cache_dir=cache_dir)
+    assert first["rows_cached"] == 0
+
+    # Файл целиком из кэша
+    unchanged = run_batch(str(input_dir), output_dir, cache_dir=cache_dir)
+    assert unchanged["rows_cached"] == unchanged["stats"]["rows_processed"]
+    assert unchanged["rows_per_second"] == 0
+
+    # Изменилась только последняя таблица: первые две берутся из кэша таблиц
+    _append_row_to_last_table(docx_path)
+    changed = run_batch(str(input_dir), output_dir, cache_dir=cache_dir)
+    assert changed["stats"]["tables_reused"] == 2 and not changed["stats"]["files_skipped"]
+    assert changed["stats"]["rows_processed"] == first["stats"]["rows_processed"] + 1
+    assert changed["stats"]["rows_processed"] - changed["rows_cached"] == 11
+
+
+def _crash_on_second_file(docx_path, excel_path, timeout=None):
+    if docx_path.endswith("2.docx"):
+        os._exit(1)
+    return _convert_file(docx_path, excel_path, timeout)
+
+
+def test_batch_survives_dead_worker(tmp_path, monkeypatch):
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for seed in range(1, 7):
+        generate_docx(str(input_dir / f"{seed}.docx"), rows=20, tables=2, seed=seed)
+    # Рабочие процессы создаются fork и получают подмененную функцию
+    monkeypatch.setattr(docx_to_excel_cli, "convert_file", _crash_on_second_file)
+
+    summary = run_batch(str(input_dir), str(tmp_path / "out"), jobs=1)
+
+    assert summary["files_total"] == 6
+    assert summary["files_failed"] == 1
+    failed = [result for result in summary["results"] if not result["ok"]]
+    assert failed[0]["input"].endswith("2.docx")
+    assert "BrokenProcessPool" in failed[0]["error"]
+    assert len(os.listdir(tmp_path / "out")) == 5
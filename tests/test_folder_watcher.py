@@ -0,0 +1,91 @@
+import io
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from folder_watcher import FolderWatcher
+
+
+class _Executor:
+    """Пул, задания которого завершаются по команде теста"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.futures = []
+        self.closed = False
+
+    def submit(self, fn, path, *args):
+        if self.broken:
+            raise BrokenProcessPool("пул сломан")
+        future = Future()
+        self.futures.append((path, future))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.closed = True
+
+
+def _watcher(tmp_path, monkeypatch, executors, **options):
+    (tmp_path / "in").mkdir()
+    for name in ("a.docx", "b.docx"):
+        (tmp_path / "in" / name).write_bytes(b"docx")
+    watcher = FolderWatcher(str(tmp_path / "in"), str(tmp_path / "out"), jobs=2, settle=0,
+                            stream=io.StringIO(), **options)
+    executors = iter(executors)
+    monkeypatch.setattr(watcher, "_create_executor", lambda: next(executors))
+    watcher._executor = watcher._create_executor()
+    watcher._scan(0.0)
+    return watcher
+
+
+def _ok():
+    return {"ok": True, "tables": 1, "seconds": 0.1}
+
+
+def test_failed_conversion_is_retried(tmp_path, monkeypatch):
+    executor = _Executor()
+    watcher = _watcher(tmp_path, monkeypatch, [executor], retries=1)
+    watcher._submit()
+    (a, first), (b, second) = executor.futures
+    first.set_result(_ok())
+    second.set_result({"ok": False, "error": "ValueError: таблица"})
+    watcher._collect()
+
+    assert a in watcher._done and b not in watcher._done
+    watcher._scan(1.0)
+    assert [path for path, _, _ in watcher._queue] == [b]
+
+    watcher._submit()
+    executor.futures[-1][1].set_exception(ValueError("таблица"))
+    watcher._collect()
+    # Попытки для неизмененного файла исчерпаны
+    watcher._scan(2.0)
+    assert not watcher._queue and b not in watcher._done
+
+
+def test_broken_pool_is_recreated(tmp_path, monkeypatch):
+    broken, replacement = _Executor(), _Executor()
+    watcher = _watcher(tmp_path, monkeypatch, [broken, replacement])
+    watcher._submit()
+    paths = [path for path, _ in broken.futures]
+    for _, future in broken.futures:
+        future.set_exception(BrokenProcessPool("рабочий процесс завершился"))
+    watcher._collect()
+
+    assert broken.closed and watcher._executor is replacement
+    assert not watcher._running and not watcher._done
+    assert [path for path, _, _ in watcher._queue] == paths
+
+    watcher._submit()
+    assert [path for path, _ in replacement.futures] == paths
+
+
+def test_submit_to_broken_pool_requeues(tmp_path, monkeypatch):
+    broken, replacement = _Executor(broken=True), _Executor()
+    watcher = _watcher(tmp_path, monkeypatch, [broken, replacement])
+    queued = list(watcher._queue)
+    watcher._submit()
+
+    assert watcher._executor is replacement and list(watcher._queue) == queued
+    watcher._submit()
+    assert len(replacement.futures) == 2
+    assert "BrokenProcessPool" in watcher.stream.getvalue()
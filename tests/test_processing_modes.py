@@ -0,0 +1,246 @@
+import random
+from datetime import datetime
+
+import openpyxl
+import pytest
+
+from benchmark import generate_docx
+from column_widths import SAMPLE_STEP, ColumnWidthTracker
+from conversion_cache import ConversionCache
+from docx_table_reader import iter_docx_tables
+from docx_to_excel_logic import DocxToExcelProcessor, _ColumnTable, _SpillableRows
+
+
+def _read_workbook(excel_path):
+    """Значения ячеек и ширина столбцов каждого листа"""
+    workbook = openpyxl.load_workbook(excel_path)
+    try:
+        return {
+            sheet.title: (
+                [list(row) for row in sheet.iter_rows(values_only=True)],
+                {letter: dimension.width for letter, dimension in sheet.column_dimensions.items()},
+            )
+            for sheet in workbook.worksheets
+        }
+    finally:
+        workbook.close()
+
+
+def _convert(tmp_path, docx_path, name, **options):
+    excel_path = str(tmp_path / f"{name}.xlsx")
+    table_count, stats = DocxToExcelProcessor(**options).convert_and_process(docx_path, excel_path)
+    return table_count, stats, _read_workbook(excel_path)
+
+
+@pytest.fixture(params=[1, 2])
+def docx_path(request, tmp_path):
+    path = str(tmp_path / "input.docx")
+    generate_docx(path, rows=300, tables=3, seed=request.param)
+    return path
+
+
+def test_fused_execution_matches_columns(tmp_path, docx_path):
+    fused = _convert(tmp_path, docx_path, "fused", execution="fused")
+    columns = _convert(tmp_path, docx_path, "columns", execution="columns")
+
+    assert fused == columns
+    assert fused[1]["rows_processed"] and fused[1]["total_dates_normalized"]
+
+
+def test_stream_writer_matches_openpyxl(tmp_path, docx_path):
+    stream = _convert(tmp_path, docx_path, "stream", output_backend="stream")
+    workbook = _convert(tmp_path, docx_path, "openpyxl", output_backend="openpyxl")
+
+    assert stream == workbook
+    assert all(widths for _, widths in stream[2].values())
+
+
+@pytest.mark.parametrize("options", [{}, {"column_width_limit": 40}])
+def test_stream_writer_matches_openpyxl_in_two_steps(tmp_path, docx_path, options):
+    results = []
+    for backend in ("stream", "openpyxl"):
+        excel_path = str(tmp_path / f"{backend}.xlsx")
+        processor = DocxToExcelProcessor(output_backend=backend, **options)
+        processor.convert_docx_to_excel(docx_path, excel_path)
+        stats = processor.process_excel_file(excel_path)
+        results.append((stats, _read_workbook(excel_path)))
+
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("memory_limit", [1, 20000])
+def test_spilled_rows_match_in_memory(tmp_path, docx_path, monkeypatch, memory_limit):
+    spills = []
+    spill = _SpillableRows._spill
+
+    def counting_spill(rows):
+        spills.append(len(rows))
+        spill(rows)
+
+    monkeypatch.setattr(_SpillableRows, "_spill", counting_spill)
+    limited = _convert(tmp_path, docx_path, "limited", memory_limit=memory_limit)
+    assert spills
+
+    assert limited == _convert(tmp_path, docx_path, "unlimited")
+
+
+def _without_cache_counters(stats):
+    """Статистика без попаданий и промахов кэшей преобразований"""
+    return {key: value for key, value in stats.items() if "_cache_" not in key}
+
+
+def test_parallel_tables_match_serial(tmp_path, docx_path):
+    parallel = _convert(tmp_path, docx_path, "parallel", table_workers=2)
+    serial = _convert(tmp_path, docx_path, "serial")
+
+    assert parallel[0] == serial[0] and parallel[2] == serial[2]
+    # Кэши преобразований у каждого рабочего процесса свои
+    assert _without_cache_counters(parallel[1]) == _without_cache_counters(serial[1])
+
+
+@pytest.mark.parametrize("cache_size", [0, 8])
+def test_cached_transforms_match_uncached(tmp_path, docx_path, cache_size):
+    cached = _convert(tmp_path, docx_path, "cached", date_backend="python")
+    other = _convert(tmp_path, docx_path, "other", date_backend="python", cache_size=cache_size)
+
+    assert cached[0] == other[0] and cached[2] == other[2]
+    assert _without_cache_counters(cached[1]) == _without_cache_counters(other[1])
+    assert cached[1]["date_cache_hits"]
+    if cache_size == 0:
+        assert not other[1]["date_cache_hits"]
+
+
+def test_date_cache_is_keyed_by_year(monkeypatch):
+    import docx_to_excel_logic
+
+    year = {"value": 2029}
+
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(year["value"], 1, 1)
+
+    monkeypatch.setattr(docx_to_excel_logic, "datetime", _Clock)
+    processor = DocxToExcelProcessor(share_cache=True)
+
+    assert processor._normalize_date_value("01.02.30") == "01.02.1930"
+    # После смены года двузначный год раскрывается заново, а не берется из кэша
+    year["value"] = 2031
+    assert processor._normalize_date_value("01.02.30") == "01.02.2030"
+    assert processor._date_cache.misses == 2
+
+
+_REUSE_COUNTERS = ("files_skipped", "tables_reused", "rows_reused")
+
+
+def _without_reuse_counters(stats):
+    return {key: value for key, value in _without_cache_counters(stats).items()
+            if key not in _REUSE_COUNTERS}
+
+
+def test_conversion_cache_matches_uncached(tmp_path, docx_path):
+    reference = _convert(tmp_path, docx_path, "reference")
+    processor = DocxToExcelProcessor(conversion_cache=ConversionCache(str(tmp_path / "cache")))
+    excel_path = str(tmp_path / "cached.xlsx")
+
+    def convert():
+        table_count, stats = processor.convert_and_process(docx_path, excel_path)
+        return table_count, stats, _read_workbook(excel_path)
+
+    first = convert()
+    assert first == reference
+
+    # Неизмененный файл берется из кэша целиком
+    assert processor.cached_result(docx_path, excel_path) is not None
+    hit = convert()
+    assert hit[1]["files_skipped"] == 1 and hit[1]["tables_reused"] == hit[0]
+    assert hit[0] == reference[0] and hit[2] == reference[2]
+    assert _without_reuse_counters(hit[1]) == _without_reuse_counters(reference[1])
+
+    # После удаления из кэша файл и его таблицы обрабатываются заново
+    assert processor.invalidate_cached(docx_path)
+    assert processor.cached_result(docx_path, excel_path) is None
+    assert convert() == reference
+
+
+def _old_column_widths(rows):
+    """Автоподбор ширины до ColumnWidthTracker: по всем ячейкам листа openpyxl"""
+    sheet = openpyxl.Workbook().active
+    for row in rows:
+        sheet.append(row)
+    return {
+        cells[0].column_letter: max(len(str(cell.value)) for cell in cells) + 2
+        for cells in sheet.columns
+    }
+
+
+def _random_rows(count, seed=1):
+    rng = random.Random(seed)
+
+    def value():
+        kind = rng.randrange(3)
+        if kind == 0:
+            return None
+        if kind == 1:
+            return rng.randint(0, 10 ** rng.randint(1, 9))
+        return "х" * rng.randint(1, 40)
+
+    rows = [[value() for _ in range(rng.randint(0, 9))] for _ in range(count)]
+    # Пустые строки в конце листа не занимают ячеек
+    return rows + [[]] * 3
+
+
+def _tracked_widths(rows, **options):
+    tracker = ColumnWidthTracker(**options)
+    for row in rows:
+        tracker.add_row(row)
+    return tracker.widths()
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_column_width_tracker_matches_full_scan(seed):
+    rows = _random_rows(700, seed)
+    widths = _old_column_widths(rows)
+
+    assert _tracked_widths(rows) == widths
+    assert _tracked_widths(rows, sample_rows=len(rows)) == widths
+    assert _tracked_widths(rows, max_width=20) == {
+        letter: min(width, 20) for letter, width in widths.items()
+    }
+    # В режиме выборки ширина - как у листа только из измеренных строк
+    measured = [row for number, row in enumerate(rows, 1)
+                if number <= 50 or (number - 50) % SAMPLE_STEP == 0]
+    assert _tracked_widths(rows, sample_rows=50) == _old_column_widths(measured)
+
+
+@pytest.mark.parametrize("execution", ["fused", "columns"])
+def test_pandas_dates_match_python(tmp_path, docx_path, execution):
+    pytest.importorskip("pandas")
+    vectorized = _convert(tmp_path, docx_path, "pandas", date_backend="pandas", execution=execution)
+    python = _convert(tmp_path, docx_path, "python", date_backend="python", execution=execution)
+
+    assert vectorized[0] == python[0] and vectorized[2] == python[2]
+    # Различаются только счетчики кэша дат
+    assert _without_cache_counters(vectorized[1]) == _without_cache_counters(python[1])
+
+
+def _sheet_values(rows):
+    return [[None if value == "" else value for value in row] for row in rows]
+
+
+def test_column_table_matches_openpyxl_sheet(docx_path):
+    processor = DocxToExcelProcessor()
+    for rows in iter_docx_tables(docx_path):
+        rows = list(rows)
+        sheet = openpyxl.Workbook().active
+        for row in rows:
+            sheet.append(row)
+        table = _ColumnTable(rows)
+
+        sheet_stats, table_stats = processor._create_stats(), processor._create_stats()
+        processor._process_sheet(sheet, sheet_stats)
+        processor._process_sheet(table, table_stats)
+
+        assert table.max_row == sheet.max_row
+        assert _sheet_values(table) == _sheet_values(sheet.iter_rows(values_only=True))
+        assert _without_cache_counters(table_stats) == _without_cache_counters(sheet_stats)
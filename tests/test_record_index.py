@@ -0,0 +1,69 @@
+from collections import Counter
+
+import openpyxl
+import pytest
+
+from docx_to_excel_logic import DocxToExcelProcessor
+from record_index import MASTER_SHEET_TITLE, RecordIndex
+
+
+def _row(number, person, birth, end, note=None):
+    return [str(number), person, birth, "ст. 158", "2 г.", end, note]
+
+
+def _read_rows(excel_path):
+    workbook = openpyxl.load_workbook(excel_path, read_only=True)
+    try:
+        return [list(row) for row in workbook[MASTER_SHEET_TITLE].iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+@pytest.fixture
+def index(tmp_path):
+    with RecordIndex(str(tmp_path / "index.sqlite")) as index:
+        yield index
+
+
+def test_incremental_export_matches_full(index, tmp_path):
+    master = str(tmp_path / "master.xlsx")
+    index.add_rows([_row(1, "Петров П.П.", "02.02.1990", "01.01.2020"),
+                    _row(2, "Иванов И.И.", "01.01.1980", "01.01.2021")], "a.docx", "Таблица 1")
+    assert index.write_master_workbook(master) == 2
+
+    index.add_rows([_row(1, "Иванов  и.и.", "01.01.1980", "01.01.2021", "изменено"),
+                    _row(2, "Алексеев А.А.", "03.03.1970", ""),
+                    _row(3, "Сидоров С.С.", "04.04.2000", "01.01.2022")], "b.docx", "Таблица 1")
+    assert index.write_master_workbook(master) == 4
+    incremental = _read_rows(master)
+
+    full = str(tmp_path / "full.xlsx")
+    assert index.write_master_workbook(full, full=True) == 4
+    assert incremental == _read_rows(full)
+    assert [row[3] for row in incremental] == ["Алексеев А.А.", "Иванов  и.и.", "Петров П.П.", "Сидоров С.С."]
+    assert incremental[1][0] == "b.docx"
+
+
+def test_export_without_changes_keeps_workbook(index, tmp_path):
+    master = tmp_path / "master.xlsx"
+    index.add_rows([_row(1, "Петров П.П.", "02.02.1990", "01.01.2020")], "a.docx", "Таблица 1")
+    assert index.write_master_workbook(str(master)) == 1
+    modified = master.stat().st_mtime_ns
+
+    index.add_rows([_row(1, "Петров П.П.", "02.02.1990", "01.01.2020")], "b.docx", "Таблица 1")
+    assert index.write_master_workbook(str(master)) == 1
+    assert master.stat().st_mtime_ns == modified
+
+
+def test_failed_workbook_write_leaves_index_unchanged(index, tmp_path):
+    processor = DocxToExcelProcessor(cache_size=0, record_index=index)
+    sheets = [(1, "Таблица 1", [_row(1, "Петров П.П.", "02.02.1990", "01.01.2020")])]
+    stats = Counter()
+
+    with pytest.raises(OSError):
+        processor.write_processed_tables("a.docx", str(tmp_path / "missing" / "a.xlsx"), sheets, stats)
+    assert index.info() == {"records": 0, "revision": 0}
+
+    assert processor.write_processed_tables("a.docx", str(tmp_path / "a.xlsx"), sheets, stats) == 1
+    assert index.info() == {"records": 1, "revision": 1}
+    assert stats["records_added"] == 1
@@ -0,0 +1,79 @@
+import codecs
+import csv
+import json
+
+import openpyxl
+import pytest
+
+from benchmark import generate_docx
+from docx_to_excel_logic import DocxToExcelProcessor
+
+
+def _xlsx_rows(excel_path):
+    """Строки всех листов книги: (номер таблицы, значения), пустые ячейки - None"""
+    workbook = openpyxl.load_workbook(excel_path, read_only=True)
+    try:
+        return [
+            (int(title.rsplit("_", 1)[1]), list(row))
+            for title in workbook.sheetnames
+            for row in workbook[title].iter_rows(values_only=True)
+        ]
+    finally:
+        workbook.close()
+
+
+def _csv_rows(path):
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        return [(int(row[0]), [value or None for value in row[1:]]) for row in csv.reader(stream)]
+
+
+def _jsonl_rows(path):
+    with open(path, encoding="utf-8") as stream:
+        records = [json.loads(line) for line in stream]
+    return [(record["table"], record["values"]) for record in records]
+
+
+def _parquet_rows(path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    table = parquet.read_table(path).to_pydict()
+    return list(zip(table["table"], table["values"]))
+
+
+def _pad(rows, width):
+    return [(table, values + [None] * (width - len(values))) for table, values in rows]
+
+
+@pytest.fixture
+def converted(tmp_path):
+    docx_path = str(tmp_path / "input.docx")
+    generate_docx(docx_path, rows=120, tables=3)
+    excel_path = str(tmp_path / "output.xlsx")
+    _, stats = DocxToExcelProcessor().convert_and_process(docx_path, excel_path)
+    return docx_path, stats, _xlsx_rows(excel_path)
+
+
+@pytest.mark.parametrize("output_format, read_rows", [
+    ("csv", _csv_rows),
+    ("jsonl", _jsonl_rows),
+    ("parquet", _parquet_rows),
+])
+def test_row_formats_match_xlsx(tmp_path, converted, output_format, read_rows):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    docx_path, xlsx_stats, xlsx_rows = converted
+    path = str(tmp_path / f"output.{output_format}")
+
+    _, stats = DocxToExcelProcessor(output_format=output_format).convert_and_process(docx_path, path)
+
+    assert stats == xlsx_stats
+    # Строки листа XLSX дополнены пустыми ячейками до ширины листа
+    width = max(len(values) for _, values in xlsx_rows)
+    assert _pad(read_rows(path), width) == _pad(xlsx_rows, width)
+
+
+def test_csv_starts_with_bom(tmp_path, converted):
+    path = str(tmp_path / "output.csv")
+    DocxToExcelProcessor(output_format="csv").convert_and_process(converted[0], path)
+
+    with open(path, "rb") as stream:
+        assert stream.read(3) == codecs.BOM_UTF8
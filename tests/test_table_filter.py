@@ -0,0 +1,34 @@
+import csv
+import json
+
+import pytest
+
+from benchmark import generate_docx
+from docx_to_excel_logic import DocxToExcelProcessor
+from table_filter import TableFilter
+
+
+def _read_table_numbers(path, output_format):
+    if output_format == "csv":
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            return [int(row[0]) for row in csv.reader(stream)]
+    with open(path, encoding="utf-8") as stream:
+        records = [json.loads(line) for line in stream]
+    assert all(record["sheet"] == f"Таблица_{record['table']}" for record in records)
+    return [record["table"] for record in records]
+
+
+@pytest.mark.parametrize("output_format", ["csv", "jsonl"])
+@pytest.mark.parametrize("method", ["convert_docx_to_excel", "convert_and_process"])
+def test_filtered_rows_keep_document_table_numbers(tmp_path, output_format, method):
+    docx_path = str(tmp_path / "input.docx")
+    generate_docx(docx_path, rows=30, tables=3)
+    output_path = str(tmp_path / f"output.{output_format}")
+    processor = DocxToExcelProcessor(output_format=output_format,
+                                     table_filter=TableFilter(positions={2, 3}))
+
+    getattr(processor, method)(docx_path, output_path)
+
+    numbers = _read_table_numbers(output_path, output_format)
+    assert set(numbers) == {2, 3}
+    assert numbers == sorted(numbers)
@@ -0,0 +1,166 @@
+"""
+Нормализация дат целым столбцом средствами pandas/NumPy
+
+Функции повторяют правила DocxToExcelProcessor для значений одного
+столбца (_normalize_date_value, _normalize_birth_date_value и
+_split_end_date_value): даты ищутся тем же выражением _DATE_TOKEN_RE
+через Series.str (модуль re, поэтому \\d и границы дат совпадают),
+двузначный год раскрывается и день с месяцем дополняются нулями сразу
+для всего столбца. Результаты совпадают с построчной обработкой.
+
+Требует pandas; сам pandas загружается при первом вызове.
+"""
+import importlib.util
+
+PANDAS_AVAILABLE = importlib.util.find_spec("pandas") is not None
+
+# Группы _DATE_TOKEN_RE (с нуля) с днем, месяцем и годом для каждого
+# формата: ДД.ММ.ГГ(ГГ), ДДММ.ГГ и ДДММГГГГ
+_DAY_GROUPS = (0, 4, 7)
+_MONTH_GROUPS = (2, 5, 8)
+_YEAR_GROUPS = (3, 6, 9)
+_TOKEN_GROUP_COUNT = 10
+
+
+def normalize_dates(values, token_pattern, current_year):
+    """
+    Даты для значений, которые целиком состоят из одной даты
+
+    Возвращает список той же длины: дата ДД.ММ.ГГГГ или None
+    """
+    texts, codes, present = _unique_texts(values)
+    groups = texts.str.extract(rf"\A(?:{token_pattern})\Z", expand=True)
+    return _expand(_normalize(groups, current_year), codes, present, len(values))
+
+
+def first_dates(values, token_pattern, current_year):
+    """
+    Первые даты значений (даты рождения)
+
+    Возвращает список той же длины: дата ДД.ММ.ГГГГ или None
+    """
+    texts, codes, present = _unique_texts(values)
+    groups = texts.str.extract(f"(?:{token_pattern})", expand=True)
+    return _expand(_normalize(groups, current_year), codes, present, len(values))
+
+
+def split_end_dates(values, token_pattern, current_year):
+    """
+    Разбор значений с датой окончания срока
+
+    Возвращает список той же длины из (новое значение ячейки, текст для
+    переноса или None) или None, если ячейку менять не нужно
+    """
+    texts, codes, present = _unique_texts(values)
+
+    # Первая дата и текст после нее; текст после даты не начинается
+    # с цифры, поэтому найденная дата совпадает с первой из finditer
+    first = texts.str.extract(rf"(?:{token_pattern})(?s:(.*))\Z", expand=True)
+    first_rest = first[_TOKEN_GROUP_COUNT]
+    rest = first_rest[first_rest.notna()]
+    several = rest.index[rest.str.extract(token_pattern, expand=True).notna().any(axis=1)]
+
+    # Тексты с несколькими датами разбираются целиком. Повторы одной и той
+    # же даты не считаются: у дат с одинаковым текстом одинаковы и группы
+    distinct = {
+        position: list(dict.fromkeys(tokens))
+        for position, tokens in zip(several, texts[several].str.findall(token_pattern))
+    }
+    pairs = [position for position, tokens in distinct.items() if len(tokens) == 2]
+    second = _pandas().DataFrame([distinct[position][1] for position in pairs], index=pairs,
+                                 columns=range(_TOKEN_GROUP_COUNT), dtype=object)
+    second = second.mask(second == "").reindex(texts.index)
+
+    first_dates = _normalize(first, current_year)
+    second_dates = _normalize(second, current_year)
+    text_after = first_rest.str.strip()
+    date_counts = [len(distinct.get(position, ())) for position in texts.index]
+
+    results = []
+    for text, first_date, second_date, after, date_count in zip(
+        texts, first_dates, second_dates, text_after, date_counts
+    ):
+        if not text:
+            # Пустое после strip значение не меняется
+            results.append(None)
+        elif first_date is None or date_count > 2:
+            # Без дат или с тремя и больше датами текст переносится целиком
+            results.append(("", text))
+        elif second_date is not None:
+            # Две даты: остается вторая
+            results.append((second_date, None))
+        else:
+            results.append((first_date, after or None))
+    return _expand(results, codes, present, len(values))
+
+
+def _pandas():
+    import pandas
+
+    return pandas
+
+
+def _unique_texts(values):
+    """
+    Различные тексты непустых значений (str(value).strip()), номер
+    текста для каждого непустого значения и позиции непустых значений
+
+    Пустые значения (None, "", 0) не обрабатываются, как и в построчных
+    правилах. Значения в столбцах часто повторяются, поэтому выражения
+    применяются только к различным текстам. Тип object сохраняет
+    обработку строк модулем re
+    """
+    pd = _pandas()
+    series = pd.Series(values, dtype=object)
+    present = series.astype(bool).to_numpy()
+    codes, uniques = pd.factorize(series[present].astype(str).astype(object))
+    texts = pd.Series(uniques, dtype=object).str.strip()
+    return texts, codes, present
+
+
+def _normalize(groups, current_year):
+    """Список дат ДД.ММ.ГГГГ по группам _DATE_TOKEN_RE; None - даты нет"""
+    import numpy
+
+    day = _first_group(groups, _DAY_GROUPS)
+    month = _first_group(groups, _MONTH_GROUPS)
+    year = _first_group(groups, _YEAR_GROUPS)
+
+    found = day.notna().to_numpy()
+    dates = numpy.full(len(groups), None, dtype=object)
+    if not found.any():
+        return dates.tolist()
+    day = day[found]
+    month = month[found]
+    year = year[found]
+
+    # int() понимает и цифры других алфавитов, которые находит \d
+    day = day.astype("int64").astype(str).astype(object).str.zfill(2)
+    month = month.astype("int64").astype(str).astype(object).str.zfill(2)
+
+    # Двузначный год раскрывается, как в DocxToExcelProcessor._expand_year
+    short = (year.str.len() == 2).to_numpy()
+    if short.any():
+        short_year = year[short].astype("int64").to_numpy()
+        expanded = numpy.where(short_year <= current_year % 100, 2000 + short_year, 1900 + short_year)
+        year = year.copy()
+        year[short] = expanded.astype(str).astype(object)
+
+    dates[found] = (day + "." + month + "." + year).to_numpy(dtype=object)
+    return dates.tolist()
+
+
+def _first_group(groups, columns):
+    """Значение первой найденной из групп columns"""
+    result = groups[columns[0]]
+    for column in columns[1:]:
+        result = result.fillna(groups[column])
+    return result
+
+
+def _expand(unique_results, codes, present, length):
+    """Результаты для всех значений по результатам различных текстов; у пустых значений - None"""
+    output = [None] * length
+    for position, code in zip(present.nonzero()[0], codes):
+        output[position] = unique_results[code]
+    return output
@@ -0,0 +1,246 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+from column_widths import ColumnWidthTracker
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+
+SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{index}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<styleSheet xmlns="{MAIN_NS}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+SHEET_HEADER_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+)
+
+class XlsxStreamWriter:
+    """
+    Потоковая запись книги XLSX без создания объектов ячеек openpyxl.
+
+    Строки листа сразу сериализуются во временный файл, а при закрытии
+    листа переносятся в zip-архив книги. Ширина столбцов рассчитывается
+    по мере записи строк (column_widths.ColumnWidthTracker), в памяти
+    хранятся только максимальные длины значений по столбцам.
+
+    max_width и sample_rows - ограничение ширины столбца и режим выборки
+    строк для расчета ширины (см. ColumnWidthTracker)
+
+    Пример:
+        writer = XlsxStreamWriter("out.xlsx")
+        sheet = writer.add_sheet("Таблица_1")
+        sheet.append(["a", "b"])
+        writer.close()
+    """
+
+    def __init__(self, path, max_width=None, sample_rows=None):
+        self.path = path
+        self.max_width = max_width
+        self.sample_rows = sample_rows
+        self._archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+        self._sheet_titles = []
+        self._current_sheet = None
+        self._closed = False
+
+    def add_sheet(self, title):
+        """Создает новый лист; предыдущий лист при этом закрывается"""
+        self._close_current_sheet()
+        self._sheet_titles.append(title)
+        self._current_sheet = _SheetStream(
+            self._archive,
+            f"xl/worksheets/sheet{len(self._sheet_titles)}.xml",
+            ColumnWidthTracker(self.max_width, self.sample_rows),
+        )
+        return self._current_sheet
+
+    def close(self):
+        """Записывает служебные части книги и закрывает архив; повторный вызов ничего не делает"""
+        if self._closed:
+            return
+        self._closed = True
+        self._close_current_sheet()
+
+        sheets = "".join(
+            SHEET_CONTENT_TYPE.format(index=index)
+            for index in range(1, len(self._sheet_titles) + 1)
+        )
+        self._archive.writestr("[Content_Types].xml", CONTENT_TYPES_XML.format(sheets=sheets))
+        self._archive.writestr("_rels/.rels", ROOT_RELS_XML)
+        self._archive.writestr("xl/workbook.xml", self._workbook_xml())
+        self._archive.writestr("xl/_rels/workbook.xml.rels", self._workbook_rels_xml())
+        self._archive.writestr("xl/styles.xml", STYLES_XML)
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif not self._closed:
+            # При ошибке не оставляем недописанный лист открытым
+            # и удаляем недописанный файл книги
+            if self._current_sheet is not None:
+                self._current_sheet.discard()
+            self._archive.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _close_current_sheet(self):
+        if self._current_sheet is not None:
+            self._current_sheet.close()
+            self._current_sheet = None
+
+    def _workbook_xml(self):
+        sheets = "".join(
+            f'<sheet name={quoteattr(title)} sheetId="{index}" r:id="rId{index}"/>'
+            for index, title in enumerate(self._sheet_titles, 1)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+            f'<sheets>{sheets}</sheets>'
+            '</workbook>'
+        )
+
+    def _workbook_rels_xml(self):
+        relationships = [
+            f'<Relationship Id="rId{index}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, len(self._sheet_titles) + 1)
+        ]
+        relationships.append(
+            f'<Relationship Id="rId{len(self._sheet_titles) + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/>'
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{PACKAGE_REL_NS}">{"".join(relationships)}</Relationships>'
+        )
+
+
+class _SheetStream:
+    """Лист XLSX, строки которого пишутся во временный файл по мере поступления"""
+
+    def __init__(self, archive, part_name, width_tracker):
+        self._archive = archive
+        self._part_name = part_name
+        self._buffer = tempfile.TemporaryFile()
+        self._width_tracker = width_tracker
+        self._letters = []
+        # Номер следующей строки
+        self._row_count = 0
+
+    def append(self, values):
+        """Дописывает строку значений; None означает отсутствующую ячейку"""
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        self._width_tracker.add_row(values)
+
+        self._row_count += 1
+        row_number = self._row_count
+        parts = [f'<row r="{row_number}">']
+
+        while len(self._letters) < len(values):
+            self._letters.append(get_column_letter(len(self._letters) + 1))
+
+        for index, value in enumerate(values):
+            if value is None:
+                continue
+            text = str(value)
+            if text == "":
+                continue
+            reference = f"{self._letters[index]}{row_number}"
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                parts.append(f'<c r="{reference}"><v>{text}</v></c>')
+            else:
+                parts.append(f'<c r="{reference}" t="inlineStr"><is>{_text_element(text)}</is></c>')
+
+        parts.append("</row>")
+        self._buffer.write("".join(parts).encode("utf-8"))
+
+    def column_widths(self):
+        """Ширина столбцов: {буква столбца: ширина}"""
+        return self._width_tracker.widths()
+
+    def close(self):
+        """Переносит лист в архив книги"""
+        with self._archive.open(self._part_name, "w", force_zip64=True) as part:
+            part.write(SHEET_HEADER_XML.encode("utf-8"))
+            part.write(self._cols_xml().encode("utf-8"))
+            part.write(b"<sheetData>")
+            self._buffer.seek(0)
+            shutil.copyfileobj(self._buffer, part)
+            part.write(b"</sheetData></worksheet>")
+        self._buffer.close()
+
+    def discard(self):
+        """Освобождает временный файл, не записывая лист"""
+        self._buffer.close()
+
+    def _cols_xml(self):
+        widths = self.column_widths()
+        if not widths:
+            return ""
+        cols = "".join(
+            f'<col min="{index}" max="{index}" width="{width}" customWidth="1"/>'
+            for index, width in enumerate(widths.values(), 1)
+        )
+        return f"<cols>{cols}</cols>"
+
+
+def _text_element(text):
+    """Элемент <t> с экранированным текстом"""
+    if ILLEGAL_CHARACTERS_RE.search(text):
+        raise IllegalCharacterError(f"{text} cannot be used in worksheets.")
+    escaped = escape(text).replace("\r", "&#13;")
+    if text != text.strip():
+        return f'<t xml:space="preserve">{escaped}</t>'
+    return f"<t>{escaped}</t>"